@@ -0,0 +1,30 @@
+import json
+import sys
+
+import paho.mqtt.client as mqtt
+
+# Import the MQTT broker configuration
+from app.api.config.env import MQTT_BROKER_HOST, \
+                               MQTT_BROKER_PORT, \
+                               MQTT_BROKER_USERNAME, \
+                               MQTT_BROKER_PASSWORD, \
+                               MQTT_TOPIC_PREFIX
+
+# Suscribirse a los eventos del ledger publicados en el broker MQTT (con MQTT_PUBLISHER=true en la API)
+# Uso: python -m app.api.clients.subscribe_mqtt_events [topic], por ejemplo "transactions/processed"
+TOPIC = f"{MQTT_TOPIC_PREFIX}/{sys.argv[1] if len(sys.argv) > 1 else '#'}"
+
+def on_connect(client, userdata, flags, rc):
+    print(f"Conectado al broker MQTT ({mqtt.connack_string(rc)}), suscrito a {TOPIC}")
+    client.subscribe(TOPIC, qos=1)
+
+def on_message(client, userdata, message):
+    print(message.topic, json.loads(message.payload))
+
+client = mqtt.Client()
+if MQTT_BROKER_USERNAME:
+    client.username_pw_set(MQTT_BROKER_USERNAME, MQTT_BROKER_PASSWORD)
+client.on_connect = on_connect
+client.on_message = on_message
+client.connect(MQTT_BROKER_HOST, MQTT_BROKER_PORT)
+client.loop_forever()
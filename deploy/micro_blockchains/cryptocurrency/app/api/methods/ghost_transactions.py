@@ -1,6 +1,5 @@
 # methods/ghost_transactions.py
 
-import time
 import networkx as nx
 import matplotlib.pyplot as plt
 
@@ -22,7 +21,7 @@ def send_ghost_transaction(dag) -> None:
     Returns:
     - None
     """
-    while True:
+    while not dag.is_stopped():
         try:
             #print("Creando transacción fantasma...")
 
@@ -40,11 +39,11 @@ def send_ghost_transaction(dag) -> None:
         except Exception as e:
             print(f"Error: {e}")
             
-        dag.save_dag_to_json()
+        dag.persist()
 
         # DAGBlockchain graph visualization
         #nx.draw(dag.graph, with_labels=False, font_weight='bold', node_size=700, node_color='lightblue')
         #plt.show()
 
         #print("Sleping...")
-        time.sleep(10)
\ No newline at end of file
+        dag.wait_until_stopped(10)
\ No newline at end of file
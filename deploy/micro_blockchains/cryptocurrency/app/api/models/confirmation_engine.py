@@ -0,0 +1,221 @@
+# models/confirmation_engine.py
+
+import heapq
+from pydantic import BaseModel, Field
+
+class ConfirmationMode:
+    """
+    Confirmation modes of the ConfirmationEngine.
+    """
+    APPROVALS = "approvals" # Direct approvals (children) of the transaction
+    CUMULATIVE_WEIGHT = "cumulative_weight" # Distinct direct and indirect approvers of the transaction
+
+class ConfirmationEngine(BaseModel):
+    """
+    ConfirmationEngine Model to keep track of the confirmation of the transactions of the DAG incrementally.
+
+    Only the pending (unconfirmed) transactions are tracked. Each one keeps its number of direct approvals
+    and its cumulative weight (the number of distinct transactions approving it directly or indirectly).
+    A transaction is confirmed once the value of the mode reaches the threshold: it leaves the pending
+    transactions and is queued until the DAG processes it. The queue is drained in causal order, the
+    insertion order of the DAG (a transaction is always inserted after its parents).
+
+    In approvals mode a new transaction costs O(parents). In cumulative_weight mode its weight is
+    propagated to the pending ancestors only (confirmed transactions stop the propagation), so the cost
+    depends on the unconfirmed region of the DAG, not on its size.
+
+    Args:
+    - threshold: int: The approvals (or cumulative weight) needed to confirm a transaction.
+    - mode: str: approvals or cumulative_weight (ConfirmationMode).
+    - pending: dict: The [approvals, cumulative weight] of every unconfirmed transaction.
+    - confirmed: list: The heap of the confirmed transactions waiting to be processed, as (node id, transaction ID).
+
+    Returns:
+    - ConfirmationEngine: A new instance of the ConfirmationEngine model
+    """
+    threshold: int = Field(default=4, description="The approvals (or cumulative weight) needed to confirm a transaction.")
+    mode: str = Field(default=ConfirmationMode.APPROVALS, description="approvals or cumulative_weight.")
+    pending: dict = Field(default_factory=dict, description="The [approvals, cumulative weight] of every unconfirmed transaction.")
+    confirmed: list = Field(default_factory=list, description="The heap of the confirmed transactions waiting to be processed.")
+
+    def is_pending(self, transaction_id: str) -> bool:
+        """
+        Check if a transaction is not confirmed yet.
+
+        Args:
+        - transaction_id: str
+
+        Returns:
+        - bool
+        """
+        return transaction_id in self.pending
+
+    def add(self, transaction_id: str) -> None:
+        """
+        Register a new transaction. New transactions have no approvals.
+
+        Args:
+        - transaction_id: str
+        """
+        # A transaction already in the DAG keeps its approvals
+        self.pending.setdefault(transaction_id, [0, 0])
+
+    def approve(self, store, parent_ids: list) -> None:
+        """
+        Register the approvals of a new transaction and confirm the transactions that reach the threshold.
+
+        Args:
+        - store: LedgerStore: The edges of the new transaction must already be in the store.
+        - parent_ids: list: The parents newly approved by the transaction.
+        """
+        for parent_id in parent_ids:
+            counts = self.pending.get(parent_id)
+            if counts is not None:
+                counts[0] += 1
+
+        if self.mode != ConfirmationMode.CUMULATIVE_WEIGHT:
+            for parent_id in parent_ids:
+                self.confirm_if_ready(store, parent_id)
+            return
+
+        # Every pending ancestor has one more distinct approver
+        ancestor_ids = self.get_pending_ancestors(store, parent_ids)
+        for ancestor_id in ancestor_ids:
+            self.pending[ancestor_id][1] += 1
+        for ancestor_id in ancestor_ids:
+            self.confirm_if_ready(store, ancestor_id)
+
+    def discard(self, store, transaction_id: str, parent_ids: list) -> None:
+        """
+        Remove a transaction. Its pending parents lose an approval and, in cumulative_weight mode,
+        the weight of its pending ancestors is recomputed.
+
+        Args:
+        - store: LedgerStore: The transaction must already be removed from the store.
+        - transaction_id: str
+        - parent_ids: list: The transactions approved by the removed transaction.
+        """
+        # A queued transaction is skipped when the queue is drained
+        self.pending.pop(transaction_id, None)
+
+        for parent_id in parent_ids:
+            counts = self.pending.get(parent_id)
+            if counts is not None:
+                counts[0] -= 1
+
+        if self.mode == ConfirmationMode.CUMULATIVE_WEIGHT:
+            for ancestor_id in self.get_pending_ancestors(store, parent_ids):
+                self.pending[ancestor_id][1] = self.get_cumulative_weight(store, ancestor_id)
+
+    def confirm_if_ready(self, store, transaction_id: str) -> bool:
+        """
+        Confirm a pending transaction if it reached the threshold, queueing it to be processed.
+
+        Args:
+        - store: LedgerStore
+        - transaction_id: str
+
+        Returns:
+        - bool: True if the transaction was confirmed
+        """
+        counts = self.pending.get(transaction_id)
+        if counts is None:
+            return False
+
+        value = counts[1] if self.mode == ConfirmationMode.CUMULATIVE_WEIGHT else counts[0]
+        if value < self.threshold:
+            return False
+
+        del self.pending[transaction_id]
+        heapq.heappush(self.confirmed, (store.get(transaction_id).node, transaction_id))
+        return True
+
+    def pop_confirmed(self, store) -> str:
+        """
+        Take the next confirmed transaction to process, in causal order.
+
+        Args:
+        - store: LedgerStore
+
+        Returns:
+        - str: The transaction ID, or None if there are no confirmed transactions left
+        """
+        while self.confirmed:
+            node, transaction_id = heapq.heappop(self.confirmed)
+
+            # Skip the transactions removed from the DAG after being confirmed
+            if transaction_id in store and store.get(transaction_id).node == node:
+                return transaction_id
+        return None
+
+    def get_pending_ancestors(self, store, transaction_ids: list) -> list:
+        """
+        Get the pending transactions approved directly or indirectly by any of the given transactions
+        (included), without going through confirmed transactions.
+
+        Args:
+        - store: LedgerStore
+        - transaction_ids: list
+
+        Returns:
+        - list: The pending transaction IDs, each one once
+        """
+        visited = set()
+        stack = [transaction_id for transaction_id in transaction_ids if transaction_id in self.pending]
+
+        while stack:
+            transaction_id = stack.pop()
+            if transaction_id in visited:
+                continue
+            visited.add(transaction_id)
+
+            for parent_id in store.parent_ids(transaction_id):
+                if parent_id in self.pending and parent_id not in visited:
+                    stack.append(parent_id)
+
+        return list(visited)
+
+    def get_cumulative_weight(self, store, transaction_id: str) -> int:
+        """
+        Count the distinct transactions approving a transaction directly or indirectly.
+
+        Args:
+        - store: LedgerStore
+        - transaction_id: str
+
+        Returns:
+        - int
+        """
+        visited = set()
+        stack = list(store.get(transaction_id).child_nodes)
+
+        while stack:
+            node = stack.pop()
+            if node in visited:
+                continue
+            visited.add(node)
+            stack.extend(store.nodes[node].child_nodes)
+
+        return len(visited)
+
+    def rebuild(self, store) -> None:
+        """
+        Rebuild the engine from the transactions of the DAG, e.g. after loading the DAG from disk.
+        Unprocessed transactions that already reached the threshold are queued.
+
+        Args:
+        - store: LedgerStore
+        """
+        self.pending.clear()
+        self.confirmed.clear()
+
+        for record in store.records():
+            if record.processed is None:
+                self.pending[record.id] = [len(record.child_nodes), 0]
+
+        if self.mode == ConfirmationMode.CUMULATIVE_WEIGHT:
+            for transaction_id, counts in self.pending.items():
+                counts[1] = self.get_cumulative_weight(store, transaction_id)
+
+        for transaction_id in list(self.pending):
+            self.confirm_if_ready(store, transaction_id)
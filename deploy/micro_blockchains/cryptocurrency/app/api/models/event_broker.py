@@ -0,0 +1,267 @@
+# models/event_broker.py
+
+import asyncio
+import uuid
+
+from collections import deque
+from datetime import datetime
+from threading import Lock
+from pydantic import BaseModel, Field, PrivateAttr
+
+# Import the JSON serialization methods
+from app.api.methods.serialization import dumps
+
+# The events of the transactions, in the order they can happen
+EVENT_TYPES = ("accepted", "rejected", "confirmed", "processed", "failed")
+
+class EventSubscription(BaseModel):
+    """
+    EventSubscription Model: a client of the event stream, with its filters and its queue of pending events.
+
+    The events are published by the writer of the DAG (a thread) and consumed by the stream of the client
+    (a coroutine of the event loop of the API), so they are handed over with call_soon_threadsafe. A client
+    that doesn't keep up with the events is marked as lagged once its queue is full: its stream is closed and
+    the client reconnects with the Last-Event-ID header to get the missed events from the history.
+
+    Args:
+    - filters: dict: The values the attributes of the events must have (e.g. sender_id or contract_address).
+    - event_types: set: The types of the events sent to the client (all if empty).
+    - max_size: int: The maximum number of pending events.
+    - lagged: bool: If the client didn't keep up with the events.
+
+    Returns:
+    - EventSubscription: A new instance of the EventSubscription model
+    """
+    filters: dict = Field(default_factory=dict, description="The values the attributes of the events must have.")
+    event_types: set = Field(default_factory=set, description="The types of the events sent to the client (all if empty).")
+    max_size: int = Field(default=1000, description="The maximum number of pending events.")
+    lagged: bool = Field(default=False, description="If the client didn't keep up with the events.")
+
+    _loop: asyncio.AbstractEventLoop = PrivateAttr(default=None)
+    _queue: asyncio.Queue = PrivateAttr(default=None)
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        # The subscription is created by the stream, in the event loop that consumes it
+        self._loop = asyncio.get_event_loop()
+        self._queue = asyncio.Queue()
+
+    def matches(self, event: dict) -> bool:
+        """
+        Check if an event passes the filters of the subscription.
+
+        Args:
+        - event: dict
+
+        Returns:
+        - bool
+        """
+        if self.event_types and event["type"] not in self.event_types:
+            return False
+        return all(event.get(attribute) == value for attribute, value in self.filters.items())
+
+    def push(self, message: str) -> None:
+        """
+        Hand a message over to the event loop of the subscription (thread-safe).
+
+        Args:
+        - message: str
+        """
+        try:
+            self._loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # The event loop was closed, the subscription is removed by its stream
+            self.lagged = True
+
+    def _put(self, message: str) -> None:
+        """
+        Queue a message, or mark the subscription as lagged if its queue is full. Runs in the event loop.
+        """
+        if self.lagged:
+            return
+
+        if self._queue.qsize() >= self.max_size:
+            self.lagged = True
+            # Wake up the stream so it notices it lagged
+            self._queue.put_nowait(None)
+        else:
+            self._queue.put_nowait(message)
+
+    async def get(self, timeout: float) -> str:
+        """
+        Wait for the next message.
+
+        Args:
+        - timeout: float: Seconds to wait
+
+        Returns:
+        - str: The message, or None if the subscription lagged
+
+        Raises:
+        - asyncio.TimeoutError: If there was no message in time
+        """
+        return await asyncio.wait_for(self._queue.get(), timeout=timeout)
+
+    class Config:
+        """
+        Pydantic configuration for the EventSubscription model.
+
+        Args:
+        - arbitrary_types_allowed: bool
+        """
+        arbitrary_types_allowed = True
+
+class EventBroker(BaseModel):
+    """
+    EventBroker Model to push the events of the transactions (accepted, rejected, confirmed, processed, failed) to the
+    clients of the event stream, so they don't need to poll the API.
+
+    Every event is serialized once, as a server-sent event message, and handed over to the subscriptions whose
+    filters it passes. The last events are kept in a bounded history, so a client that reconnects with the
+    ID of the last event it received doesn't miss the events published in between. The IDs of the events
+    start with the epoch of the broker: the events of a previous run of the node are not replayed.
+
+    Listeners (e.g. the MQTT publisher) get every event too. They are called by the writer of the DAG,
+    so they must not block.
+
+    Args:
+    - history_size: int: The number of events kept to be replayed.
+    - subscription_queue_size: int: The maximum number of pending events of a subscription.
+
+    Returns:
+    - EventBroker: A new instance of the EventBroker model
+    """
+    history_size: int = Field(default=1000, description="The number of events kept to be replayed.")
+    subscription_queue_size: int = Field(default=1000, description="The maximum number of pending events of a subscription.")
+
+    _epoch: str = PrivateAttr(default_factory=lambda: uuid.uuid4().hex[:8])
+    _last_event_number: int = PrivateAttr(default=0)
+    _history: deque = PrivateAttr(default=None)
+    _subscriptions: list = PrivateAttr(default_factory=list)
+    _listeners: list = PrivateAttr(default_factory=list)
+    _lock: Lock = PrivateAttr(default_factory=Lock)
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        self._history = deque(maxlen=self.history_size)
+
+    def publish(self, event_type: str, event: dict) -> None:
+        """
+        Publish an event to the subscriptions and keep it in the history.
+
+        Args:
+        - event_type: str: One of EVENT_TYPES
+        - event: dict: The attributes of the event (transaction_id, sender_id, ...)
+        """
+        if not self._subscriptions and not self.history_size and not self._listeners:
+            return
+
+        with self._lock:
+            self._last_event_number += 1
+            event_id = f"{self._epoch}-{self._last_event_number}"
+            event = {"id": event_id, "type": event_type, "timestamp": datetime.utcnow().isoformat(), **event}
+
+            try:
+                data = dumps(event)
+            except (TypeError, ValueError):
+                # e.g. a smart contract function returning an object that is not JSON serializable
+                event["result"] = repr(event.get("result"))
+                data = dumps(event)
+
+            message = f"id: {event_id}\nevent: {event_type}\ndata: {data}\n\n"
+            self._history.append((self._last_event_number, event, message))
+
+            for subscription in self._subscriptions:
+                if subscription.matches(event):
+                    subscription.push(message)
+
+            for listener in self._listeners:
+                try:
+                    listener(event)
+                except Exception as e:
+                    print(f"Error en el listener de eventos {listener}: {e}")
+
+    def add_listener(self, listener) -> None:
+        """
+        Add a listener of the events.
+
+        Args:
+        - listener: Callable that gets every published event (dict). It must not block.
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def subscribe(self, filters: dict = None, event_types: set = None, last_event_id: str = None) -> tuple:
+        """
+        Subscribe to the events.
+
+        The subscription is registered and the events to replay are taken from the history atomically,
+        so no event is missed or sent twice.
+
+        Args:
+        - filters: dict: The values the attributes of the events must have (None values are ignored).
+        - event_types: set: The types of the events to send (all if None).
+        - last_event_id: str: The ID of the last event received by the client (Last-Event-ID header).
+
+        Returns:
+        - tuple: (EventSubscription, list of the messages to replay)
+        """
+        subscription = EventSubscription(filters={attribute: value for attribute, value in (filters or {}).items() if value is not None},
+                                         event_types=event_types or set(),
+                                         max_size=self.subscription_queue_size)
+
+        with self._lock:
+            replay = []
+            last_event_number = self.get_event_number(last_event_id)
+            if last_event_number is not None:
+                replay = [message for event_number, event, message in self._history
+                          if event_number > last_event_number and subscription.matches(event)]
+
+            self._subscriptions.append(subscription)
+        return subscription, replay
+
+    def unsubscribe(self, subscription: EventSubscription) -> None:
+        """
+        Remove a subscription.
+
+        Args:
+        - subscription: EventSubscription
+        """
+        with self._lock:
+            self._subscriptions = [other for other in self._subscriptions if other is not subscription]
+
+    def get_event_number(self, event_id: str) -> int:
+        """
+        Get the number of an event published by this broker from its ID.
+
+        Args:
+        - event_id: str
+
+        Returns:
+        - int: The number of the event, or None if the ID is not valid or it is from another epoch
+        """
+        if not event_id:
+            return None
+
+        epoch, _, event_number = event_id.partition("-")
+        if epoch != self._epoch or not event_number.isdigit():
+            return None
+        return int(event_number)
+
+    def subscriptions_count(self) -> int:
+        """
+        Get the number of subscriptions.
+
+        Returns:
+        - int
+        """
+        return len(self._subscriptions)
+
+    class Config:
+        """
+        Pydantic configuration for the EventBroker model.
+
+        Args:
+        - arbitrary_types_allowed: bool
+        """
+        arbitrary_types_allowed = True
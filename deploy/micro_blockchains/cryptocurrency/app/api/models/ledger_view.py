@@ -0,0 +1,38 @@
+# models/ledger_view.py
+
+from pydantic import BaseModel, Field
+
+class LedgerView(BaseModel):
+    """
+    LedgerView Model: an immutable, versioned snapshot of the state derived from the DAG, for readers.
+
+    The DAG is mutated by a single writer (holding the DAG lock). After each mutation that changes the
+    balances the writer publishes a new view, so readers such as the API routes get a consistent state
+    without taking the lock and never block the ingestion of transactions. A published view must not be modified.
+
+    Args:
+    - version: int: Incremented every time a new view is published.
+    - balances: dict: A copy of the balances of the wallets.
+    - last_processed_transaction_id: str: The ID of the last transaction applied to the state.
+
+    Returns:
+    - LedgerView: A new instance of the LedgerView model
+    """
+    version: int = Field(default=0, description="Incremented every time a new view is published.")
+    balances: dict = Field(default_factory=dict, description="A copy of the balances of the wallets.")
+    last_processed_transaction_id: str = Field(default=None, description="The ID of the last transaction applied to the state.")
+
+    def with_balances(self, balances: dict, last_processed_transaction_id: str) -> "LedgerView":
+        """
+        Create the next view with a copy of the given balances.
+
+        Args:
+        - balances: dict
+        - last_processed_transaction_id: str
+
+        Returns:
+        - LedgerView
+        """
+        return LedgerView(version=self.version + 1,
+                          balances=dict(balances),
+                          last_processed_transaction_id=last_processed_transaction_id)
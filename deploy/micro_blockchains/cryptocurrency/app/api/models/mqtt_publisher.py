@@ -0,0 +1,216 @@
+# models/mqtt_publisher.py
+
+from queue import Queue, Full, Empty
+from threading import Thread, Event
+from pydantic import BaseModel, Field, PrivateAttr
+
+# Import the JSON serialization methods
+from app.api.methods.serialization import dumps_bytes
+
+# paho-mqtt is optional: without it the events are not published to the MQTT broker
+try:
+    import paho.mqtt.client as mqtt
+except ImportError:
+    mqtt = None
+
+class MQTTPublisher(BaseModel):
+    """
+    MQTTPublisher Model to publish the events of the ledger to an MQTT broker (the bundled Mosquitto).
+
+    The topics are relative to topic_prefix (the API name, allowed by the ACL of the broker):
+    - transactions/{event type}: every event of the transactions (accepted, rejected, confirmed, processed, failed),
+    - contracts/{contract address}/{event type}: the events of the transactions of a smart contract,
+    - contracts/{contract address}/state: the state of a smart contract after it changed (retained, so new
+      subscribers get the last state).
+
+    Publishing never blocks the writer of the DAG: the messages are put in a bounded buffer (dropped when it
+    is full) and a background sender serializes them and hands them to the MQTT client in batches. The sender
+    waits for the last message of each batch to be sent, so a slow broker fills the buffer instead of the
+    memory of the MQTT client. While the broker is unreachable, the messages wait in the buffer and the client
+    reconnects in background.
+
+    Args:
+    - host: str: The host of the MQTT broker.
+    - port: int: The port of the MQTT broker.
+    - username: str: The username of the MQTT broker.
+    - password: str: The password of the MQTT broker.
+    - topic_prefix: str: The prefix of the topics.
+    - qos: int: The quality of service of the messages (0, 1 or 2).
+    - buffer_size: int: The maximum number of messages waiting to be sent.
+    - batch_size: int: The maximum number of messages handed to the MQTT client at once.
+    - dropped: int: The number of messages dropped (the buffer was full or the MQTT client rejected them).
+    - unserializable: int: The number of messages that couldn't be serialized to JSON (not counted as dropped).
+
+    Returns:
+    - MQTTPublisher: A new instance of the MQTTPublisher model
+    """
+    host: str = Field(default="localhost", description="The host of the MQTT broker.")
+    port: int = Field(default=1883, description="The port of the MQTT broker.")
+    username: str = Field(default=None, description="The username of the MQTT broker.")
+    password: str = Field(default=None, description="The password of the MQTT broker.")
+    topic_prefix: str = Field(default="", description="The prefix of the topics.")
+    qos: int = Field(default=1, description="The quality of service of the messages (0, 1 or 2).")
+    buffer_size: int = Field(default=10000, description="The maximum number of messages waiting to be sent.")
+    batch_size: int = Field(default=100, description="The maximum number of messages handed to the MQTT client at once.")
+    dropped: int = Field(default=0, description="The number of messages dropped (the buffer was full or the MQTT client rejected them).")
+    unserializable: int = Field(default=0, description="The number of messages that couldn't be serialized to JSON (not counted as dropped).")
+
+    _queue: Queue = PrivateAttr(default=None)
+    _client: object = PrivateAttr(default=None)
+    _connected: Event = PrivateAttr(default_factory=Event)
+    _sender: Thread = PrivateAttr(default=None)
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        self._queue = Queue(maxsize=self.buffer_size)
+
+    def start(self) -> bool:
+        """
+        Connect to the broker (in background) and start the sender thread.
+
+        Returns:
+        - bool: False if paho-mqtt is not installed
+        """
+        if mqtt is None:
+            print("paho-mqtt no está instalado, los eventos no se publican en el broker MQTT")
+            return False
+
+        self._client = mqtt.Client()
+        if self.username:
+            self._client.username_pw_set(self.username, self.password)
+        self._client.on_connect = self.on_connect
+        self._client.on_disconnect = self.on_disconnect
+        # The messages wait in the buffer of the publisher, not in the client
+        self._client.max_queued_messages_set(self.batch_size)
+        self._client.reconnect_delay_set(min_delay=1, max_delay=30)
+        self._client.connect_async(self.host, self.port)
+        self._client.loop_start()
+
+        self._sender = Thread(target=self.run_sender)
+        self._sender.daemon = True # Ensure that the thread finishes when main program is finished
+        self._sender.start()
+        return True
+
+    def stop(self) -> None:
+        """
+        Disconnect from the broker. The messages still in the buffer are not sent.
+        """
+        if self._client is not None:
+            self._client.disconnect()
+            self._client.loop_stop()
+
+    def on_connect(self, client, userdata, flags, rc) -> None:
+        """
+        Callback of the MQTT client when the broker answers a connection (or a reconnection).
+        """
+        if rc == 0:
+            self._connected.set()
+        else:
+            print(f"Conexión rechazada por el broker MQTT {self.host}:{self.port}: {mqtt.connack_string(rc)}")
+
+    def on_disconnect(self, client, userdata, rc) -> None:
+        """
+        Callback of the MQTT client when the connection is closed. The client reconnects in background.
+        """
+        self._connected.clear()
+        if rc != 0:
+            print(f"Conexión con el broker MQTT {self.host}:{self.port} perdida, reconectando...")
+
+    def is_connected(self) -> bool:
+        """
+        Check if the publisher is connected to the broker.
+
+        Returns:
+        - bool
+        """
+        return self._connected.is_set()
+
+    def size(self) -> int:
+        """
+        Get the number of messages waiting to be sent.
+
+        Returns:
+        - int
+        """
+        return self._queue.qsize()
+
+    def publish(self, topic: str, payload, retain: bool = False) -> None:
+        """
+        Queue a message to be published, without blocking. The message is dropped if the buffer is full.
+
+        Args:
+        - topic: str: The topic, relative to the topic prefix
+        - payload: A JSON serializable value (serialized by the sender)
+        - retain: bool
+        """
+        try:
+            self._queue.put_nowait((f"{self.topic_prefix}/{topic}" if self.topic_prefix else topic, payload, retain))
+        except Full:
+            if not self.dropped:
+                print("El buffer de mensajes MQTT está lleno, se descartan los mensajes")
+            self.dropped += 1
+
+    def publish_event(self, event: dict) -> None:
+        """
+        Queue an event of a transaction (an EventBroker listener), and to the topic of its smart contract if it has one.
+
+        Args:
+        - event: dict
+        """
+        self.publish(f"transactions/{event['type']}", event)
+        if event.get("contract_address"):
+            self.publish(f"contracts/{event['contract_address']}/{event['type']}", event)
+
+    def run_sender(self) -> None:
+        """
+        Sender loop: wait for queued messages and hand them to the MQTT client in batches.
+        """
+        while True:
+            batch = [self._queue.get()]
+
+            # Take the rest of the queued messages, up to the batch size, without waiting
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except Empty:
+                    break
+
+            # Wait for the connection, the messages queued meanwhile are dropped once the buffer is full
+            self._connected.wait()
+
+            message_info = None
+            for topic, payload, retain in batch:
+                # A payload that can't be serialized is reported on its own, it would never be sent
+                try:
+                    data = dumps_bytes(payload)
+                except (TypeError, ValueError, RecursionError) as e:
+                    print(f"Error al serializar el mensaje MQTT de {topic}: {e}")
+                    self.unserializable += 1
+                    continue
+
+                try:
+                    message_info = self._client.publish(topic, data, qos=self.qos, retain=retain)
+                except Exception as e:
+                    print(f"Error al publicar el mensaje MQTT en {topic}: {e}")
+                    self.dropped += 1
+                    continue
+
+                # If the connection was lost, the client keeps the messages with qos > 0 until it reconnects
+                if message_info.rc != mqtt.MQTT_ERR_SUCCESS and (self.qos == 0 or message_info.rc != mqtt.MQTT_ERR_NO_CONN):
+                    self.dropped += 1
+
+            # Wait for the batch to be sent before taking the next one
+            if message_info is not None:
+                try:
+                    message_info.wait_for_publish(timeout=30)
+                except (ValueError, RuntimeError) as e:
+                    print(f"Error al publicar los mensajes MQTT: {e}")
+
+    class Config:
+        """
+        Pydantic configuration for the MQTTPublisher model.
+
+        Args:
+        - arbitrary_types_allowed: bool
+        """
+        arbitrary_types_allowed = True
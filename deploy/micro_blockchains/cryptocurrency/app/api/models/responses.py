@@ -1,6 +1,9 @@
 from typing import Union, Generic, TypeVar
 from pydantic import BaseModel
 from pydantic.generics import GenericModel
+from fastapi.responses import JSONResponse
+
+from app.api.methods.serialization import dumps_bytes
 
 DataT = TypeVar('DataT') # Declare type variable for generic data type
 
@@ -24,4 +27,33 @@ class Response(GenericModel, Generic[DataT]):
     data being returned, and can be of any type.
     """
     message: Union[str, dict] # Message attribute can be a string or a dictionary
-    data: DataT
\ No newline at end of file
+    data: DataT
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response class of the API.
+
+    The content is serialized with orjson when it is installed (see methods/serialization.py), which is
+    much faster than the json module for large responses such as the transaction listings, whose size is
+    dominated by the Base64 keys and signatures. Without orjson it falls back to the json module.
+    """
+    def render(self, content) -> bytes:
+        return dumps_bytes(content)
+
+    @classmethod
+    def from_response(cls, response: Response, headers: dict = None) -> "FastJSONResponse":
+        """
+        Build the HTTP response of a route from a Response.
+
+        FastAPI validates the values returned by the routes against the response model and converts them
+        with jsonable_encoder before rendering them, which costs more than the serialization itself for
+        large listings. A route returning this response skips both: the content is serialized once, by render.
+
+        Args:
+        - response: Response
+        - headers: dict
+
+        Returns:
+        - FastJSONResponse
+        """
+        return cls(content={"message": response.message, "data": response.data}, headers=headers)
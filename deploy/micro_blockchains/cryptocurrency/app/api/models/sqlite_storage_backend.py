@@ -0,0 +1,299 @@
+# models/sqlite_storage_backend.py
+
+import json
+import os
+import sqlite3
+
+from threading import Lock
+from typing import Optional
+from pydantic import Field, PrivateAttr
+
+# Import the StorageBackend interface
+from app.api.models.storage_backend import StorageBackend
+
+# Import the JSON serialization methods
+from app.api.methods.serialization import dumps
+
+# Columns of the transactions table, in the order of the snapshot nodes
+TRANSACTION_COLUMNS = ("id", "sender", "amount", "recipient", "signature", "created", "nonce", "processed", "sequence")
+
+# Columns stored as JSON text
+JSON_COLUMNS = ()
+
+# Columns updated when a transaction is processed
+PROCESSED_COLUMNS = ("processed", "nonce", "sequence")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS accounts (
+    id TEXT PRIMARY KEY,
+    public_key TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    position INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    sender TEXT NOT NULL,
+    amount REAL NOT NULL,
+    recipient TEXT NOT NULL,
+    signature TEXT,
+    created TEXT NOT NULL,
+    nonce INTEGER NOT NULL DEFAULT 0,
+    processed TEXT,
+    sequence INTEGER
+);
+CREATE INDEX IF NOT EXISTS transactions_sender ON transactions (sender);
+CREATE INDEX IF NOT EXISTS transactions_recipient ON transactions (recipient);
+CREATE INDEX IF NOT EXISTS transactions_created ON transactions (created);
+CREATE INDEX IF NOT EXISTS transactions_processed ON transactions (processed);
+CREATE TABLE IF NOT EXISTS edges (
+    transaction_id TEXT NOT NULL,
+    parent_id TEXT NOT NULL,
+    PRIMARY KEY (transaction_id, parent_id)
+);
+CREATE INDEX IF NOT EXISTS edges_parent_id ON edges (parent_id);
+CREATE TABLE IF NOT EXISTS pruned_parents (
+    transaction_id TEXT NOT NULL,
+    parent_id TEXT NOT NULL,
+    PRIMARY KEY (transaction_id, parent_id)
+);
+CREATE TABLE IF NOT EXISTS failed_nonces (
+    account_id TEXT PRIMARY KEY,
+    nonce INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS checkpoint (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS nonces (
+    account_id TEXT PRIMARY KEY,
+    nonce INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS balances (
+    account_id TEXT PRIMARY KEY,
+    balance REAL NOT NULL
+);
+"""
+
+class SQLiteStorageBackend(StorageBackend):
+    """
+    SQLiteStorageBackend Model: the DAG and the state checkpoints are persisted in a SQLite database in WAL mode.
+
+    The appended changes are applied to the accounts, transactions, edges and failed_nonces tables in a single database
+    transaction per flush, so persistence is incremental and there is no snapshot to compact. Transactions
+    are indexed by sender, recipient, creation and processing timestamps, so they can be queried
+    without loading the ledger. Checkpoints are stored in the checkpoint, nonces and balances tables.
+
+    Args:
+    - path: str: The path of the SQLite database.
+    - fsync_batch_size: int: The number of appended changes that triggers a flush.
+    - checkpoint_interval: int: The number of processed transactions between checkpoints.
+    - processed_since_checkpoint: int: The number of transactions processed since the last checkpoint.
+
+    Returns:
+    - SQLiteStorageBackend: A new instance of the SQLiteStorageBackend model
+    """
+    path: str = Field(default=..., description="The path of the SQLite database.")
+    fsync_batch_size: int = Field(default=100, description="The number of appended changes that triggers a flush.")
+    checkpoint_interval: int = Field(default=100, description="The number of processed transactions between checkpoints.")
+    processed_since_checkpoint: int = Field(default=0, description="The number of transactions processed since the last checkpoint.")
+
+    _connection: sqlite3.Connection = PrivateAttr(default=None)
+    _pending: list = PrivateAttr(default_factory=list)
+    _lock: Lock = PrivateAttr(default_factory=Lock)
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        # The API threads may query the database while the writer flushes, the lock serializes them
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            # Every commit is synced to disk, like every write of the transaction log
+            self._connection.execute("PRAGMA synchronous=FULL")
+            self._connection.executescript(SCHEMA)
+
+    def exists(self) -> bool:
+        with self._lock:
+            return self._connection.execute("SELECT 1 FROM transactions LIMIT 1").fetchone() is not None
+
+    def append(self, record: dict) -> None:
+        with self._lock:
+            self._pending.append(record)
+
+            if len(self._pending) >= self.fsync_batch_size:
+                self._write_pending()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._write_pending()
+
+    def _write_pending(self) -> None:
+        """
+        Apply the appended changes in a single database transaction. The lock must be held by the caller.
+        """
+        if not self._pending:
+            return
+
+        with self._connection:
+            for record in self._pending:
+                self._apply_record(record)
+
+        self._pending.clear()
+
+    def _apply_record(self, record: dict) -> None:
+        """
+        Apply a change of the DAG to the tables.
+
+        Args:
+        - record: dict
+        """
+        execute = self._connection.execute
+
+        if record['op'] == "account":
+            execute("INSERT OR REPLACE INTO accounts (id, public_key) VALUES (?, ?)", (record['id'], record['public_key']))
+        elif record['op'] == "node":
+            self._insert_transaction(record['transaction'])
+        elif record['op'] == "edge":
+            execute("INSERT OR IGNORE INTO edges (transaction_id, parent_id) VALUES (?, ?)", record['edge'])
+        elif record['op'] == "remove":
+            self._delete_transaction(record['id'])
+            if 'nonce' in record:
+                execute("INSERT INTO failed_nonces (account_id, nonce) VALUES (?, ?) "
+                        "ON CONFLICT (account_id) DO UPDATE SET nonce = max(nonce, excluded.nonce)", (record['sender_id'], record['nonce']))
+        elif record['op'] == "processed":
+            columns = [column for column in PROCESSED_COLUMNS if column in record]
+            assignments = ", ".join(f"{column} = ?" for column in columns)
+            execute(f"UPDATE transactions SET {assignments} WHERE id = ?", [record[column] for column in columns] + [record['id']])
+        elif record['op'] == "prune":
+            for transaction_id in record['ids']:
+                # The transactions approving the pruned one keep the approval
+                execute("INSERT OR IGNORE INTO pruned_parents (transaction_id, parent_id) "
+                        "SELECT transaction_id, parent_id FROM edges WHERE parent_id = ?", (transaction_id,))
+                self._delete_transaction(transaction_id)
+
+    def _insert_transaction(self, node_data: dict) -> None:
+        """
+        Insert a transaction or, if it already exists, update it keeping its position.
+
+        Args:
+        - node_data: dict: A snapshot node (DAGBlockchain.serialize_transaction)
+        """
+        values = [dumps(node_data.get(column)) if column in JSON_COLUMNS else node_data.get(column)
+                  for column in TRANSACTION_COLUMNS]
+        updates = ", ".join(f"{column} = excluded.{column}" for column in TRANSACTION_COLUMNS[1:])
+        self._connection.execute(
+            f"INSERT INTO transactions ({', '.join(TRANSACTION_COLUMNS)}) VALUES ({', '.join('?' for _ in TRANSACTION_COLUMNS)}) "
+            f"ON CONFLICT (id) DO UPDATE SET {updates}",
+            values
+        )
+
+    def _delete_transaction(self, transaction_id: str) -> None:
+        """
+        Delete a transaction and its edges.
+
+        Args:
+        - transaction_id: str
+        """
+        execute = self._connection.execute
+        execute("DELETE FROM transactions WHERE id = ?", (transaction_id,))
+        execute("DELETE FROM edges WHERE transaction_id = ? OR parent_id = ?", (transaction_id, transaction_id))
+        execute("DELETE FROM pruned_parents WHERE transaction_id = ?", (transaction_id,))
+
+    def _row_to_node(self, row: tuple) -> dict:
+        """
+        Convert a row of the transactions table to a snapshot node.
+
+        Args:
+        - row: tuple: The TRANSACTION_COLUMNS of the transaction
+
+        Returns:
+        - dict
+        """
+        node_data = dict(zip(TRANSACTION_COLUMNS, row))
+        for column in JSON_COLUMNS:
+            node_data[column] = json.loads(node_data[column]) if node_data[column] is not None else None
+        return node_data
+
+    def read_snapshot(self) -> Optional[dict]:
+        with self._lock:
+            execute = self._connection.execute
+            snapshot = {
+                "accounts": dict(execute("SELECT id, public_key FROM accounts ORDER BY rowid")),
+                "nodes": [self._row_to_node(row) for row in
+                          execute(f"SELECT {', '.join(TRANSACTION_COLUMNS)} FROM transactions ORDER BY position")],
+                "edges": [list(row) for row in execute("SELECT transaction_id, parent_id FROM edges ORDER BY rowid")],
+                "pruned_parents": {},
+                "failed_nonces": dict(execute("SELECT account_id, nonce FROM failed_nonces")),
+            }
+            for transaction_id, parent_id in execute("SELECT transaction_id, parent_id FROM pruned_parents ORDER BY rowid"):
+                snapshot["pruned_parents"].setdefault(transaction_id, []).append(parent_id)
+        return snapshot
+
+    def read_log(self) -> list:
+        # The changes are applied to the tables when they are flushed
+        return []
+
+    def needs_compaction(self) -> bool:
+        return False
+
+    def compact(self, get_snapshot) -> None:
+        with self._lock:
+            # The snapshot already contains the pending changes
+            self._pending.clear()
+            snapshot = get_snapshot()
+
+            with self._connection:
+                execute = self._connection.execute
+                for table in ("accounts", "transactions", "edges", "pruned_parents", "failed_nonces"):
+                    execute(f"DELETE FROM {table}")
+
+                self._connection.executemany("INSERT INTO accounts (id, public_key) VALUES (?, ?)", snapshot.get("accounts", {}).items())
+                for node_data in snapshot["nodes"]:
+                    self._insert_transaction(node_data)
+                self._connection.executemany("INSERT OR IGNORE INTO edges (transaction_id, parent_id) VALUES (?, ?)", snapshot["edges"])
+                self._connection.executemany("INSERT OR IGNORE INTO pruned_parents (transaction_id, parent_id) VALUES (?, ?)",
+                                             [(transaction_id, parent_id)
+                                              for transaction_id, parent_ids in snapshot.get("pruned_parents", {}).items()
+                                              for parent_id in parent_ids])
+                self._connection.executemany("INSERT INTO failed_nonces (account_id, nonce) VALUES (?, ?)", snapshot.get("failed_nonces", {}).items())
+
+    def register_processed(self) -> None:
+        self.processed_since_checkpoint += 1
+
+    def is_checkpoint_due(self) -> bool:
+        return self.processed_since_checkpoint >= self.checkpoint_interval
+
+    def save_checkpoint(self, checkpoint: dict) -> None:
+        with self._lock, self._connection:
+            execute = self._connection.execute
+            for table in ("checkpoint", "nonces", "balances"):
+                execute(f"DELETE FROM {table}")
+
+            self._connection.executemany("INSERT INTO checkpoint (key, value) VALUES (?, ?)",
+                                         [(key, dumps(value)) for key, value in checkpoint.items()
+                                          if key not in ("nonce_registry", "balances")])
+            self._connection.executemany("INSERT INTO nonces (account_id, nonce) VALUES (?, ?)", checkpoint["nonce_registry"].items())
+            self._connection.executemany("INSERT INTO balances (account_id, balance) VALUES (?, ?)", checkpoint["balances"].items())
+
+        self.processed_since_checkpoint = 0
+
+    def load_checkpoint(self) -> Optional[dict]:
+        with self._lock:
+            execute = self._connection.execute
+            checkpoint = {key: json.loads(value) for key, value in execute("SELECT key, value FROM checkpoint")}
+            if not checkpoint:
+                return None
+
+            checkpoint["nonce_registry"] = dict(execute("SELECT account_id, nonce FROM nonces"))
+            checkpoint["balances"] = dict(execute("SELECT account_id, balance FROM balances"))
+        return checkpoint
+
+    def size(self) -> int:
+        return sum(os.path.getsize(path) for path in (self.path, f"{self.path}-wal") if os.path.isfile(path))
+
+    class Config:
+        """
+        Pydantic configuration for the SQLiteStorageBackend model.
+
+        Args:
+        - arbitrary_types_allowed: bool
+        """
+        arbitrary_types_allowed = True
@@ -0,0 +1,212 @@
+# models/storage_backend.py
+
+import json
+import os
+
+from abc import ABC, abstractmethod
+from typing import Optional
+from pydantic import BaseModel, Field
+
+# Import the JSON persistence models
+from app.api.models.transaction_log import TransactionLog
+from app.api.models.state_checkpoint import StateCheckpoint
+
+# Import the JSON serialization methods
+from app.api.methods.serialization import dumps_bytes
+
+class StorageBackend(BaseModel, ABC):
+    """
+    StorageBackend Model: the interface of the persistent storage of the DAG.
+
+    The DAG appends a record for every change (op: account, node, edge, remove, processed, prune), and the
+    backend makes them durable on flush. On start, the DAG is rebuilt from a snapshot (accounts, nodes, edges
+    and pruned parents, as built by DAGBlockchain.get_snapshot) plus the records written after it. The state
+    derived from the DAG (nonce registry, smart contracts or balances) is saved in checkpoints.
+
+    The methods of the interface are abstract: a backend that doesn't implement one of them can't be created.
+
+    Returns:
+    - StorageBackend: A new instance of the StorageBackend model
+    """
+
+    @abstractmethod
+    def exists(self) -> bool:
+        """
+        Check if a DAG was persisted.
+        """
+
+    @abstractmethod
+    def append(self, record: dict) -> None:
+        """
+        Append a change of the DAG. It is durable once flushed.
+
+        Args:
+        - record: dict
+        """
+
+    @abstractmethod
+    def flush(self) -> None:
+        """
+        Make the appended changes durable.
+        """
+
+    @abstractmethod
+    def read_snapshot(self) -> Optional[dict]:
+        """
+        Read the last snapshot of the DAG.
+
+        Returns:
+        - dict: The snapshot, or None if there is none
+        """
+
+    @abstractmethod
+    def read_log(self) -> list:
+        """
+        Read the changes written after the last snapshot, in the order they were appended.
+
+        Returns:
+        - list
+        """
+
+    @abstractmethod
+    def needs_compaction(self) -> bool:
+        """
+        Check if the changes written since the last snapshot should be compacted into a new one.
+        """
+
+    @abstractmethod
+    def compact(self, get_snapshot) -> None:
+        """
+        Replace the persisted DAG with a snapshot, discarding the changes appended before it.
+
+        Args:
+        - get_snapshot: Callable that returns the snapshot of the DAG (DAGBlockchain.get_snapshot).
+        """
+
+    @abstractmethod
+    def register_processed(self) -> None:
+        """
+        Register a new processed transaction.
+        """
+
+    @abstractmethod
+    def is_checkpoint_due(self) -> bool:
+        """
+        Check if enough transactions have been processed to save a new checkpoint.
+        """
+
+    @abstractmethod
+    def save_checkpoint(self, checkpoint: dict) -> None:
+        """
+        Save a checkpoint of the state derived from the DAG (DAGBlockchain.get_state_checkpoint), replacing the previous one.
+
+        Args:
+        - checkpoint: dict
+        """
+
+    @abstractmethod
+    def load_checkpoint(self) -> Optional[dict]:
+        """
+        Load the last checkpoint.
+
+        Returns:
+        - dict: The checkpoint, or None if there is none
+        """
+
+    @abstractmethod
+    def size(self) -> int:
+        """
+        Get the size of the persisted DAG in bytes.
+        """
+
+    def import_storage(self, storage: "StorageBackend") -> None:
+        """
+        Copy the DAG and the checkpoint persisted by another backend (e.g. when the backend is changed).
+
+        Args:
+        - storage: StorageBackend
+        """
+        snapshot = storage.read_snapshot()
+        if snapshot is not None:
+            self.compact(lambda: snapshot)
+
+        for record in storage.read_log():
+            self.append(record)
+        self.flush()
+
+        checkpoint = storage.load_checkpoint()
+        if checkpoint is not None:
+            self.save_checkpoint(checkpoint)
+
+class JSONStorageBackend(StorageBackend):
+    """
+    JSONStorageBackend Model: the DAG is persisted as a JSON snapshot plus an append-only transaction log,
+    and the state checkpoints as a JSON file. The whole snapshot is rewritten on every compaction.
+
+    Args:
+    - snapshot_path: str: The path of the JSON snapshot.
+    - compaction_threshold: int: The number of records in the transaction log that triggers a new snapshot.
+    - transaction_log: TransactionLog
+    - state_checkpoint: StateCheckpoint
+
+    Returns:
+    - JSONStorageBackend: A new instance of the JSONStorageBackend model
+    """
+    snapshot_path: str = Field(default=..., description="The path of the JSON snapshot.")
+    compaction_threshold: int = Field(default=10000, description="The number of records in the transaction log that triggers a new snapshot.")
+    transaction_log: TransactionLog = Field(default=..., description="The append-only log of the changes made to the DAG since the last snapshot.")
+    state_checkpoint: StateCheckpoint = Field(default=..., description="The checkpoints of the state derived from the DAG.")
+
+    def exists(self) -> bool:
+        return os.path.isfile(self.snapshot_path) or os.path.isfile(self.transaction_log.path)
+
+    def append(self, record: dict) -> None:
+        self.transaction_log.append(record)
+
+    def flush(self) -> None:
+        self.transaction_log.flush()
+
+    def read_snapshot(self) -> Optional[dict]:
+        if not os.path.isfile(self.snapshot_path):
+            return None
+
+        with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def read_log(self) -> list:
+        return self.transaction_log.read()
+
+    def needs_compaction(self) -> bool:
+        return self.transaction_log.records_since_snapshot >= self.compaction_threshold
+
+    def compact(self, get_snapshot) -> None:
+        self.transaction_log.compact(lambda: self.write_snapshot(get_snapshot()))
+
+    def write_snapshot(self, snapshot: dict) -> None:
+        """
+        Write the JSON snapshot to a temporary file and replace the previous one atomically.
+
+        Args:
+        - snapshot: dict
+        """
+        temporary_file_path = f"{self.snapshot_path}.tmp"
+        with open(temporary_file_path, 'wb') as f:
+            f.write(dumps_bytes(snapshot))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary_file_path, self.snapshot_path)
+
+    def register_processed(self) -> None:
+        self.state_checkpoint.register_processed()
+
+    def is_checkpoint_due(self) -> bool:
+        return self.state_checkpoint.is_due()
+
+    def save_checkpoint(self, checkpoint: dict) -> None:
+        self.state_checkpoint.save(checkpoint)
+
+    def load_checkpoint(self) -> Optional[dict]:
+        return self.state_checkpoint.load()
+
+    def size(self) -> int:
+        return sum(os.path.getsize(path) for path in (self.snapshot_path, self.transaction_log.path) if os.path.isfile(path))
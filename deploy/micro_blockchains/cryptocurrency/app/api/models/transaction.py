@@ -12,6 +12,7 @@ from app.api.config.env import GENESIS_PUBLIC_KEY
 
 # Import the keys methods
 from app.api.methods.wallets import encode, decode
+from app.api.methods.signatures import verify_transaction_signature
 
 class TransactionCreate(BaseModel):
     """
@@ -65,7 +66,7 @@ class TransactionCreate(BaseModel):
         Returns:
         - str
         """
-        transaction_content = f"{self.sender}{self.amount}{self.recipient}".encode()
+        transaction_content = f"{self.sender}{self.amount}{self.recipient}{self.created}".encode()
         return sha256(transaction_content).hexdigest()
 
     def sign_transaction(self, private_key_str) -> None:
@@ -117,6 +118,7 @@ class Transaction(TransactionCreate):
     - parents: list
     - created: datetime
     - processed: datetime
+    - sequence: int
 
     Returns:
     - Transaction: A new instance of the Transaction model
@@ -125,6 +127,7 @@ class Transaction(TransactionCreate):
     nonce: int = Field(default_factory=int, description="The nonce of the transaction")
     parents: list = Field(default_factory=list)
     processed: datetime = Field(default=None, description="The timestamp of the transaction processing")
+    sequence: int = Field(default=None, description="The confirmation sequence number (the order in which the transaction was processed)")
 
     def is_signature_valid(self) -> bool:
         """
@@ -136,19 +139,17 @@ class Transaction(TransactionCreate):
         Raises:
         - BadSignatureError
         """
-        sigalg = "Dilithium2"
-        is_valid = False
-        public_key = decode(self.sender) # Decode the public key from Base64
-        signature = decode(self.signature)
-
-        transaction_content = f"{self.sender}{self.amount}{self.recipient}".encode()
+        # The ID is generated from the signed content, so it identifies the verification in the cache
+        return verify_transaction_signature(self.generate_transaction_id(), self.sender, self.get_signed_content(), self.signature)
 
-        with oqs.Signature(sigalg) as signer:
-            with oqs.Signature(sigalg) as verifier:
-                # verifier verifies the signature
-                is_valid = verifier.verify(transaction_content, signature, public_key)
+    def get_signed_content(self) -> bytes:
+        """
+        Get the content of the transaction covered by the signature.
 
-        return is_valid
+        Returns:
+        - bytes
+        """
+        return f"{self.sender}{self.amount}{self.recipient}".encode()
             
     class Config:
         """
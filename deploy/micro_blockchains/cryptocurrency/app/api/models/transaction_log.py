@@ -0,0 +1,131 @@
+# models/transaction_log.py
+
+import json
+import os
+
+from threading import Lock
+from pydantic import BaseModel, Field, PrivateAttr
+
+# Import the JSON serialization methods
+from app.api.methods.serialization import dumps_bytes
+
+class TransactionLog(BaseModel):
+    """
+    TransactionLog Model to persist the changes of the DAG in an append-only write-ahead log.
+
+    Every change (added node, added edge, removed node, processed transaction) is appended as a JSON line.
+    Records are buffered and written to disk (fsync) in batches, so the persist cost depends on the new
+    transactions and not on the size of the DAG. The log is truncated once the DAG is compacted into a snapshot.
+
+    Args:
+    - path: str: The path of the log file.
+    - fsync_batch_size: int: The number of buffered records that triggers a write to disk.
+    - records_since_snapshot: int: The number of records written since the last compaction.
+
+    Returns:
+    - TransactionLog: A new instance of the TransactionLog model
+    """
+    path: str = Field(default=..., description="The path of the log file.")
+    fsync_batch_size: int = Field(default=100, description="The number of buffered records that triggers a write to disk.")
+    records_since_snapshot: int = Field(default=0, description="The number of records written since the last compaction.")
+
+    _pending: list = PrivateAttr(default_factory=list)
+    _lock: Lock = PrivateAttr(default_factory=Lock)
+
+    def append(self, record: dict) -> None:
+        """
+        Append a record to the log. The record is written to disk with the next batch.
+
+        Args:
+        - record: dict
+        """
+        with self._lock:
+            self._pending.append(dumps_bytes(record))
+            self.records_since_snapshot += 1
+
+            if len(self._pending) >= self.fsync_batch_size:
+                self._write_pending()
+
+    def flush(self) -> None:
+        """
+        Write the buffered records to disk.
+        """
+        with self._lock:
+            self._write_pending()
+
+    def _write_pending(self) -> None:
+        """
+        Write the buffered records to the log file and fsync it. The lock must be held by the caller.
+        """
+        if not self._pending:
+            return
+
+        with open(self.path, 'ab') as f:
+            f.write(b"\n".join(self._pending) + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._pending.clear()
+
+    def read(self) -> list:
+        """
+        Read the records of the log file.
+
+        A truncated last line (e.g. the node crashed in the middle of a write) is ignored, and cut from the file,
+        so the next records are not appended to it.
+
+        Returns:
+        - list: The records in the order they were appended
+        """
+        records = []
+        if not os.path.isfile(self.path):
+            return records
+
+        # The end of the last complete record
+        valid_size = 0
+        with self._lock, open(self.path, 'r+b') as f:
+            for line in f:
+                try:
+                    # Every record is written with its line break, a line without it was not completely written
+                    if not line.endswith(b"\n"):
+                        raise ValueError("Missing line break")
+                    records.append(json.loads(line))
+                except ValueError:
+                    print(f"Registro incompleto en {self.path}, se descarta")
+                    break
+                valid_size += len(line)
+
+            if f.seek(0, os.SEEK_END) > valid_size:
+                f.truncate(valid_size)
+                f.flush()
+                os.fsync(f.fileno())
+
+        self.records_since_snapshot = len(records)
+        return records
+
+    def compact(self, write_snapshot) -> None:
+        """
+        Compact the log: write a snapshot of the DAG and empty the log.
+
+        The log is locked while the snapshot is written, so no record can be appended in between and lost.
+
+        Args:
+        - write_snapshot: Callable that writes the snapshot of the DAG.
+        """
+        with self._lock:
+            write_snapshot()
+
+            self._pending.clear()
+            with open(self.path, 'w') as f:
+                f.flush()
+                os.fsync(f.fileno())
+            self.records_since_snapshot = 0
+
+    class Config:
+        """
+        Pydantic configuration for the TransactionLog model.
+
+        Args:
+        - arbitrary_types_allowed: bool
+        """
+        arbitrary_types_allowed = True
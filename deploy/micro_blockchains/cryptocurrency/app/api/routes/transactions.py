@@ -1,17 +1,18 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+from queue import Full
 import logging
 
-from fastapi import APIRouter, HTTPException, Request, status
+from fastapi import APIRouter, HTTPException, Query, Request, status
 from slowapi.errors import RateLimitExceeded
 
 # 
-from app.api.config.env import API_NAME
+from app.api.config.env import API_NAME, TRANSACTIONS_BATCH_MAX_SIZE, TRANSACTIONS_PAGE_MAX_SIZE
 from app.api.config.limiter import limiter
 from app.api.config.logger import logger
 from app.api.config.dag import dag
 
 from app.api.models.transaction import Transaction, TransactionCreate
-from app.api.models.responses import Response, ResponseError
+from app.api.models.responses import Response, ResponseError, FastJSONResponse
 
 from app.api.methods.errors import handle_error
 
@@ -24,7 +25,9 @@ router = APIRouter()
             tags=["TRANSACTIONS"],
             responses={
                 500: {"model": ResponseError, "description": "Internal server error."},
-                429: {"model": ResponseError, "description": "Too many requests."},
+                503: {"model": ResponseError, "description": "The ingestion queue is not running."},
+                429: {"model": ResponseError, "description": "Too many requests or the ingestion queue is full."},
+                400: {"model": ResponseError, "description": "The transaction is not valid."},
                 200: {"model": Response[tuple[str, dict]], "description": "The transaction was created successfully."}
             })
 @limiter.limit("5/minute")
@@ -35,6 +38,9 @@ def send_transaction(request: Request, transaction: TransactionCreate):
     Args:
     - transaction: Transaction
 
+    With ASYNC_INGESTION the signature is validated, the transaction is queued and the response
+    is returned right away. The status of the transaction is available in /status/{transaction_id}/.
+
     Returns:
     - tuple[str, dict]: The transaction sended with the transaction id
     """
@@ -44,6 +50,9 @@ def send_transaction(request: Request, transaction: TransactionCreate):
         # Set the created timestamp
         transaction.created = datetime.utcnow()
 
+        if dag.ingestion_queue is not None:
+            return queue_transaction(transaction)
+
         valid = dag.add_transaction(transaction)
 
         # Calculate the transaction hash
@@ -60,4 +69,252 @@ def send_transaction(request: Request, transaction: TransactionCreate):
         # This is to ensure HTTPException is not caught in the generic Exception
         raise
     except Exception as e:
-        handle_error(e, logger)
\ No newline at end of file
+        handle_error(e, logger)
+
+# Endpoint to send a batch of transactions
+@router.post('/batch/', 
+            response_model=Response[list], 
+            status_code=status.HTTP_200_OK, 
+            tags=["TRANSACTIONS"],
+            responses={
+                500: {"model": ResponseError, "description": "Internal server error."},
+                429: {"model": ResponseError, "description": "Too many requests."},
+                413: {"model": ResponseError, "description": "Too many transactions in the batch."},
+                400: {"model": ResponseError, "description": "The batch is empty."},
+                200: {"model": Response[list], "description": "The batch was processed."}
+            })
+@limiter.limit("5/minute")
+def send_transactions_batch(request: Request, transactions: list[TransactionCreate]):
+    """
+    Send a batch of transactions and add them to the DAG.
+
+    The signatures are verified in bulk and the transactions are attached to the DAG in the order
+    they were sent. Every transaction gets its own created timestamp, so the transactions with the
+    same content get different IDs; a repeated transaction is not accepted.
+
+    Args:
+    - transactions: list[TransactionCreate]
+
+    Returns:
+    - list[dict]: The status of each transaction (index, transaction_id, accepted)
+    """
+    try:
+        logger.info(f"Creating a batch of {len(transactions)} transactions")
+
+        if not transactions:
+            raise HTTPException(status_code=400, detail="The batch is empty.")
+
+        if len(transactions) > TRANSACTIONS_BATCH_MAX_SIZE:
+            raise HTTPException(status_code=413, detail=f"The batch can't have more than {TRANSACTIONS_BATCH_MAX_SIZE} transactions.")
+
+        # Set the created timestamp, one microsecond apart so the transactions of the batch have different IDs
+        created = datetime.utcnow()
+        for index, transaction in enumerate(transactions):
+            transaction.created = created + timedelta(microseconds=index)
+
+        results = dag.add_transactions(transactions)
+
+        statuses = []
+        for index, (transaction_id, valid) in enumerate(results):
+            if not valid:
+                logger.error(f"The transaction {transaction_id} of the batch is not valid.")
+
+            statuses.append({
+                "index": index,
+                "transaction_id": transaction_id,
+                "accepted": valid
+            })
+
+        accepted = sum(1 for transaction_status in statuses if transaction_status["accepted"])
+        return Response(data=statuses, message=f"{accepted} of {len(statuses)} transactions were created successfully.")
+    except RateLimitExceeded:
+        raise HTTPException(status_code=429, detail="Too many requests.")
+    except HTTPException:
+        # This is to ensure HTTPException is not caught in the generic Exception
+        raise
+    except Exception as e:
+        handle_error(e, logger)
+
+def queue_transaction(transaction: TransactionCreate) -> Response:
+    """
+    Validate the signature of a transaction and queue it to be added to the DAG.
+
+    Args:
+    - transaction: TransactionCreate
+
+    Returns:
+    - Response: The transaction ID of the queued transaction
+
+    Raises:
+    - HTTPException: 400 if the signature is not valid, 429 if the queue is full, 503 if the writer is not running
+    """
+    if not dag.ingestion_queue.is_running():
+        logger.error("The ingestion queue writer is not running.")
+        raise HTTPException(status_code=503, detail="The ingestion queue is not running.")
+
+    candidate = Transaction(**transaction.dict())
+    transaction_id = candidate.generate_transaction_id()
+
+    if not candidate.is_signature_valid():
+        logger.error(f"The transaction from {transaction.sender} is not valid.")
+        raise HTTPException(status_code=400, detail="The transaction is not valid.")
+
+    try:
+        dag.ingestion_queue.submit(transaction_id, transaction)
+    except Full:
+        logger.error(f"The ingestion queue is full, the transaction {transaction_id} is rejected.")
+        raise HTTPException(status_code=429, detail="The ingestion queue is full.")
+
+    return Response(data=(transaction_id, transaction.dict()), message="The transaction was queued successfully.")
+
+# Endpoint to get the status of a transaction
+@router.get('/status/{transaction_id}/', 
+            response_model=Response[dict], 
+            status_code=status.HTTP_200_OK, 
+            tags=["TRANSACTIONS"],
+            responses={
+                500: {"model": ResponseError, "description": "Internal server error."},
+                404: {"model": ResponseError, "description": "The transaction was not found."},
+                200: {"model": Response[dict], "description": "The status of the transaction."}
+            })
+def get_transaction_status(request: Request, transaction_id: str):
+    """
+    Get the status of a transaction: queued, accepted, rejected or failed.
+
+    Args:
+    - transaction_id: str
+
+    Returns:
+    - dict: The transaction ID and its status
+    """
+    try:
+        transaction_status = None
+        if dag.ingestion_queue is not None:
+            transaction_status = dag.ingestion_queue.get_status(transaction_id)
+
+        # Transactions added synchronously (or whose status was forgotten) are looked up in the DAG and the archive
+        if transaction_status is None and dag.has_transaction(transaction_id):
+            transaction_status = "accepted"
+
+        if transaction_status is None:
+            raise HTTPException(status_code=404, detail="The transaction was not found.")
+
+        return Response(data={"transaction_id": transaction_id, "status": transaction_status}, message="The status of the transaction was retrieved successfully.")
+    except HTTPException:
+        # This is to ensure HTTPException is not caught in the generic Exception
+        raise
+    except Exception as e:
+        handle_error(e, logger)
+
+# Endpoint to get the transactions sent by an account
+@router.get('/sender/', 
+            response_model=Response[dict], 
+            status_code=status.HTTP_200_OK, 
+            tags=["TRANSACTIONS"],
+            responses={
+                500: {"model": ResponseError, "description": "Internal server error."},
+                400: {"model": ResponseError, "description": "The cursor is not valid."},
+                200: {"model": Response[dict], "description": "A page of the transactions."}
+            })
+def get_transactions_by_sender(request: Request, public_key: str, cursor: str = None, limit: int = Query(default=TRANSACTIONS_PAGE_MAX_SIZE, ge=1, le=TRANSACTIONS_PAGE_MAX_SIZE)):
+    """
+    Get the transactions sent by an account, in creation order (oldest first).
+
+    The transactions are paginated with a cursor: the next_cursor of a page is sent as the cursor
+    of the request of the next page, and it is None in the last page.
+
+    Args:
+    - public_key: str: The public key of the sender
+    - cursor: str
+    - limit: int
+
+    Returns:
+    - dict: The transactions of the page and the next_cursor
+    """
+    try:
+        try:
+            transactions, next_cursor = dag.get_transactions_by_sender(public_key, cursor, limit)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="The cursor is not valid.")
+
+        data = {"transactions": [transaction.dict() for transaction in transactions], "next_cursor": next_cursor}
+        # Large pages are serialized once, without the validation and the jsonable_encoder pass of FastAPI
+        return FastJSONResponse.from_response(Response(data=data, message=f"{len(transactions)} transactions of the sender were retrieved successfully."))
+    except HTTPException:
+        # This is to ensure HTTPException is not caught in the generic Exception
+        raise
+    except Exception as e:
+        handle_error(e, logger)
+
+# Endpoint to get the transactions received by an account
+@router.get('/recipient/', 
+            response_model=Response[dict], 
+            status_code=status.HTTP_200_OK, 
+            tags=["TRANSACTIONS"],
+            responses={
+                500: {"model": ResponseError, "description": "Internal server error."},
+                400: {"model": ResponseError, "description": "The cursor is not valid."},
+                200: {"model": Response[dict], "description": "A page of the transactions."}
+            })
+def get_transactions_by_recipient(request: Request, public_key: str, cursor: str = None, limit: int = Query(default=TRANSACTIONS_PAGE_MAX_SIZE, ge=1, le=TRANSACTIONS_PAGE_MAX_SIZE)):
+    """
+    Get the transactions received by an account, in creation order (oldest first).
+
+    The transactions are paginated with a cursor: the next_cursor of a page is sent as the cursor
+    of the request of the next page, and it is None in the last page.
+
+    Args:
+    - public_key: str: The public key of the recipient
+    - cursor: str
+    - limit: int
+
+    Returns:
+    - dict: The transactions of the page and the next_cursor
+    """
+    try:
+        try:
+            transactions, next_cursor = dag.get_transactions_by_recipient(public_key, cursor, limit)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="The cursor is not valid.")
+
+        data = {"transactions": [transaction.dict() for transaction in transactions], "next_cursor": next_cursor}
+        # Large pages are serialized once, without the validation and the jsonable_encoder pass of FastAPI
+        return FastJSONResponse.from_response(Response(data=data, message=f"{len(transactions)} transactions of the recipient were retrieved successfully."))
+    except HTTPException:
+        # This is to ensure HTTPException is not caught in the generic Exception
+        raise
+    except Exception as e:
+        handle_error(e, logger)
+
+# Endpoint to get a transaction by its ID
+@router.get('/{transaction_id}/', 
+            response_model=Response[dict], 
+            status_code=status.HTTP_200_OK, 
+            tags=["TRANSACTIONS"],
+            responses={
+                500: {"model": ResponseError, "description": "Internal server error."},
+                404: {"model": ResponseError, "description": "The transaction was not found."},
+                200: {"model": Response[dict], "description": "The transaction was retrieved successfully."}
+            })
+def get_transaction(request: Request, transaction_id: str):
+    """
+    Get a transaction of the DAG (or of the archive, if it was pruned) by its ID.
+
+    Args:
+    - transaction_id: str
+
+    Returns:
+    - dict: The transaction
+    """
+    try:
+        transaction = dag.get_transaction(transaction_id)
+
+        if transaction is None:
+            raise HTTPException(status_code=404, detail="The transaction was not found.")
+
+        return Response(data=transaction.dict(), message="The transaction was retrieved successfully.")
+    except HTTPException:
+        # This is to ensure HTTPException is not caught in the generic Exception
+        raise
+    except Exception as e:
+        handle_error(e, logger)
@@ -9,7 +9,7 @@ from app.api.config.limiter import limiter
 from app.api.config.logger import logger
 from app.api.config.dag import dag
 
-from app.api.models.responses import Response, ResponseError
+from app.api.models.responses import Response, ResponseError, FastJSONResponse
 
 from app.api.methods.errors import handle_error
 from app.api.methods.wallets import generate_wallet
@@ -65,7 +65,8 @@ def get_balances(request: Request):
     """
     try:
         logger.info(f"Getting balances...")
-        return Response(data=dag.get_balances(), message="The wallets balances were retrieved successfully.")
+        # The balances of every wallet are serialized once, without the validation and the jsonable_encoder pass of FastAPI
+        return FastJSONResponse.from_response(Response(data=dag.get_balances(), message="The wallets balances were retrieved successfully."))
     except RateLimitExceeded:
         raise HTTPException(status_code=429, detail="Too many requests.")
     except HTTPException:
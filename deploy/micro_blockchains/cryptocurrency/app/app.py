@@ -10,9 +10,14 @@ from app.api.config.env import API_NAME, PRODUCTION_SERVER_URL, DEVELOPMENT_SERV
 from app.api.config.limiter import limiter
 from app.api.config.dag import get_blockchain
 
+# Response class import
+from app.api.models.responses import FastJSONResponse
+
 # Routes import
 from app.api.routes.wallets import router as wallets
 from app.api.routes.transactions import router as transactions
+from app.api.routes.events import router as events
+from app.api.routes.sync import router as sync
 
 title=f'{API_NAME} API'
 description=f'{API_NAME} API description.'
@@ -44,6 +49,7 @@ app = FastAPI(
     terms_of_service=terms_of_service,
     contact=contact,
     license_info=license_info,
+    default_response_class=FastJSONResponse,
 )
 
 def custom_openapi():
@@ -88,8 +94,12 @@ async def on_startup():
 @app.on_event('shutdown')
 async def on_shutdown():
     # Actions to be executed when the API shuts down.
+    # The background writers are stopped and the buffered transactions are persisted
+    get_blockchain().shutdown()
     print('API shut down')
 
 # Include the routes
 app.include_router(wallets, prefix=f'/api/v1/{API_NAME}/wallets')
 app.include_router(transactions, prefix=f'/api/v1/{API_NAME}/transactions')
+app.include_router(events, prefix=f'/api/v1/{API_NAME}/events')
+app.include_router(sync, prefix=f'/api/v1/{API_NAME}/sync')
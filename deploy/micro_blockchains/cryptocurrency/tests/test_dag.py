@@ -0,0 +1,63 @@
+# tests/test_dag.py
+
+from datetime import datetime, timedelta
+
+import pytest
+
+import app.api.models.dag as dag_module
+from app.api.models.transaction import TransactionCreate
+from app.api.methods.wallets import get_account_id
+
+def sign(keys: tuple, created: datetime, amount: float, recipient: str) -> TransactionCreate:
+    public_key, private_key = keys
+    transaction = TransactionCreate(sender=public_key, amount=amount, recipient=recipient, created=created)
+    transaction.sign_transaction(private_key)
+    return transaction
+
+def test_buffered_transactions_are_persisted_on_shutdown(create_dag, genesis_keys, keys):
+    dag = create_dag()
+    created = datetime.utcnow()
+    for number in range(3):
+        assert dag.add_transaction(sign(genesis_keys, created + timedelta(microseconds=number), 1, keys[0]))
+
+    # The transactions are still buffered by the storage backend (DAG_LOG_FSYNC_BATCH_SIZE)
+    dag.shutdown()
+
+    transactions, _ = create_dag().get_transactions_by_recipient(keys[0])
+    assert len(transactions) == 3
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+@pytest.mark.parametrize("checkpoint", [False, True])
+def test_replay_reproduces_the_live_state(create_dag, genesis_keys, keys, create_keys, monkeypatch, backend, checkpoint):
+    monkeypatch.setattr(dag_module, "LEDGER_STORAGE_BACKEND", backend)
+    dag = create_dag()
+    other_keys = create_keys()
+    created = datetime.utcnow()
+
+    assert dag.add_transaction(sign(genesis_keys, created, 10, keys[0]))
+    assert dag.add_transaction(sign(genesis_keys, created + timedelta(microseconds=1), 10, other_keys[0]))
+
+    # Payments between two senders, a third of them fail for lack of funds (the last one of each sender too),
+    # then payments of the GENESIS wallet that confirm them
+    for number in range(1, 41):
+        if number > 30:
+            sender_keys, recipient = genesis_keys, keys[0]
+        else:
+            sender_keys, recipient = (keys, other_keys[0]) if number % 2 else (other_keys, keys[0])
+        amount = 100 if number % 3 == 0 or 28 < number <= 30 else 1
+        assert dag.add_transaction(sign(sender_keys, created + timedelta(seconds=1, microseconds=number), amount, recipient))
+
+    assert {get_account_id(keys[0]), get_account_id(other_keys[0])} <= set(dag.failed_nonces)
+    live_nonces = dict(dag.nonce_registry)
+    live_sequences = {record.id: record.sequence for record in dag.store.records()}
+    live_balances = dag.get_balances()
+
+    dag.persist()
+    if checkpoint:
+        with dag._lock:
+            dag.storage.save_checkpoint(dag.get_state_checkpoint())
+
+    replayed_dag = create_dag()
+    assert replayed_dag.nonce_registry == live_nonces
+    assert {record.id: record.sequence for record in replayed_dag.store.records()} == live_sequences
+    assert replayed_dag.get_balances() == live_balances
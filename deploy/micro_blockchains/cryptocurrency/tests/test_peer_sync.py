@@ -0,0 +1,64 @@
+# tests/test_peer_sync.py
+
+from types import SimpleNamespace
+
+import app.api.models.peer_sync as peer_sync
+from app.api.models.peer_sync import PeerSync
+
+class FakeDAG:
+    """
+    A DAG with the tips t3 -> t2 -> t1 missing (t1 approves a transaction it has), importing what it gets.
+    """
+    def __init__(self):
+        self.transactions = {"t0"}
+
+    def has_transaction(self, transaction_id):
+        return transaction_id in self.transactions
+
+    def import_transactions(self, transactions):
+        self.transactions.update(transaction.id for transaction in transactions)
+        return [(transaction.id, True) for transaction in transactions]
+
+class FakePeer:
+    def __init__(self):
+        self.transactions = {"t3": ["t2"], "t2": ["t1"], "t1": ["t0"]}
+        self.failing = False
+        self.requested = []
+
+    def request(self, peer, method, path, json=None):
+        if path == "/sync/tips/":
+            return {"tips": ["t3", "gone"]}
+        if self.failing and "t1" in json["ids"]:
+            raise ConnectionError("The peer is unreachable")
+        self.requested.extend(json["ids"])
+        return [{"id": transaction_id, "parents": self.transactions[transaction_id]}
+                for transaction_id in json["ids"] if transaction_id in self.transactions]
+
+def create_peer_sync(monkeypatch, peer: FakePeer) -> PeerSync:
+    monkeypatch.setattr(peer_sync, "Transaction", lambda **data: SimpleNamespace(**data))
+    sync = PeerSync(peers=["http://peer"], batch_size=1)
+    monkeypatch.setattr(PeerSync, "request", lambda self, *args, **kwargs: peer.request(*args, **kwargs))
+    return sync
+
+def test_a_failed_round_requests_the_transactions_again(monkeypatch):
+    dag, peer = FakeDAG(), FakePeer()
+    sync = create_peer_sync(monkeypatch, peer)
+
+    # The request of the last batch fails: nothing is imported, nor recorded as seen
+    peer.failing = True
+    assert sync.sync_peer(dag, "http://peer") == 0
+    assert not sync._seen
+
+    peer.failing = False
+    assert sync.sync_peer(dag, "http://peer") == 3
+    assert dag.transactions == {"t0", "t1", "t2", "t3"}
+    assert set(sync._seen) == {"t1", "t2", "t3", "gone"}
+
+def test_unavailable_transactions_are_not_requested_again(monkeypatch):
+    dag, peer = FakeDAG(), FakePeer()
+    sync = create_peer_sync(monkeypatch, peer)
+
+    sync.sync_peer(dag, "http://peer")
+    peer.requested.clear()
+    assert sync.sync_peer(dag, "http://peer") == 0
+    assert peer.requested == []
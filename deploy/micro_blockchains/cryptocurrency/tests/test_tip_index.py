@@ -0,0 +1,22 @@
+# tests/test_tip_index.py
+
+from app.api.models.tip_index import TipIndex
+
+def test_restored_tips_keep_their_position():
+    tip_index = TipIndex(max_approvals=2)
+    for transaction_id in "abcde":
+        tip_index.add(transaction_id)
+
+    # b is approved by d and e, it is no longer a tip
+    tip_index.approve("b")
+    tip_index.approve("b")
+    assert tip_index.select(10) == ["a", "c", "d", "e"]
+
+    # Removing e (which approved b) makes b a tip again, before the newer tips
+    tip_index.discard("e", ["b"])
+    assert tip_index.select(10) == ["a", "b", "c", "d"]
+    assert tip_index.select(2) == ["c", "d"]
+
+    # New transactions are still added as the newest tips
+    tip_index.add("f")
+    assert tip_index.select(10) == ["a", "b", "c", "d", "f"]
@@ -0,0 +1,73 @@
+"""
+Microbenchmark of PythonVirtualMachine.execute_contract with a cold and a warm compiled-contract cache.
+
+The cold path unmarshals and executes the contract's bytecode before every call (the cache is
+cleared), the warm path reuses the cached code object and function table.
+
+Usage (from the service root directory):
+
+```bash
+python -m app.api.benchmarks.contract_cache --calls 2000
+```
+"""
+
+import argparse
+import contextlib
+import os
+import time
+
+from datetime import datetime
+
+from app.api.models.python_virtual_machine import PythonVirtualMachine
+
+VOTING_CONTRACT_PATH = os.path.join(os.path.dirname(__file__), "..", "clients", "smart_contracts", "voting_system_v1.py")
+
+def deploy_voting_contract(python_virtual_machine: PythonVirtualMachine) -> tuple:
+    """
+    Deploy the voting contract and create a voting to call add_voter on.
+
+    Returns:
+    - tuple[str, str]: The contract address and the voting ID
+    """
+    with open(VOTING_CONTRACT_PATH, "r") as f:
+        contract_code = f.read()
+
+    contract_address = python_virtual_machine.deploy_contract(contract_code, datetime.utcnow())
+    python_virtual_machine.execute_contract(contract_address, "initialize_smart_contract", [], {})
+    voting_id = python_virtual_machine.execute_contract(contract_address, "create_voting",
+                                                        ["creator", "binary", None, True, int(time.time()) + 3600, False], {})
+    return contract_address, voting_id
+
+def measure(python_virtual_machine: PythonVirtualMachine, contract_address: str, voting_id: str, calls: int, cold: bool) -> float:
+    """
+    Call add_voter on the contract and return the mean latency per call in microseconds.
+    """
+    elapsed = 0.0
+    for number in range(calls):
+        if cold:
+            python_virtual_machine._compiled_contracts.clear()
+
+        started = time.perf_counter()
+        python_virtual_machine.execute_contract(contract_address, "add_voter", [voting_id, f"voter-{cold}-{number}", 1, "creator"], {})
+        elapsed += time.perf_counter() - started
+    return elapsed / calls * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Compiled-contract cache microbenchmark.")
+    parser.add_argument("--calls", type=int, default=2000)
+    arguments = parser.parse_args()
+
+    python_virtual_machine = PythonVirtualMachine()
+
+    # The VM prints the contract state on every call, keep it out of the measurements output
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        contract_address, voting_id = deploy_voting_contract(python_virtual_machine)
+        cold = measure(python_virtual_machine, contract_address, voting_id, arguments.calls, cold=True)
+        warm = measure(python_virtual_machine, contract_address, voting_id, arguments.calls, cold=False)
+
+    print(f"cold call: {cold:.1f} us")
+    print(f"warm call: {warm:.1f} us")
+    print(f"speedup: {cold / warm:.1f}x")
+
+if __name__ == "__main__":
+    main()
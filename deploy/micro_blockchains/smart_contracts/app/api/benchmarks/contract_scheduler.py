@@ -0,0 +1,121 @@
+"""
+Benchmark of the ContractExecutionScheduler on a batch of calls to many smart contracts.
+
+The same batch of confirmed calls (interleaved between the contracts, as they are confirmed) is executed
+in the API process (0 workers) and in pools of isolated worker processes, and the throughput is compared.
+The final states of the contracts must be the same in every run.
+
+Usage (from the service root directory):
+
+```bash
+python -m app.api.benchmarks.contract_scheduler --contracts 32 --calls 64 --workers 0 1 2 4 8
+```
+
+The calls are metered with the default gas limit, `--gas-limit 0` measures them without metering.
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+from datetime import datetime, timedelta
+
+from app.api.models.contract_scheduler import ContractExecutionScheduler
+from app.api.models.python_virtual_machine import PythonVirtualMachine
+
+from app.api.config.env import CONTRACT_GAS_LIMIT
+
+# Contract with a call that costs some CPU, so the results show the execution and not the scheduling
+HASHING_CONTRACT = """
+import hashlib
+
+def hash_chain(rounds):
+    digest = state.get("digest", "")
+    for _ in range(rounds):
+        digest = hashlib.sha256(digest.encode()).hexdigest()
+    state["digest"] = digest
+    state["calls"] = state.get("calls", 0) + 1
+    return digest
+"""
+
+@contextlib.contextmanager
+def silence_stdout():
+    """
+    Send the output of the VM to /dev/null, also in the worker processes (they inherit the file descriptor).
+    """
+    sys.stdout.flush()
+    saved_stdout = os.dup(1)
+    with open(os.devnull, "w") as devnull:
+        os.dup2(devnull.fileno(), 1)
+        try:
+            yield
+        finally:
+            sys.stdout.flush()
+            os.dup2(saved_stdout, 1)
+            os.close(saved_stdout)
+
+def create_calls(python_virtual_machine: PythonVirtualMachine, contracts: int, calls: int, rounds: int, gas_limit: int) -> list:
+    """
+    Deploy the contracts and create the batch of calls, interleaved between the contracts.
+
+    Returns:
+    - list: (contract address, function signature, args, kwargs, gas limit) tuples
+    """
+    created = datetime.utcnow()
+    contract_addresses = [python_virtual_machine.deploy_contract(HASHING_CONTRACT, created + timedelta(microseconds=number))
+                          for number in range(contracts)]
+    return [(contract_address, "hash_chain", [rounds], {}, gas_limit) for _ in range(calls) for contract_address in contract_addresses]
+
+def measure(workers: int, arguments) -> tuple:
+    """
+    Execute the batch with a scheduler of the given number of workers.
+
+    Returns:
+    - tuple[float, dict]: The calls per second and the final states of the contracts
+    """
+    python_virtual_machine = PythonVirtualMachine()
+    calls = create_calls(python_virtual_machine, arguments.contracts, arguments.calls, arguments.rounds, arguments.gas_limit)
+    scheduler = ContractExecutionScheduler(workers=workers)
+
+    # The workers are ready and have the contracts compiled before the measurement
+    if workers > 0:
+        scheduler.execute(python_virtual_machine, calls[:arguments.contracts])
+        python_virtual_machine = PythonVirtualMachine()
+        calls = create_calls(python_virtual_machine, arguments.contracts, arguments.calls, arguments.rounds, arguments.gas_limit)
+
+    started = time.perf_counter()
+    results = scheduler.execute(python_virtual_machine, calls)
+    elapsed = time.perf_counter() - started
+
+    assert all(status == "ok" for status, _, _ in results)
+    states = {contract_address: dict(scheduler.get_state(python_virtual_machine, contract_address))
+              for contract_address in python_virtual_machine.deployed_smart_contracts}
+    return len(calls) / elapsed, states
+
+def main():
+    parser = argparse.ArgumentParser(description="Contract execution scheduler benchmark.")
+    parser.add_argument("--contracts", type=int, default=32)
+    parser.add_argument("--calls", type=int, default=64, help="Calls per contract")
+    parser.add_argument("--rounds", type=int, default=200, help="Hashes per call")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4])
+    parser.add_argument("--gas-limit", type=int, default=CONTRACT_GAS_LIMIT, help="Gas of each call (0 disables the metering)")
+    arguments = parser.parse_args()
+
+    baseline = None
+    for workers in arguments.workers:
+        # The VM prints the contract state on every call, keep it out of the measurements output
+        with silence_stdout():
+            throughput, states = measure(workers, arguments)
+
+        # The contract addresses depend on the deployment timestamps, the states are compared in order
+        states = list(states.values())
+        if baseline is None:
+            baseline = (throughput, states)
+        assert states == baseline[1], "The states differ from the ones of the first run"
+
+        print(f"{workers} workers: {throughput:.0f} calls/s ({throughput / baseline[0]:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Benchmark of the JSON serialization of large API responses and of the persisted ledger.
+
+Two large listings are served by a FastAPI app with the same route shape as the service
+(response_model=Response[dict]):
+- a page of transactions, dominated by the Base64 Dilithium public keys and signatures,
+- a page of smart contracts, with their Base64 bytecode and state.
+
+Each listing is served:
+- json: returning a Response, serialized by FastAPI with the default JSONResponse (json module),
+- fast: returning a Response, serialized by FastAPI with FastJSONResponse (orjson when it is installed,
+  see methods/serialization.py),
+- direct: returning FastJSONResponse.from_response, which skips the validation of the response model
+  and the jsonable_encoder pass of FastAPI (as the listing routes do).
+
+The response time is measured end to end through the ASGI app, without a network. The serialization of a snapshot of the DAG
+with both encoders is measured too.
+
+Usage (from the service root directory):
+
+```bash
+python -m app.api.benchmarks.responses --transactions 100 1000 --contracts 100 --samples 50
+```
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import time
+
+from datetime import datetime
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from app.api.models.responses import Response, FastJSONResponse
+from app.api.models.smart_contracts import SmartContract
+from app.api.models.transaction import Transaction, OperationType
+from app.api.methods import serialization
+from app.api.methods.wallets import encode
+
+# Sizes of the Dilithium2 public keys and signatures, in bytes
+PUBLIC_KEY_SIZE = 1312
+SIGNATURE_SIZE = 2420
+
+def build_transactions(count: int) -> list:
+    """
+    Build transactions with random keys, signatures and IDs (they are not signed, only serialized).
+    """
+    public_keys = [encode(os.urandom(PUBLIC_KEY_SIZE)) for _ in range(16)]
+    return [Transaction(sender=public_keys[number % len(public_keys)],
+                        contract_address=os.urandom(32).hex(),
+                        payload={"function_signature": "increment", "args": [number], "kwargs": {}},
+                        operation_type=OperationType.CALL,
+                        signature=encode(os.urandom(SIGNATURE_SIZE)),
+                        created=datetime.utcnow(),
+                        id=os.urandom(32).hex(),
+                        nonce=number,
+                        parents=[os.urandom(32).hex() for _ in range(2)],
+                        processed=datetime.utcnow())
+            for number in range(count)]
+
+def build_smart_contracts(count: int) -> dict:
+    """
+    Build smart contracts with a random bytecode and a state of a voting-like contract.
+    """
+    return {os.urandom(32).hex(): SmartContract(bytecode=encode(os.urandom(4096)),
+                                                state={"votings": {str(voting): {"voters": {f"voter-{voter}": voter for voter in range(20)},
+                                                                                 "end": datetime.utcnow().isoformat()}
+                                                                   for voting in range(5)}})
+            for _ in range(count)}
+
+def create_app(listings: dict) -> FastAPI:
+    """
+    Create an app serving every listing in the three ways, at /{way}/{listing}/.
+    """
+    app = FastAPI()
+
+    for name, data in listings.items():
+        for prefix, response_class in (("json", JSONResponse), ("fast", FastJSONResponse)):
+            def endpoint(data=data):
+                return Response(data=data, message="The listing was retrieved successfully.")
+
+            app.add_api_route(f"/{prefix}/{name}/", endpoint, methods=["GET"],
+                              response_model=Response[dict], response_class=response_class)
+
+        def direct_endpoint(data=data):
+            return FastJSONResponse.from_response(Response(data=data, message="The listing was retrieved successfully."))
+
+        app.add_api_route(f"/direct/{name}/", direct_endpoint, methods=["GET"],
+                          response_model=Response[dict], response_class=FastJSONResponse)
+
+    return app
+
+async def request(app: FastAPI, path: str) -> bytes:
+    """
+    Send a GET request to the ASGI app and return the body of the response.
+    """
+    body = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    scope = {"type": "http", "http_version": "1.1", "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+             "root_path": "", "query_string": b"", "headers": [], "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 80)}
+    await app(scope, receive, send)
+    return b"".join(body)
+
+def measure_response(app: FastAPI, path: str, samples: int) -> dict:
+    """
+    Measure the response time of a route (median and p95, in milliseconds) and the size of the response.
+    """
+    loop = asyncio.get_event_loop()
+    body = loop.run_until_complete(request(app, path))
+
+    elapsed = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        loop.run_until_complete(request(app, path))
+        elapsed.append((time.perf_counter() - started) * 1e3)
+
+    elapsed.sort()
+    return {"median_ms": statistics.median(elapsed), "p95_ms": elapsed[int(len(elapsed) * 0.95) - 1], "bytes": len(body)}
+
+def measure_snapshot(transactions: list, samples: int) -> dict:
+    """
+    Measure the serialization of a snapshot of the DAG (JSON compatible nodes) with both encoders, in milliseconds.
+    """
+    snapshot = {"nodes": [], "edges": []}
+    for transaction in transactions:
+        node_data = transaction.dict()
+        node_data["created"] = node_data["created"].isoformat()
+        node_data["processed"] = node_data["processed"].isoformat()
+        snapshot["nodes"].append(node_data)
+        snapshot["edges"] += [[transaction.id, parent_id] for parent_id in transaction.parents]
+
+    results = {}
+    for name, dumps in (("json", json.dumps), ("fast", serialization.dumps_bytes)):
+        started = time.perf_counter()
+        for _ in range(samples):
+            dumps(snapshot)
+        results[f"{name}_ms"] = (time.perf_counter() - started) / samples * 1e3
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON serialization benchmark of the API responses and the persisted ledger.")
+    parser.add_argument("--transactions", type=int, nargs="+", default=[100, 1_000], help="Sizes of the transaction listings.")
+    parser.add_argument("--contracts", type=int, nargs="+", default=[100], help="Sizes of the smart contract listings.")
+    parser.add_argument("--samples", type=int, default=50, help="Requests per measurement.")
+    parser.add_argument("--output", help="File to write the JSON results to (stdout by default).")
+    arguments = parser.parse_args()
+
+    transactions = build_transactions(max(arguments.transactions))
+    listings = {f"transactions_{count}": {"transactions": [transaction.dict() for transaction in transactions[:count]], "next_cursor": None}
+                for count in arguments.transactions}
+    listings.update({f"smart_contracts_{count}": {"smart_contracts": build_smart_contracts(count), "next_cursor": None}
+                     for count in arguments.contracts})
+    app = create_app(listings)
+
+    results = {"responses": {}, "snapshot": measure_snapshot(transactions, max(1, arguments.samples // 10))}
+    for name in listings:
+        results["responses"][name] = {prefix: measure_response(app, f"/{prefix}/{name}/", arguments.samples)
+                                      for prefix in ("json", "fast", "direct")}
+
+    document = {
+        "benchmark": "responses",
+        "created": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "orjson": serialization.orjson is not None,
+        "parameters": {
+            "transactions": arguments.transactions,
+            "contracts": arguments.contracts,
+            "samples": arguments.samples,
+        },
+        "results": results,
+    }
+
+    if arguments.output:
+        with open(arguments.output, "w") as f:
+            json.dump(document, f, indent=4)
+    else:
+        print(json.dumps(document, indent=4))
+
+if __name__ == "__main__":
+    main()
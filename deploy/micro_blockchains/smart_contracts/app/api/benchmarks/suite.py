@@ -0,0 +1,312 @@
+"""
+Benchmark suite of the ledger core (DAGBlockchain, Transaction and PythonVirtualMachine).
+
+The DAG is grown with signed CALL transactions to a small counter contract. At each size it measures:
+- add_transaction throughput and latency,
+- parent selection (determine_parents_for_transaction),
+- persist (flush of the transaction log) and snapshot (checkpoint + compaction) time,
+- load time of a new DAG from the snapshot, and the memory used per node once loaded.
+
+The signature verification cost (uncached, cached and in batch) and the contract call latency are
+measured once. The DAG is persisted in a temporary directory and no ghost transactions are sent.
+
+The Dilithium keys are generated once and stored in the --keys file, and every transaction is signed
+before the measurements start, so neither is part of the results. The results are written as a JSON
+document tagged with the git commit, to track regressions between commits.
+
+The storage backend is selected with LEDGER_STORAGE_BACKEND, as in the service.
+
+Usage (from the service root directory, with the service environment variables set):
+
+```bash
+python -m app.api.benchmarks.suite --sizes 1000 5000 20000 --output benchmark.json
+```
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import oqs
+
+from datetime import datetime
+
+from app.api.models.dag import DAGBlockchain
+from app.api.models.transaction import Transaction, TransactionCreate, OperationType
+from app.api.methods import signatures
+from app.api.methods.wallets import encode, decode
+from app.api.config.env import LEDGER_STORAGE_BACKEND
+
+SIGNATURE_ALGORITHM = "Dilithium2"
+
+# Contract called by the benchmark transactions, cheap so the results show the cost of the ledger
+COUNTER_CONTRACT = """
+def increment(number):
+    state["counter"] = state.get("counter", 0) + 1
+    return number
+"""
+
+# Directory where the benchmark DAG is persisted, set by run()
+shared_directory = None
+
+class BenchmarkDAG(DAGBlockchain):
+    """
+    DAGBlockchain persisted in the benchmark directory, without ghost transactions.
+    """
+    def get_shared_file_path(self, file_name: str) -> str:
+        return os.path.join(shared_directory, file_name)
+
+    def start_ghost_transactions(self):
+        pass
+
+def load_keys(path: str, count: int) -> list:
+    """
+    Load the benchmark keys, generating and saving the missing ones.
+
+    Returns:
+    - list[tuple[str, str]]: (public key, private key) pairs, Base64 encoded
+    """
+    keys = []
+    if os.path.isfile(path):
+        with open(path, "r") as f:
+            keys = json.load(f)
+
+    if len(keys) < count:
+        for _ in range(count - len(keys)):
+            with oqs.Signature(SIGNATURE_ALGORITHM) as signer:
+                public_key = signer.generate_keypair()
+                keys.append([encode(public_key), encode(signer.export_secret_key())])
+
+        with open(path, "w") as f:
+            json.dump(keys, f)
+
+    return [tuple(key) for key in keys[:count]]
+
+def sign(keys: list, number: int, payload, operation_type: OperationType, contract_address: str = None) -> TransactionCreate:
+    """
+    Create a transaction from the sender number % len(keys) and sign it.
+    """
+    public_key, private_key = keys[number % len(keys)]
+    transaction = TransactionCreate(sender=public_key,
+                                    payload=payload,
+                                    operation_type=operation_type,
+                                    contract_address=contract_address)
+    transaction.sign_transaction(private_key)
+    return transaction
+
+def deploy_counter_contract(dag: DAGBlockchain, keys: list) -> str:
+    """
+    Deploy the counter contract with a DEPLOY transaction, adding more deployments until the first
+    one is approved enough times to be processed.
+
+    Returns:
+    - str: The address of the contract
+    """
+    deployment_id = None
+    for number in range(1000):
+        transaction = sign(keys, number, f"{COUNTER_CONTRACT}\n# {number}", OperationType.DEPLOY)
+        transaction.created = datetime.utcnow()
+        dag.add_transaction(transaction)
+
+        if deployment_id is None:
+            deployment_id = Transaction(**transaction.dict()).generate_transaction_id()
+
+        deployment = dag.store.get(deployment_id)
+        if deployment.processed is not None:
+            return deployment.contract_address
+
+    raise RuntimeError("The counter contract was not deployed")
+
+def add_transactions(dag: DAGBlockchain, transactions: list) -> float:
+    """
+    Add the transactions to the DAG one by one (as the API does) and return the elapsed time in seconds.
+    """
+    started = time.perf_counter()
+    for transaction in transactions:
+        transaction.created = datetime.utcnow()
+        dag.add_transaction(transaction)
+    return time.perf_counter() - started
+
+def measure_parent_selection(dag: DAGBlockchain, samples: int) -> float:
+    """
+    Return the mean latency of the parent selection in microseconds.
+    """
+    probe = Transaction(sender="", payload="", operation_type=OperationType.CALL)
+    started = time.perf_counter()
+    for _ in range(samples):
+        dag.determine_parents_for_transaction(probe)
+    return (time.perf_counter() - started) / samples * 1e6
+
+def measure_persistence(dag: DAGBlockchain) -> dict:
+    """
+    Measure a full snapshot of the DAG, then the load of a new DAG from it (time and memory).
+    """
+    with dag._processing_lock, dag._lock:
+        started = time.perf_counter()
+        dag.storage.flush()
+        dag.storage.save_checkpoint(dag.get_state_checkpoint())
+        dag.storage.compact(dag.get_snapshot)
+        snapshot_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    loaded_dag = BenchmarkDAG()
+    load_elapsed = time.perf_counter() - started
+    nodes = len(loaded_dag.store)
+    del loaded_dag
+
+    tracemalloc.start()
+    loaded_dag = BenchmarkDAG()
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del loaded_dag
+
+    return {
+        "snapshot_ms": snapshot_elapsed * 1e3,
+        "snapshot_bytes": dag.storage.size(),
+        "load_ms": load_elapsed * 1e3,
+        "bytes_per_node": memory / nodes if nodes else None,
+    }
+
+def measure_signatures(transactions: list) -> dict:
+    """
+    Measure the signature verification: uncached (one by one and in batch through the process pool) and cached.
+    """
+    candidates = [Transaction(**transaction.dict()) for transaction in transactions]
+
+    verifier = signatures.get_verifier()
+    started = time.perf_counter()
+    for candidate in candidates:
+        verifier.verify(candidate.get_signed_content(), decode(candidate.signature), signatures.decode_public_key(candidate.sender))
+    uncached_elapsed = time.perf_counter() - started
+
+    signatures.verified_signatures.clear()
+    started = time.perf_counter()
+    signatures.verify_transactions_signatures(candidates)
+    batch_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for candidate in candidates:
+        candidate.is_signature_valid()
+    cached_elapsed = time.perf_counter() - started
+
+    return {
+        "samples": len(candidates),
+        "uncached_us": uncached_elapsed / len(candidates) * 1e6,
+        "batch_us_per_signature": batch_elapsed / len(candidates) * 1e6,
+        "cached_us": cached_elapsed / len(candidates) * 1e6,
+    }
+
+def measure_contract_call(dag: DAGBlockchain, contract_address: str, calls: int) -> dict:
+    """
+    Measure the latency of a call to the counter contract.
+    """
+    started = time.perf_counter()
+    for number in range(calls):
+        dag.python_virtual_machine.execute_contract(contract_address, "increment", [number], {})
+    return {"calls": calls, "latency_us": (time.perf_counter() - started) / calls * 1e6}
+
+def get_commit() -> str:
+    """
+    Get the git commit of the working tree, if any.
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def run(sizes: list, window: int, senders: int, keys_path: str, samples: int, calls: int) -> dict:
+    """
+    Run the benchmark suite and return the results.
+    """
+    global shared_directory
+    shared_directory = tempfile.mkdtemp(prefix="dag_benchmark_")
+
+    try:
+        keys = load_keys(keys_path, senders)
+        dag = BenchmarkDAG()
+        contract_address = deploy_counter_contract(dag, keys)
+
+        # Sign every transaction before measuring
+        sizes = sorted(sizes)
+        payloads = [{"function_signature": "increment", "args": [number], "kwargs": {}} for number in range(sizes[-1])]
+        transactions = [sign(keys, number, payload, OperationType.CALL, contract_address) for number, payload in enumerate(payloads)]
+
+        results = {
+            "signatures": measure_signatures(transactions[:samples]),
+            "contract_call": measure_contract_call(dag, contract_address, calls),
+            "sizes": [],
+        }
+
+        added = 0
+        for size in sizes:
+            # Grow the DAG up to the size, measuring the last window of transactions
+            measured_from = max(added, size - window)
+            add_transactions(dag, transactions[added:measured_from])
+            add_elapsed = add_transactions(dag, transactions[measured_from:size])
+            measured = size - measured_from
+            added = size
+
+            started = time.perf_counter()
+            dag.persist()
+            persist_elapsed = time.perf_counter() - started
+
+            row = {
+                "transactions": size,
+                "graph_nodes": len(dag.store),
+                "add_tx_per_s": measured / add_elapsed if add_elapsed else None,
+                "add_us_per_tx": add_elapsed / measured * 1e6 if measured else None,
+                "parent_selection_us": measure_parent_selection(dag, samples),
+                "persist_ms": persist_elapsed * 1e3,
+            }
+            row.update(measure_persistence(dag))
+            results["sizes"].append(row)
+
+        return results
+    finally:
+        shutil.rmtree(shared_directory, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Ledger core benchmark suite.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 5_000, 20_000], help="DAG sizes (transactions added).")
+    parser.add_argument("--window", type=int, default=500, help="Transactions measured before each size.")
+    parser.add_argument("--senders", type=int, default=16, help="Number of sender wallets.")
+    parser.add_argument("--keys", default=os.path.join(tempfile.gettempdir(), "dag_benchmark_keys.json"), help="File with the pre-generated keys.")
+    parser.add_argument("--samples", type=int, default=200, help="Samples of the parent selection and signature measurements.")
+    parser.add_argument("--calls", type=int, default=2000, help="Calls of the contract call measurement.")
+    parser.add_argument("--output", help="File to write the JSON results to (stdout by default).")
+    arguments = parser.parse_args()
+
+    # The VM prints the contract state on every call, keep it out of the results output
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        results = run(arguments.sizes, arguments.window, arguments.senders, arguments.keys, arguments.samples, arguments.calls)
+
+    document = {
+        "benchmark": "ledger_core",
+        "commit": get_commit(),
+        "created": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "parameters": {
+            "sizes": sorted(arguments.sizes),
+            "window": arguments.window,
+            "senders": arguments.senders,
+            "samples": arguments.samples,
+            "calls": arguments.calls,
+            "storage_backend": LEDGER_STORAGE_BACKEND,
+        },
+        "results": results,
+    }
+
+    if arguments.output:
+        with open(arguments.output, "w") as f:
+            json.dump(document, f, indent=4)
+    else:
+        print(json.dumps(document, indent=4))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Benchmark of the parent selection for new transactions (DAGBlockchain.determine_parents_for_transaction).
+
+It grows a DAG up to the biggest size requested, attaching every new transaction as add_transaction does:
+the parents are selected by determine_parents_for_transaction, then the transaction and its edges are
+added with add_node and add_edge (so the TipIndex, the transaction index and the transaction log are
+kept up to date). Around each size it measures the mean per-transaction latency of the parent selection
+alone, and of the selection plus the insertion. The legacy full scan over the transactions of the DAG
+is measured too for the smaller sizes.
+
+The transactions are unsigned records, so neither the signature checks nor the confirmations are part
+of the results (they are measured by the suite benchmark). The DAG is persisted in a temporary directory
+and no ghost transactions are sent.
+
+Usage (from the service root directory, with the service environment variables set):
+
+```bash
+python -m app.api.benchmarks.tip_selection --sizes 1000 10000 100000 1000000
+```
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from datetime import datetime
+
+from app.api.models.dag import DAGBlockchain
+from app.api.models.ledger_store import TransactionRecord
+from app.api.models.transaction import OperationType
+from app.api.methods.wallets import encode
+
+PARENTS_PER_TRANSACTION = 10
+
+# Sender of the benchmark transactions
+SENDER = encode(b"tip-selection-benchmark")
+
+# Directory where the benchmark DAG is persisted, set by run()
+shared_directory = None
+
+class BenchmarkDAG(DAGBlockchain):
+    """
+    DAGBlockchain persisted in the benchmark directory, without ghost transactions.
+    """
+    def get_shared_file_path(self, file_name: str) -> str:
+        return os.path.join(shared_directory, file_name)
+
+    def start_ghost_transactions(self):
+        pass
+
+def create_record(number: int) -> TransactionRecord:
+    """
+    Create the unsigned record of the benchmark transaction number.
+    """
+    return TransactionRecord(id=f"benchmark-{number}", sender=SENDER, contract_address=None, payload=encode(b""),
+                             args=None, kwargs=None, operation_type=OperationType.CALL, signature=None,
+                             created=datetime.utcnow(), nonce=number, processed=None)
+
+def legacy_select(dag: DAGBlockchain, transaction: TransactionRecord) -> list:
+    """
+    Parent selection as it was done before the TipIndex: a scan over every transaction of the DAG.
+    """
+    potential_parents = [tx_id for tx_id in dag.store.ids() if dag.store.in_degree(tx_id) < PARENTS_PER_TRANSACTION]
+    potential_parents = [tx_id for tx_id in potential_parents if tx_id != transaction.id]
+    return potential_parents[-PARENTS_PER_TRANSACTION:]
+
+def attach(dag: DAGBlockchain, transaction: TransactionRecord, parent_ids: list) -> None:
+    """
+    Add a transaction and its edges to the DAG, as add_transaction does once the parents are selected.
+    """
+    dag.add_node(transaction)
+    for parent_id in parent_ids:
+        dag.add_edge(transaction.id, parent_id)
+
+def grow(dag: DAGBlockchain, start: int, stop: int, legacy: bool = False) -> tuple:
+    """
+    Attach the transactions numbered from start to stop.
+
+    Returns:
+    - tuple: (seconds spent selecting the parents, seconds spent selecting the parents and inserting)
+    """
+    select = legacy_select if legacy else DAGBlockchain.determine_parents_for_transaction
+    selection_elapsed = 0.0
+    started = time.perf_counter()
+
+    with dag._lock:
+        for number in range(start, stop):
+            transaction = create_record(number)
+
+            selection_started = time.perf_counter()
+            parent_ids = select(dag, transaction)
+            selection_elapsed += time.perf_counter() - selection_started
+
+            attach(dag, transaction, parent_ids)
+
+    return selection_elapsed, time.perf_counter() - started
+
+def run(sizes: list, window: int, legacy_max: int) -> list:
+    """
+    Run the benchmark and return a row per size with the mean latencies in microseconds.
+    """
+    global shared_directory
+
+    shared_directory = tempfile.mkdtemp(prefix="tip-selection-")
+    try:
+        dag = BenchmarkDAG()
+        results = []
+
+        for size in sorted(sizes):
+            # Grow the DAG up to the size (minus the measured window)
+            start = size - window
+            grow(dag, len(dag.store), start)
+
+            # The legacy scan is measured on the first half of the window, on the same DAG
+            legacy_elapsed = None
+            if size <= legacy_max:
+                _, legacy_elapsed = grow(dag, start, start + window // 2, legacy=True)
+                legacy_elapsed /= window // 2
+                start += window // 2
+
+            selection_elapsed, elapsed = grow(dag, start, size)
+
+            results.append({
+                "size": size,
+                "selection_us_per_tx": selection_elapsed / (size - start) * 1e6,
+                "attach_us_per_tx": elapsed / (size - start) * 1e6,
+                "legacy_us_per_tx": legacy_elapsed * 1e6 if legacy_elapsed is not None else None,
+            })
+        return results
+    finally:
+        shutil.rmtree(shared_directory, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Parent selection benchmark.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--window", type=int, default=500, help="Transactions measured around each size.")
+    parser.add_argument("--legacy-max", type=int, default=10_000, help="Biggest size measured with the legacy scan.")
+    arguments = parser.parse_args()
+
+    print(f"{'nodes':>10} {'selection (us/tx)':>18} {'select + insert (us/tx)':>24} {'legacy scan + insert (us/tx)':>29}")
+    for row in run(arguments.sizes, arguments.window, arguments.legacy_max):
+        legacy = f"{row['legacy_us_per_tx']:.1f}" if row["legacy_us_per_tx"] is not None else "-"
+        print(f"{row['size']:>10} {row['selection_us_per_tx']:>18.2f} {row['attach_us_per_tx']:>24.2f} {legacy:>29}")
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import json
+import time
 import requests
 
 from datetime import datetime
@@ -15,6 +17,8 @@ from app.api.models.transaction import TransactionCreate, OperationType
 
 # Definir la URL del endpoint
 ENDPOINT_URL = f"{DEVELOPMENT_SERVER_URL}api/v1/{API_NAME}/transactions/"
+BATCH_ENDPOINT_URL = f"{ENDPOINT_URL}batch/"
+EVENTS_ENDPOINT_URL = f"{DEVELOPMENT_SERVER_URL}api/v1/{API_NAME}/events/"
 
 def send_transaction(sender, sender_private_key, payload, operation_type, created=None, contract_address=None):
     # Establecer la marca de tiempo de la transacción si no se proporciona
@@ -45,6 +49,65 @@ def send_transaction(sender, sender_private_key, payload, operation_type, create
         print("Código de estado:", response.status_code)
         print("Respuesta:", response.text)
 
+def send_transactions(sender, sender_private_key, transactions):
+    # Firmar todas las transacciones y enviarlas en una sola solicitud
+    # transactions: lista de tuplas (payload, operation_type, contract_address)
+    transactions_data = []
+    for payload, operation_type, contract_address in transactions:
+        transaction_data = TransactionCreate(
+            sender=sender,
+            payload=payload,
+            contract_address=contract_address,
+            operation_type=operation_type
+        )
+        transaction_data.sign_transaction(sender_private_key)
+
+        # Convertir datetime a str
+        transaction_data.created = transaction_data.created.isoformat()
+        transactions_data.append(transaction_data.dict())
+
+    # Realizar la solicitud POST al endpoint de lotes
+    response = requests.post(BATCH_ENDPOINT_URL, json=transactions_data)
+
+    # Verificar si la solicitud fue exitosa
+    if response.status_code == 200:
+        print("Lote de transacciones enviado con éxito.")
+        print("Respuesta:", response.json())
+    else:
+        print("Error al enviar el lote de transacciones.")
+        print("Código de estado:", response.status_code)
+        print("Respuesta:", response.text)
+
+    return response
+
+def stream_events(sender=None, contract_address=None, types=None):
+    # Recibir los eventos de las transacciones (accepted, rejected, confirmed, processed, failed) sin consultar la API
+    # Al reconectar se envía el ID del último evento recibido, así no se pierden los eventos publicados entretanto
+    last_event_id = None
+    params = {"sender": sender, "contract_address": contract_address, "types": types}
+
+    while True:
+        headers = {"Last-Event-ID": last_event_id} if last_event_id else {}
+        try:
+            with requests.get(EVENTS_ENDPOINT_URL, params=params, headers=headers, stream=True) as response:
+                response.raise_for_status()
+
+                event_id, data = None, None
+                for line in response.iter_lines(decode_unicode=True):
+                    if line.startswith("id: "):
+                        event_id = line[len("id: "):]
+                    elif line.startswith("data: "):
+                        data = line[len("data: "):]
+                    elif not line:
+                        # Fin del evento (los comentarios keep-alive y el evento lagged no tienen ID)
+                        if event_id is not None and data is not None:
+                            last_event_id = event_id
+                            yield json.loads(data)
+                        event_id, data = None, None
+        except requests.exceptions.ConnectionError:
+            print("Conexión con el stream de eventos perdida, reconectando...")
+            time.sleep(1)
+
 # Ejemplo de uso
 def main():
     while True:
@@ -1,6 +1,6 @@
 import json
 import time
-from app.api.clients.deploy_smart_contract import send_transaction, SEBASTIAN_PRIVATE_KEY, SEBASTIAN_PUBLIC_KEY, GENESIS_PRIVATE_KEY, GENESIS_PUBLIC_KEY
+from app.api.clients.deploy_smart_contract import send_transaction, stream_events, SEBASTIAN_PRIVATE_KEY, SEBASTIAN_PUBLIC_KEY, GENESIS_PRIVATE_KEY, GENESIS_PUBLIC_KEY
 
 from app.api.methods.wallets import encode
 
@@ -90,6 +90,17 @@ def assign_tokens_client():
     }
     send_transaction(SEBASTIAN_PUBLIC_KEY, SEBASTIAN_PRIVATE_KEY, payload, OperationType.CALL, contract_address=CONTRACT_ADDRESS)
 
+def watch_events_client():
+    # Mostrar los resultados de las llamadas al smart contract a medida que se procesan (Ctrl+C para volver al menú)
+    try:
+        for event in stream_events(contract_address=CONTRACT_ADDRESS, types="processed,failed"):
+            if event["type"] == "processed":
+                print(f"Transaction {event['transaction_id']} processed in {event['latency']:.2f}s:", event.get("result"))
+            else:
+                print(f"Transaction {event['transaction_id']} failed:", event.get("error"))
+    except KeyboardInterrupt:
+        pass
+
 # Integration of the Smart Contract functions in the menu
 def menu():
     while True:
@@ -102,6 +113,7 @@ def menu():
         print("6. Add Voters in Batch")
         print("7. Send ghost transaction")
         print("8. Exit")
+        print("9. Watch the results of the smart contract")
 
         choice = input("Enter your choice: ")
         
@@ -126,6 +138,8 @@ def menu():
             send_transaction(GENESIS_PUBLIC_KEY, GENESIS_PRIVATE_KEY, encode(b""), OperationType.CALL)
         elif choice == '8':
             break
+        elif choice == '9':
+            watch_events_client()
         else:
             print("Invalid choice. Please try again.")
 
@@ -25,11 +25,76 @@ N8_PASSWORD = os.getenv('N8_PASSWORD')
 # MQTT Broker configuration
 MQTT_BROKER_USERNAME = os.getenv('MQTT_BROKER_USERNAME')
 MQTT_BROKER_PASSWORD = os.getenv('MQTT_BROKER_PASSWORD')
+MQTT_BROKER_HOST = os.getenv('MQTT_BROKER_HOST', 'localhost') # base_blockchain_mqtt_broker inside the docker network
+MQTT_BROKER_PORT = int(os.getenv('MQTT_BROKER_PORT', 1883))
+MQTT_PUBLISHER = os.getenv('MQTT_PUBLISHER', 'false').lower() == 'true' # Publish the events of the ledger to the MQTT broker (requires paho-mqtt)
+MQTT_TOPIC_PREFIX = os.getenv('MQTT_TOPIC_PREFIX', API_NAME) # The ACL of the broker allows the topics under the API name
+MQTT_QOS = int(os.getenv('MQTT_QOS', 1)) # Quality of service of the published messages
+MQTT_BUFFER_SIZE = int(os.getenv('MQTT_BUFFER_SIZE', 10000)) # Messages waiting to be sent before new ones are dropped
+MQTT_BATCH_SIZE = int(os.getenv('MQTT_BATCH_SIZE', 100)) # Messages handed to the MQTT client at once
 
 # DAG configuration
 GENESIS_PRIVATE_KEY = os.getenv('GENESIS_PRIVATE_KEY')
 GENESIS_PUBLIC_KEY = os.getenv('GENESIS_PUBLIC_KEY')
 
+# Signature verification configuration
+SIGNATURE_CACHE_SIZE = int(os.getenv('SIGNATURE_CACHE_SIZE', 100000)) # Successful verifications kept in memory (LRU)
+PUBLIC_KEY_CACHE_SIZE = int(os.getenv('PUBLIC_KEY_CACHE_SIZE', 10000)) # Decoded public keys kept in memory (LRU)
+SIGNATURE_VERIFICATION_WORKERS = int(os.getenv('SIGNATURE_VERIFICATION_WORKERS', os.cpu_count() or 1)) # Processes used for batch verifications
+SIGNATURE_VERIFICATION_MIN_BATCH = int(os.getenv('SIGNATURE_VERIFICATION_MIN_BATCH', 32)) # Smaller batches are verified in the API process
+
+# Serialization configuration
+FAST_JSON = os.getenv('FAST_JSON', 'true').lower() == 'true' # Serialize the API responses and the persisted ledger with orjson, when it is installed
+
+# DAG persistence configuration
+LEDGER_STORAGE_BACKEND = os.getenv('LEDGER_STORAGE_BACKEND', 'json') # json (snapshot plus transaction log) or sqlite (WAL mode database)
+DAG_LOG_FSYNC_BATCH_SIZE = int(os.getenv('DAG_LOG_FSYNC_BATCH_SIZE', 100)) # Records buffered before the transaction log is written to disk
+DAG_LOG_COMPACTION_THRESHOLD = int(os.getenv('DAG_LOG_COMPACTION_THRESHOLD', 10000)) # Records in the transaction log that trigger a new snapshot
+STATE_CHECKPOINT_INTERVAL = int(os.getenv('STATE_CHECKPOINT_INTERVAL', 100)) # Processed transactions between checkpoints of the derived state
+
+# Confirmation configuration
+CONFIRMATION_THRESHOLD = int(os.getenv('CONFIRMATION_THRESHOLD', 4)) # Approvals (or cumulative weight) needed to confirm and process a transaction
+CONFIRMATION_MODE = os.getenv('CONFIRMATION_MODE', 'approvals') # approvals (direct approvers) or cumulative_weight (direct and indirect approvers)
+
+# Pruning configuration
+PRUNING_DEPTH = int(os.getenv('PRUNING_DEPTH', 0)) # Confirmations after which a processed transaction is archived (0 disables it)
+PRUNING_MAX_AGE = int(os.getenv('PRUNING_MAX_AGE', 0)) # Seconds after which a processed transaction is archived (0 disables it)
+
+# Transactions API configuration
+TRANSACTIONS_BATCH_MAX_SIZE = int(os.getenv('TRANSACTIONS_BATCH_MAX_SIZE', 500)) # Maximum number of transactions accepted by the batch endpoint
+TRANSACTIONS_PAGE_MAX_SIZE = int(os.getenv('TRANSACTIONS_PAGE_MAX_SIZE', 100)) # Maximum number of transactions returned by a page of the history endpoints
+
+# Smart contracts API configuration
+SMART_CONTRACTS_PAGE_MAX_SIZE = int(os.getenv('SMART_CONTRACTS_PAGE_MAX_SIZE', 100)) # Maximum number of smart contracts returned by a page of the listing
+
+# Asynchronous ingestion configuration
+ASYNC_INGESTION = os.getenv('ASYNC_INGESTION', 'false').lower() == 'true' # Queue the transactions and add them to the DAG in background
+INGESTION_QUEUE_MAX_SIZE = int(os.getenv('INGESTION_QUEUE_MAX_SIZE', 1000)) # Queued transactions before the API answers 429
+INGESTION_WRITER_BATCH_SIZE = int(os.getenv('INGESTION_WRITER_BATCH_SIZE', 100)) # Transactions added to the DAG by the writer at once
+INGESTION_STATUS_REGISTRY_SIZE = int(os.getenv('INGESTION_STATUS_REGISTRY_SIZE', 10000)) # Transaction statuses kept in memory
+
+# Event stream configuration
+EVENT_HISTORY_SIZE = int(os.getenv('EVENT_HISTORY_SIZE', 1000)) # Last events kept to be replayed to the clients that reconnect (Last-Event-ID)
+EVENT_SUBSCRIPTION_QUEUE_SIZE = int(os.getenv('EVENT_SUBSCRIPTION_QUEUE_SIZE', 1000)) # Pending events of a client before its stream is closed
+EVENT_STREAM_HEARTBEAT_INTERVAL = int(os.getenv('EVENT_STREAM_HEARTBEAT_INTERVAL', 15)) # Seconds without events before a keep-alive comment is sent
+
+# Peer synchronization configuration
+SYNC_PEERS = [peer.strip().rstrip('/') for peer in os.getenv('SYNC_PEERS', '').split(',') if peer.strip()] # Comma-separated base URLs of the nodes to pull the transactions from (e.g. http://node-2:8000)
+SYNC_INTERVAL = int(os.getenv('SYNC_INTERVAL', 5)) # Seconds between synchronization rounds
+SYNC_BATCH_SIZE = int(os.getenv('SYNC_BATCH_SIZE', 200)) # Transactions requested to a peer at once (and served at most per request)
+SYNC_TIMEOUT = int(os.getenv('SYNC_TIMEOUT', 10)) # Seconds to wait for the answer of a peer
+SYNC_SEEN_REGISTRY_SIZE = int(os.getenv('SYNC_SEEN_REGISTRY_SIZE', 100000)) # Received or unavailable transaction IDs kept in memory, not requested again
+
+# Smart contracts configuration
+CONTRACT_CACHE_SIZE = int(os.getenv('CONTRACT_CACHE_SIZE', 128)) # Compiled contracts kept in memory (LRU)
+CONTRACT_EXECUTION_WORKERS = int(os.getenv('CONTRACT_EXECUTION_WORKERS', os.cpu_count() or 1)) # Isolated processes executing the calls to different smart contracts concurrently (0 executes them in the API process)
+CONTRACT_CALL_TIMEOUT = float(os.getenv('CONTRACT_CALL_TIMEOUT', 2)) # Seconds of CPU time of a smart contract call in a worker
+CONTRACT_WORKER_MEMORY_LIMIT = int(os.getenv('CONTRACT_WORKER_MEMORY_LIMIT', 256)) # MB available to the smart contracts in a worker (0 disables the limit)
+CONTRACT_WORKER_MAX_CALLS = int(os.getenv('CONTRACT_WORKER_MAX_CALLS', 10000)) # Calls after which a worker is replaced (0 never replaces them)
+CONTRACT_SNAPSHOT_INTERVAL = int(os.getenv('CONTRACT_SNAPSHOT_INTERVAL', 100)) # Calls to a smart contract after which a new snapshot of its state is taken, to roll back the calls that run out of gas
+CONTRACT_GAS_LIMIT = int(os.getenv('CONTRACT_GAS_LIMIT', 1000000)) # Gas of a smart contract call that doesn't set its gas_limit: a unit per bytecode instruction of the contract executed (0 disables the metering)
+CONTRACT_MAX_GAS_LIMIT = int(os.getenv('CONTRACT_MAX_GAS_LIMIT', 10000000)) # Highest gas_limit a smart contract call can set (0 for no maximum)
+
 # 
 SEBASTIAN_PRIVATE_KEY = os.getenv('SEBASTIAN_PRIVATE_KEY')
 SEBASTIAN_PUBLIC_KEY = os.getenv('SEBASTIAN_PUBLIC_KEY')
\ No newline at end of file
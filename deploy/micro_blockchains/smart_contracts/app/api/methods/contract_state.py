@@ -0,0 +1,113 @@
+# methods/contract_state.py
+
+import io
+import marshal
+import pickle
+import types
+
+from app.api.methods.wallets import encode, decode
+
+class ContractStatePickler(pickle.Pickler):
+    """
+    Pickler for the state of a smart contract.
+
+    Classes and functions defined by the contract live in the contract's own global environment
+    (its __name__ is "__main__"), so they can't be pickled by reference. They are saved by name
+    and resolved again from the contract's bytecode when the state is loaded.
+    """
+    def persistent_id(self, obj):
+        if isinstance(obj, (type, types.FunctionType)) and getattr(obj, "__module__", None) == "__main__":
+            return ("contract_global", obj.__qualname__)
+        return None
+
+class ContractStateUnpickler(pickle.Unpickler):
+    """
+    Unpickler for the state of a smart contract, resolving the contract's classes and functions
+    from the global environment created by executing its bytecode.
+    """
+    def __init__(self, file, contract_globals: dict):
+        super().__init__(file)
+        self.contract_globals = contract_globals
+
+    def persistent_load(self, pid):
+        kind, qualname = pid
+        if kind != "contract_global":
+            raise pickle.UnpicklingError(f"Unsupported persistent id {pid}")
+
+        # The globals can be created on first use, so the contract is only executed if the state needs it
+        if callable(self.contract_globals):
+            self.contract_globals = self.contract_globals()
+
+        obj = self.contract_globals[qualname.split(".")[0]]
+        for attribute in qualname.split(".")[1:]:
+            obj = getattr(obj, attribute)
+        return obj
+
+def get_contract_globals(bytecode: str) -> dict:
+    """
+    Execute the bytecode of a contract (Base64 encoded) in a new environment to define its classes and functions.
+
+    Args:
+    - bytecode: str
+
+    Returns:
+    - dict: The global environment of the contract
+    """
+    contract_globals = {
+        "state": {},
+        "__name__": "__main__"
+    }
+    exec(marshal.loads(decode(bytecode)), contract_globals)
+    return contract_globals
+
+def pickle_contract_state(state) -> bytes:
+    """
+    Pickle the state of a smart contract (or any value holding objects of the contract, e.g. the result of its functions).
+
+    Args:
+    - state: dict
+
+    Returns:
+    - bytes
+    """
+    buffer = io.BytesIO()
+    ContractStatePickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(state)
+    return buffer.getvalue()
+
+def unpickle_contract_state(data: bytes, contract_globals: dict):
+    """
+    Unpickle a value created by pickle_contract_state.
+
+    Args:
+    - data: bytes
+    - contract_globals: dict: The classes and functions of the contract, by name (or a function that returns them)
+
+    Returns:
+    - The unpickled value
+    """
+    return ContractStateUnpickler(io.BytesIO(data), contract_globals).load()
+
+def dump_contract_state(state: dict) -> str:
+    """
+    Serialize the state of a smart contract.
+
+    Args:
+    - state: dict
+
+    Returns:
+    - str: The pickled state, Base64 encoded
+    """
+    return encode(pickle_contract_state(state))
+
+def load_contract_state(serialized_state: str, bytecode: str) -> dict:
+    """
+    Deserialize the state of a smart contract created by dump_contract_state.
+
+    Args:
+    - serialized_state: str
+    - bytecode: str: The Base64 encoded bytecode of the contract
+
+    Returns:
+    - dict
+    """
+    return unpickle_contract_state(decode(serialized_state), get_contract_globals(bytecode))
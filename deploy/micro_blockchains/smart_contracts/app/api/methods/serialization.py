@@ -0,0 +1,85 @@
+# methods/serialization.py
+
+import json
+
+from datetime import date, datetime
+from enum import Enum
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from app.api.config.env import FAST_JSON
+
+# orjson is optional: without it (or with FAST_JSON disabled) the standard json module is used.
+# Only the encoding uses orjson: it parses integers beyond 64 bits as floats, so the persisted
+# ledger is always read with the json module.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if not FAST_JSON:
+    orjson = None
+
+# Dicts with non string keys are serialized as with the json module
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+def default(value):
+    """
+    Serialize the values not supported natively by the JSON encoders.
+
+    Args:
+    - value: Any
+
+    Returns:
+    - A JSON compatible value
+
+    Raises:
+    - TypeError: If the value can't be serialized
+    """
+    if isinstance(value, BaseModel):
+        return value.dict()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode()
+
+    # Other objects (e.g. the instances of the classes of a smart contract in its state) are encoded
+    # as FastAPI does, from their attributes
+    try:
+        return jsonable_encoder(value)
+    except (TypeError, ValueError) as e:
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable") from e
+
+def dumps_bytes(value) -> bytes:
+    """
+    Serialize a value to JSON (UTF-8), with orjson if it is available.
+
+    Args:
+    - value: Any
+
+    Returns:
+    - bytes
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, default=default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits in the state of a smart contract
+            pass
+    return json.dumps(value, default=default, separators=(",", ":")).encode()
+
+def dumps(value) -> str:
+    """
+    Serialize a value to a JSON string, with orjson if it is available.
+
+    Args:
+    - value: Any
+
+    Returns:
+    - str
+    """
+    return dumps_bytes(value).decode()
@@ -0,0 +1,208 @@
+# methods/signatures.py
+
+import multiprocessing
+import oqs
+
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from hashlib import sha256
+from threading import Lock, local
+
+# Import the signature verification configuration
+from app.api.config.env import SIGNATURE_CACHE_SIZE, PUBLIC_KEY_CACHE_SIZE, \
+                               SIGNATURE_VERIFICATION_WORKERS, SIGNATURE_VERIFICATION_MIN_BATCH
+
+# Import the keys methods
+from app.api.methods.wallets import decode
+
+SIGNATURE_ALGORITHM = "Dilithium2"
+
+# Successful verifications, keyed by (transaction ID, signature digest), in LRU order
+verified_signatures = OrderedDict()
+verified_signatures_lock = Lock()
+
+# Verifier contexts are reused, one per thread
+verifier_contexts = local()
+
+# Process pool for batch verifications, created on first use
+verification_pool = None
+verification_pool_lock = Lock()
+
+@lru_cache(maxsize=PUBLIC_KEY_CACHE_SIZE)
+def decode_public_key(public_key: str) -> bytes:
+    """
+    Decode a Base64 public key, caching the result.
+
+    Args:
+    - public_key: str
+
+    Returns:
+    - bytes
+    """
+    return decode(public_key)
+
+def get_verifier() -> oqs.Signature:
+    """
+    Get the verifier context of the current thread, creating it on first use.
+
+    Returns:
+    - oqs.Signature
+    """
+    verifier = getattr(verifier_contexts, "verifier", None)
+    if verifier is None:
+        verifier = oqs.Signature(SIGNATURE_ALGORITHM)
+        verifier_contexts.verifier = verifier
+    return verifier
+
+def get_signature_cache_key(transaction_id: str, sender: str, signature: str) -> tuple:
+    """
+    Get the key of a verification in the cache.
+
+    The signature digest also covers the sender, so a cached verification can't be reused for
+    a different public key.
+
+    Args:
+    - transaction_id: str: The ID of the transaction, generated from the signed content.
+    - sender: str
+    - signature: str
+
+    Returns:
+    - tuple
+    """
+    return (transaction_id, sha256(f"{sender}:{signature}".encode()).hexdigest())
+
+def is_signature_cached(cache_key: tuple) -> bool:
+    """
+    Check if a verification is in the cache.
+
+    Args:
+    - cache_key: tuple
+
+    Returns:
+    - bool
+    """
+    with verified_signatures_lock:
+        if cache_key in verified_signatures:
+            verified_signatures.move_to_end(cache_key)
+            return True
+    return False
+
+def cache_verified_signature(cache_key: tuple) -> None:
+    """
+    Record a successful verification, evicting the least recently used ones when the cache is full.
+
+    Args:
+    - cache_key: tuple
+    """
+    with verified_signatures_lock:
+        verified_signatures[cache_key] = True
+        verified_signatures.move_to_end(cache_key)
+
+        while len(verified_signatures) > SIGNATURE_CACHE_SIZE:
+            verified_signatures.popitem(last=False)
+
+def verify_transaction_signature(transaction_id: str, sender: str, transaction_content: bytes, signature: str) -> bool:
+    """
+    Verify the signature of a transaction. Successful verifications are cached, so verifying
+    the same transaction again costs a dictionary lookup.
+
+    Args:
+    - transaction_id: str: The ID of the transaction, generated from the signed content.
+    - sender: str: The Base64 public key of the sender.
+    - transaction_content: bytes: The signed content.
+    - signature: str: The Base64 signature.
+
+    Returns:
+    - bool
+    """
+    cache_key = get_signature_cache_key(transaction_id, sender, signature)
+    if is_signature_cached(cache_key):
+        return True
+
+    # verifier verifies the signature
+    is_valid = get_verifier().verify(transaction_content, decode(signature), decode_public_key(sender))
+
+    if is_valid:
+        cache_verified_signature(cache_key)
+
+    return is_valid
+
+def get_verification_pool() -> ProcessPoolExecutor:
+    """
+    Get the process pool used for batch verifications, creating it on first use.
+
+    Workers are spawned (not forked) because the API process runs several threads.
+
+    Returns:
+    - ProcessPoolExecutor
+    """
+    global verification_pool
+    with verification_pool_lock:
+        if verification_pool is None:
+            verification_pool = ProcessPoolExecutor(max_workers=SIGNATURE_VERIFICATION_WORKERS,
+                                                    mp_context=multiprocessing.get_context("spawn"))
+    return verification_pool
+
+def verify_signatures_chunk(chunk: list) -> list:
+    """
+    Verify a chunk of signatures. Runs in the worker processes of the verification pool.
+
+    Args:
+    - chunk: list: (sender, transaction_content, signature) tuples
+
+    Returns:
+    - list: The result of each verification
+    """
+    verifier = get_verifier()
+    results = []
+    for sender, transaction_content, signature in chunk:
+        try:
+            results.append(verifier.verify(transaction_content, decode(signature), decode_public_key(sender)))
+        except Exception:
+            # Malformed keys or signatures are invalid signatures
+            results.append(False)
+    return results
+
+def verify_transactions_signatures(transactions: list) -> list:
+    """
+    Verify the signatures of a list of transactions, fanning the verifications out over the
+    verification pool. Cached verifications are not repeated and successful ones are cached.
+
+    Args:
+    - transactions: list: Transaction objects
+
+    Returns:
+    - list: The result of each verification, in the same order as the transactions
+    """
+    results = [False] * len(transactions)
+    pending = [] # (index, cache key, verification item)
+
+    for index, transaction in enumerate(transactions):
+        # Unsigned transactions are not valid
+        if not transaction.signature:
+            continue
+
+        cache_key = get_signature_cache_key(transaction.generate_transaction_id(), transaction.sender, transaction.signature)
+        if is_signature_cached(cache_key):
+            results[index] = True
+        else:
+            pending.append((index, cache_key, (transaction.sender, transaction.get_signed_content(), transaction.signature)))
+
+    items = [item for _, _, item in pending]
+
+    # Small batches are verified in this process, the pool overhead is not worth it
+    if SIGNATURE_VERIFICATION_WORKERS <= 1 or len(items) < SIGNATURE_VERIFICATION_MIN_BATCH:
+        verifications = verify_signatures_chunk(items)
+    else:
+        chunk_size = max(1, len(items) // (SIGNATURE_VERIFICATION_WORKERS * 4))
+        chunks = [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+        verifications = [is_valid for chunk_results in get_verification_pool().map(verify_signatures_chunk, chunks)
+                         for is_valid in chunk_results]
+
+    for (index, cache_key, _), is_valid in zip(pending, verifications):
+        results[index] = is_valid
+        if is_valid:
+            cache_verified_signature(cache_key)
+
+    return results
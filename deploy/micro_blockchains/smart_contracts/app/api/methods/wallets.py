@@ -3,6 +3,8 @@
 import oqs
 import base64
 
+from hashlib import sha256
+
 def encode(data):
     """Codify a data in Base64."""
     return base64.b64encode(data).decode()
@@ -47,3 +49,7 @@ def verify_signature(transaction_hash, signature, public_key):
             is_valid = verifier.verify(transaction_hash, signature, public_key)
 
     return is_valid
+
+def get_account_id(public_key):
+    """ Get the account ID of a public key: the SHA-256 fingerprint of the Base64 public key. """
+    return sha256(public_key.encode()).hexdigest()
@@ -0,0 +1,122 @@
+# models/account_registry.py
+
+from pydantic import BaseModel, Field
+
+# Import the keys methods
+from app.api.methods.wallets import get_account_id
+
+class AccountRegistry(BaseModel):
+    """
+    AccountRegistry Model to map the public keys (Base64 Dilithium2 keys, kilobytes long) to short account IDs.
+
+    Every public key is registered once and gets its SHA-256 fingerprint as account ID. The in-memory indexes
+    (nonces, balances, transactions) and the persisted transaction log use the account IDs, the full public
+    key is only resolved when it is needed (signature verification, API responses).
+
+    Args:
+    - public_keys: dict: The public key of every account ID, in registration order.
+    - account_ids: dict: The account ID of every public key.
+
+    Returns:
+    - AccountRegistry: A new instance of the AccountRegistry model
+    """
+    public_keys: dict = Field(default_factory=dict, description="The public key of every account ID, in registration order.")
+    account_ids: dict = Field(default_factory=dict, description="The account ID of every public key.")
+
+    def __len__(self) -> int:
+        return len(self.public_keys)
+
+    def __contains__(self, account_id: str) -> bool:
+        return account_id in self.public_keys
+
+    def get_account_id(self, public_key: str) -> str:
+        """
+        Get the account ID of a public key, without registering it.
+
+        Args:
+        - public_key: str
+
+        Returns:
+        - str
+        """
+        account_id = self.account_ids.get(public_key)
+        if account_id is None:
+            account_id = get_account_id(public_key)
+        return account_id
+
+    def register(self, public_key: str) -> tuple:
+        """
+        Register a public key.
+
+        Args:
+        - public_key: str
+
+        Returns:
+        - tuple[str, bool]: The account ID and True if the public key was not registered yet
+        """
+        account_id = self.account_ids.get(public_key)
+        if account_id is not None:
+            return account_id, False
+
+        account_id = get_account_id(public_key)
+        self.account_ids[public_key] = account_id
+        self.public_keys[account_id] = public_key
+        return account_id, True
+
+    def get_public_key(self, account_id: str) -> str:
+        """
+        Get the public key of an account ID.
+
+        Args:
+        - account_id: str
+
+        Returns:
+        - str: The public key, or None if the account is not registered
+        """
+        return self.public_keys.get(account_id)
+
+    def resolve(self, value: str) -> tuple:
+        """
+        Resolve an account ID or a public key (e.g. data persisted before the account IDs), registering unknown public keys.
+
+        Args:
+        - value: str: An account ID or a public key
+
+        Returns:
+        - tuple[str, str]: The account ID and the public key
+        """
+        if value in self.public_keys:
+            return value, self.public_keys[value]
+
+        account_id, _ = self.register(value)
+        return account_id, self.public_keys[account_id]
+
+    def to_account_ids(self, registry: dict) -> dict:
+        """
+        Convert the keys of a dict keyed by account IDs or public keys (e.g. a checkpoint persisted before the account IDs) to account IDs.
+
+        Args:
+        - registry: dict
+
+        Returns:
+        - dict
+        """
+        return {self.resolve(key)[0]: value for key, value in registry.items()}
+
+    def load(self, public_keys: dict) -> None:
+        """
+        Register the accounts of a snapshot.
+
+        Args:
+        - public_keys: dict: The public key of every account ID
+        """
+        for account_id, public_key in public_keys.items():
+            self.public_keys[account_id] = public_key
+            self.account_ids[public_key] = account_id
+
+    def clear(self) -> None:
+        """
+        Remove every account.
+        """
+        self.public_keys.clear()
+        self.account_ids.clear()
@@ -0,0 +1,134 @@
+# models/contract_journal.py
+
+from pydantic import BaseModel, Field, PrivateAttr
+
+# Import the smart contracts models
+from app.api.models.python_virtual_machine import PythonVirtualMachine
+
+# Import the contract state serialization methods
+from app.api.methods.contract_state import pickle_contract_state, unpickle_contract_state
+
+class ContractJournal(BaseModel):
+    """
+    ContractJournal Model: a snapshot of the state of a smart contract and the calls applied to it since the
+    snapshot, to roll back a call without copying the state before every call.
+
+    The snapshot is pickled, and taken again once `interval` calls were applied, so restoring the state before
+    a call unpickles the snapshot and executes again (with the same gas, so with the same results) at most
+    `interval` calls. The calls that run out of gas are not applied, so they are not in the journal.
+
+    With workers, the API process keeps a journal of every contract whose state lives in a worker, to load it again
+    in a new worker: the calls are recorded as the worker executes them, and the snapshot is got from the worker.
+
+    Args:
+    - interval: int: The calls after which a new snapshot is taken.
+    - snapshot: bytes: The pickled state of the snapshot.
+    - calls: list: The calls applied since the snapshot, (function signature, args, kwargs, gas limit) tuples.
+    - generation: int: The times the state was replaced, so the copies of the previous one are discarded.
+    - unsynchronized: bool: The state in the worker has calls that the state of the API process doesn't.
+
+    Returns:
+    - ContractJournal: A new instance of the ContractJournal model
+    """
+    interval: int = Field(default=100, description="The calls after which a new snapshot is taken.")
+    snapshot: bytes = Field(default=None, description="The pickled state of the snapshot.")
+    calls: list = Field(default_factory=list, description="The calls applied since the snapshot.")
+    generation: int = Field(default=0, description="The times the state was replaced, so the copies of the previous one are discarded.")
+    unsynchronized: bool = Field(default=False, description="The state in the worker has calls that the state of the API process doesn't.")
+
+    # The state the journal applies to: a new snapshot is taken if the state of the contract is replaced
+    _state: object = PrivateAttr(default=None)
+
+    def prepare(self, state) -> None:
+        """
+        Take a new snapshot before a call if there is none for the state, or the interval was reached.
+
+        Args:
+        - state: dict: The current state of the contract
+
+        Raises:
+        - Exception: If the state can't be pickled
+        """
+        if not self.track(state) and len(self.calls) >= self.interval:
+            self.reset(pickle_contract_state(state), state)
+
+    def track(self, state) -> bool:
+        """
+        Start the journal from a snapshot of the state if it was replaced (e.g. restored from a checkpoint).
+
+        Args:
+        - state: dict: The current state of the contract
+
+        Returns:
+        - bool: True if the state was replaced
+
+        Raises:
+        - Exception: If the state can't be pickled
+        """
+        if self._state is state:
+            return False
+
+        self.reset(pickle_contract_state(state), state)
+        self.generation += 1
+        return True
+
+    def reset(self, snapshot: bytes, state) -> None:
+        """
+        Start the journal from a snapshot of the state.
+
+        Args:
+        - snapshot: bytes: The pickled state
+        - state: dict: The state the snapshot was taken from
+        """
+        self.snapshot = snapshot
+        self.calls = []
+        self.unsynchronized = False
+        self._state = state
+
+    def rebase(self, snapshot: bytes) -> None:
+        """
+        Start the journal from a newer snapshot of the state, taken in a worker. The state of the API
+        process is not changed.
+
+        Args:
+        - snapshot: bytes: The pickled state
+        """
+        self.snapshot = snapshot
+        self.calls = []
+
+    def record(self, call: tuple) -> None:
+        """
+        Record a call applied to the state.
+
+        Args:
+        - call: tuple: (function signature, args, kwargs, gas limit)
+        """
+        self.calls.append(call)
+
+    def restore(self, python_virtual_machine: PythonVirtualMachine, contract_address: str) -> None:
+        """
+        Restore the state of a contract to the last call recorded: the snapshot is unpickled and the calls
+        recorded since it are executed again.
+
+        Args:
+        - python_virtual_machine: PythonVirtualMachine
+        - contract_address: str
+        """
+        smart_contract = python_virtual_machine.deployed_smart_contracts[contract_address]
+
+        # The objects of the state are bound to the classes of the compiled contract
+        definitions = python_virtual_machine.get_compiled_contract(contract_address).definitions
+        smart_contract.state = unpickle_contract_state(self.snapshot, definitions)
+        self._state = smart_contract.state
+
+        for call in self.calls:
+            python_virtual_machine.execute_metered_call(contract_address, *call)
+
+    class Config:
+        """
+        Pydantic configuration for the ContractJournal model.
+
+        Args:
+        - arbitrary_types_allowed: bool
+        """
+        arbitrary_types_allowed = True
@@ -0,0 +1,292 @@
+# models/contract_scheduler.py
+
+import copy
+
+from threading import Lock
+from pydantic import BaseModel, Field, PrivateAttr
+
+# Import the smart contracts models
+from app.api.models.python_virtual_machine import PythonVirtualMachine
+from app.api.models.contract_worker_pool import ContractWorkerPool
+from app.api.models.contract_journal import ContractJournal
+
+# Import the contract state serialization methods
+from app.api.methods.contract_state import unpickle_contract_state
+
+def execute_calls(python_virtual_machine: PythonVirtualMachine, contract_address: str, calls: list, journal: ContractJournal) -> list:
+    """
+    Execute calls to a smart contract in the API process, in order. A call that raises doesn't stop the
+    next ones, and the changes it made to the state are kept, as when the calls are executed one by one.
+
+    A call that runs out of gas is rolled back instead: the state is restored from the journal of the contract,
+    its last snapshot and the calls applied since it, so the state is not copied on every call.
+
+    Args:
+    - python_virtual_machine: PythonVirtualMachine
+    - contract_address: str
+    - calls: list: (function signature, args, kwargs, gas limit) tuples
+    - journal: ContractJournal: The journal of the contract (None if it is not deployed)
+
+    Returns:
+    - list: For each call, (status, result or error message, gas used), the status is "ok", "error" or "out_of_gas"
+    """
+    smart_contract = python_virtual_machine.deployed_smart_contracts.get(contract_address)
+
+    results = []
+    for call in calls:
+        if smart_contract is None:
+            results.append(python_virtual_machine.execute_metered_call(contract_address, *call))
+            continue
+
+        try:
+            journal.prepare(smart_contract.state)
+        except Exception as e:
+            results.append(("error", f"The state of the contract can't be copied: {e}", 0))
+            continue
+
+        result = python_virtual_machine.execute_metered_call(contract_address, *call)
+        results.append(result)
+        if result[0] == "out_of_gas":
+            journal.restore(python_virtual_machine, contract_address)
+        else:
+            journal.record(call)
+    return results
+
+class ContractExecutionScheduler(BaseModel):
+    """
+    ContractExecutionScheduler Model to execute the confirmed calls to the smart contracts concurrently, out of the API process.
+
+    The calls to different smart contracts change different states, so they are independent: the calls are
+    partitioned by contract address, and the partitions are executed concurrently by the workers of a
+    ContractWorkerPool, the calls of each partition in confirmation order. The state of a contract is resident in
+    its worker, which only gets the calls and sends back their results: the state of the API process is updated
+    when it is read (see get_state and synchronize_states). If the state can't be loaded in a worker, all the
+    calls of the partition fail.
+
+    Without workers, the calls are executed in the API process, one by one. Every call is metered with its gas
+    limit, and the calls that run out of gas are rolled back with the journal of the contract, also in the API
+    process. The CPU time and memory limits only apply in the workers: in the API process, a call is only stopped
+    by its gas (the contracts that could catch OutOfGas are rejected when deployed).
+
+    Args:
+    - workers: int: The worker processes (0 executes the calls in the API process).
+    - call_timeout: float: Seconds of CPU time per call.
+    - memory_limit: int: MB available to the contracts of a worker (0 disables the limit).
+    - max_calls: int: The calls after which a worker is replaced (0 never replaces them).
+    - snapshot_interval: int: The calls to a contract after which a new snapshot of its state is taken, to roll back the calls.
+
+    The calls to a contract and the reads of its state hold the lock of the contract, so the calls can be
+    executed while the state of other contracts is read.
+
+    Returns:
+    - ContractExecutionScheduler: A new instance of the ContractExecutionScheduler model
+    """
+    workers: int = Field(default=0, description="The worker processes (0 executes the calls in the API process).")
+    call_timeout: float = Field(default=2, description="Seconds of CPU time per call.")
+    memory_limit: int = Field(default=256, description="MB available to the contracts of a worker (0 disables the limit).")
+    max_calls: int = Field(default=10000, description="The calls after which a worker is replaced (0 never replaces them).")
+    snapshot_interval: int = Field(default=100, description="The calls to a contract after which a new snapshot of its state is taken, to roll back the calls.")
+
+    _pool: ContractWorkerPool = PrivateAttr(default=None)
+
+    # The journals of the contracts, by address
+    _journals: dict = PrivateAttr(default_factory=dict)
+    # The locks of the contracts, by address
+    _contract_locks: dict = PrivateAttr(default_factory=dict)
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        if self.workers > 0:
+            self._pool = ContractWorkerPool(size=self.workers, call_timeout=self.call_timeout, memory_limit=self.memory_limit,
+                                            max_calls=self.max_calls, snapshot_interval=self.snapshot_interval)
+
+    def execute(self, python_virtual_machine: PythonVirtualMachine, calls: list) -> list:
+        """
+        Execute calls to the smart contracts, partitioned by contract address. The deployments of the
+        virtual machine must not change meanwhile.
+
+        Args:
+        - python_virtual_machine: PythonVirtualMachine: Its smart contracts get the new states (with workers, when they are read)
+        - calls: list: (contract address, function signature, args, kwargs, gas limit) tuples, in confirmation order
+
+        Returns:
+        - list: For each call, in the same order, (status, result or error message, gas used), the status is
+          "ok", "error" or "out_of_gas"
+        """
+        # The indexes of the calls to each smart contract, in order
+        partitions = {}
+        for index, call in enumerate(calls):
+            partitions.setdefault(call[0], []).append(index)
+
+        results = [None] * len(calls)
+
+        # The calls to smart contracts that are not deployed fail without executing any code
+        local_addresses = list(partitions)
+        if self._pool is not None:
+            local_addresses = [contract_address for contract_address in partitions
+                               if contract_address not in python_virtual_machine.deployed_smart_contracts]
+            self.execute_in_pool(python_virtual_machine, calls, partitions, results)
+
+        for contract_address in local_addresses:
+            indexes = partitions[contract_address]
+            journal = None
+            if contract_address in python_virtual_machine.deployed_smart_contracts:
+                journal = self._journals.setdefault(contract_address, ContractJournal(interval=self.snapshot_interval))
+            with self.get_contract_lock(contract_address):
+                partition_results = execute_calls(python_virtual_machine, contract_address, [calls[index][1:] for index in indexes], journal)
+            for index, result in zip(indexes, partition_results):
+                results[index] = result
+
+        return results
+
+    def execute_in_pool(self, python_virtual_machine: PythonVirtualMachine, calls: list, partitions: dict, results: list) -> None:
+        """
+        Execute the partitions of calls to deployed smart contracts in the pool.
+
+        Args:
+        - python_virtual_machine: PythonVirtualMachine
+        - calls: list: (contract address, function signature, args, kwargs, gas limit) tuples
+        - partitions: dict: The indexes of the calls to each smart contract
+        - results: list: The results of the calls, filled with the results of the executed partitions
+        """
+        smart_contracts = python_virtual_machine.deployed_smart_contracts
+
+        items = []
+        for contract_address, indexes in partitions.items():
+            if contract_address not in smart_contracts:
+                continue
+
+            # A state replaced in the API process (deployed again, or restored from a checkpoint) is loaded again in the worker
+            journal = self._journals.setdefault(contract_address, ContractJournal(interval=self.snapshot_interval))
+            try:
+                journal.track(smart_contracts[contract_address].state)
+            except Exception as e:
+                self.fail_partition(indexes, results, f"The state of the contract can't be sent to the worker: {e}")
+                continue
+
+            items.append((contract_address, smart_contracts[contract_address].bytecode, journal,
+                          [calls[index][1:] for index in indexes]))
+
+        # The locks are taken in address order, so they don't deadlock with another execution
+        contract_locks = [self.get_contract_lock(contract_address) for contract_address, _, _, _ in sorted(items, key=lambda item: item[0])]
+        for contract_lock in contract_locks:
+            contract_lock.acquire()
+        try:
+            outputs = self._pool.execute(items)
+        finally:
+            for contract_lock in contract_locks:
+                contract_lock.release()
+
+        for (contract_address, _, _, _), output in zip(items, outputs):
+            indexes = partitions[contract_address]
+            if isinstance(output, Exception):
+                print(f"Error al ejecutar el smart contract {contract_address} en el pool de ejecución: {output}")
+                self.fail_partition(indexes, results, str(output))
+                continue
+
+            # The objects of the results are bound to the classes of the compiled contract of the API process,
+            # which is only executed if the results hold them
+            definitions = lambda contract_address=contract_address: python_virtual_machine.get_compiled_contract(contract_address).definitions
+
+            for index, (status, value, gas_used) in zip(indexes, output):
+                if status == "ok":
+                    try:
+                        value = unpickle_contract_state(value, definitions)
+                    except Exception as e:
+                        # The call was applied, only its result is lost
+                        print(f"Error al recibir el resultado del smart contract {contract_address}: {e}")
+                        value = None
+                elif status == "limit":
+                    # The calls stopped by a limit of the worker fail as any other call
+                    status = "error"
+                results[index] = (status, value, gas_used)
+
+    def get_state(self, python_virtual_machine: PythonVirtualMachine, contract_address: str):
+        """
+        Get the current state of a smart contract, which can be read while other calls are executed.
+
+        Without workers, the state is copied. With workers, the state of the API process is updated with the state
+        of the worker, if it executed calls since the last update, and returned: the API process doesn't change it.
+        It must not be modified.
+
+        Args:
+        - python_virtual_machine: PythonVirtualMachine
+        - contract_address: str
+
+        Returns:
+        - dict: The state of the smart contract (None if it is not deployed)
+
+        Raises:
+        - ContractWorkerError: If the state can't be got from the worker
+        - Exception: If the state can't be copied
+        """
+        smart_contract = python_virtual_machine.deployed_smart_contracts.get(contract_address)
+        if smart_contract is None:
+            return None
+
+        with self.get_contract_lock(contract_address):
+            if self._pool is None:
+                return copy.deepcopy(smart_contract.state)
+
+            # The journal doesn't apply to a state replaced in the API process, which is loaded again on the next call
+            journal = self._journals.get(contract_address)
+            if journal is None or not journal.unsynchronized or journal._state is not smart_contract.state:
+                return smart_contract.state
+
+            state = self._pool.synchronize(contract_address, smart_contract.bytecode, journal)
+
+            # The objects of the state are bound to the classes of the compiled contract of the API process
+            definitions = lambda: python_virtual_machine.get_compiled_contract(contract_address).definitions
+            smart_contract.state = unpickle_contract_state(state, definitions)
+            journal.reset(state, smart_contract.state)
+            return smart_contract.state
+
+    def synchronize_states(self, python_virtual_machine: PythonVirtualMachine) -> None:
+        """
+        Update the states of the API process with the states of the workers (e.g. before a checkpoint).
+
+        Args:
+        - python_virtual_machine: PythonVirtualMachine
+
+        Raises:
+        - ContractWorkerError: If a state can't be got from its worker
+        """
+        if self._pool is None:
+            return
+
+        for contract_address, journal in list(self._journals.items()):
+            if journal.unsynchronized:
+                self.get_state(python_virtual_machine, contract_address)
+
+    def get_contract_lock(self, contract_address: str) -> Lock:
+        """
+        Get the lock of a smart contract.
+
+        Args:
+        - contract_address: str
+
+        Returns:
+        - Lock
+        """
+        return self._contract_locks.setdefault(contract_address, Lock())
+
+    def fail_partition(self, indexes: list, results: list, error: str) -> None:
+        """
+        Fail all the calls of a partition, without changing the state of the smart contract.
+
+        Args:
+        - indexes: list: The indexes of the calls of the partition
+        - results: list
+        - error: str
+        """
+        for index in indexes:
+            results[index] = ("error", error, 0)
+
+    class Config:
+        """
+        Pydantic configuration for the ContractExecutionScheduler model.
+
+        Args:
+        - arbitrary_types_allowed: bool
+        """
+        arbitrary_types_allowed = True
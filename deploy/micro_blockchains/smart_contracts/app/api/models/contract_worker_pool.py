@@ -0,0 +1,607 @@
+# models/contract_worker_pool.py
+
+import multiprocessing
+import resource
+import signal
+import zlib
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from pydantic import BaseModel, Field, PrivateAttr
+
+# Import the smart contracts models
+from app.api.models.python_virtual_machine import PythonVirtualMachine
+from app.api.models.smart_contracts import SmartContract
+from app.api.models.contract_journal import ContractJournal
+
+# Import the contract state serialization methods
+from app.api.methods.contract_state import pickle_contract_state, unpickle_contract_state
+
+# Import the smart contracts configuration
+from app.api.config.env import CONTRACT_CACHE_SIZE
+
+# Seconds a new worker has to import the modules and tell the pool it is ready
+WORKER_STARTUP_TIMEOUT = 60
+
+# The virtual machine of a worker process, with its own cache of compiled contracts
+worker_virtual_machine = None
+
+# The journals of the contracts whose states are loaded in the worker process, to roll back the calls that run out of gas
+worker_journals = {}
+
+# The calls after which a new snapshot of the state of a contract is taken in the worker process
+worker_snapshot_interval = 100
+
+class ContractLimitExceeded(BaseException):
+    """
+    Raised in a worker when a request exceeds its CPU time. It is not an Exception, so the contracts
+    don't catch it with `except Exception`.
+    """
+
+class ContractWorkerError(Exception):
+    """
+    Raised in the API process when a worker doesn't answer in time, dies, or can't execute a partition.
+    """
+
+def on_cpu_time_exceeded(signum, frame):
+    raise ContractLimitExceeded("CPU time limit exceeded")
+
+def set_memory_limit(memory_limit: int) -> None:
+    """
+    Limit the address space of the worker to its current size plus the memory available to the contracts.
+    The limit can't be raised again by the contracts.
+
+    Args:
+    - memory_limit: int: MB (0 disables the limit)
+    """
+    if not memory_limit:
+        return
+
+    try:
+        with open("/proc/self/statm", "r") as f:
+            address_space = int(f.read().split()[0]) * resource.getpagesize()
+        limit = address_space + memory_limit * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (OSError, ValueError) as e:
+        print(f"Error al limitar la memoria del worker de smart contracts: {e}")
+
+def handle_request(request: tuple) -> tuple:
+    """
+    Handle a request of the pool. Runs in the worker processes.
+
+    Args:
+    - request: tuple: ("load", contract address, bytecode, pickled state), ("call", contract address, function signature,
+      args, kwargs, gas limit), ("dump", contract address) or ("evict", contract address)
+
+    Returns:
+    - tuple: ("ok", value), ("error", message) or ("limit", message). The value of a call is (pickled result or
+      error message, gas used), and its status can also be "out_of_gas": the call is already rolled back.
+    """
+    operation, contract_address = request[:2]
+    python_virtual_machine = worker_virtual_machine
+    smart_contracts = python_virtual_machine.deployed_smart_contracts
+
+    if operation == "load":
+        bytecode, state = request[2:]
+
+        # The contract keeps its bytecode object while it doesn't change, so its compiled contract is reused
+        smart_contract = smart_contracts.get(contract_address)
+        if smart_contract is None or smart_contract.bytecode != bytecode:
+            smart_contract = SmartContract(bytecode=bytecode)
+            smart_contracts[contract_address] = smart_contract
+
+        # The objects of the state are bound to the classes of the compiled contract
+        compiled_contract = python_virtual_machine.get_compiled_contract(contract_address)
+        smart_contract.state = unpickle_contract_state(state, compiled_contract.definitions)
+        journal = worker_journals.setdefault(contract_address, ContractJournal(interval=worker_snapshot_interval))
+        journal.reset(state, smart_contract.state)
+        return ("ok", None)
+
+    if contract_address not in worker_journals:
+        return ("error", f"The contract {contract_address} is not loaded")
+    journal = worker_journals[contract_address]
+
+    if operation == "call":
+        call = request[2:]
+        try:
+            journal.prepare(smart_contracts[contract_address].state)
+        except Exception as e:
+            return ("error", (f"The state of the contract can't be copied: {e}", 0))
+
+        try:
+            status, result, gas_used = python_virtual_machine.execute_metered_call(contract_address, *call)
+            if status == "out_of_gas":
+                journal.restore(python_virtual_machine, contract_address)
+        except MemoryError:
+            return ("limit", "Memory limit exceeded")
+
+        if status != "out_of_gas":
+            journal.record(call)
+        if status != "ok":
+            return (status, (result, gas_used))
+
+        try:
+            return ("ok", (pickle_contract_state(result), gas_used))
+        except Exception:
+            # The result is only used by the events
+            return ("ok", (pickle_contract_state(repr(result)), gas_used))
+
+    if operation == "dump":
+        return ("ok", pickle_contract_state(smart_contracts[contract_address].state))
+
+    if operation == "evict":
+        del worker_journals[contract_address]
+        del smart_contracts[contract_address]
+        python_virtual_machine._compiled_contracts.pop(contract_address, None)
+        return ("ok", None)
+
+    return ("error", f"Unknown operation {operation}")
+
+def execute_request(request: tuple, call_timeout: float) -> tuple:
+    """
+    Handle a request of the pool within the CPU time limit. Runs in the worker processes.
+
+    Args:
+    - request: tuple
+    - call_timeout: float: Seconds of CPU time
+
+    Returns:
+    - tuple: ("ok", value), ("error", message) or ("limit", message)
+    """
+    try:
+        signal.setitimer(signal.ITIMER_PROF, call_timeout)
+        try:
+            return handle_request(request)
+        finally:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+    except ContractLimitExceeded as e:
+        return ("limit", str(e))
+    except MemoryError:
+        return ("limit", "Memory limit exceeded")
+    except Exception as e:
+        return ("error", str(e))
+
+def run_worker(connection, call_timeout: float, memory_limit: int, snapshot_interval: int) -> None:
+    """
+    Worker loop: answer the requests of the pool, each call within the CPU time limit. Runs in the worker processes.
+
+    The worker keeps the states of the contracts loaded by the pool between partitions. The calls of a partition
+    are sent at once and answered one by one, as they are executed, so the pool doesn't wait for a round trip per
+    call. The calls that run out of gas are rolled back by the worker, which stops at the first call that exceeds
+    a limit, so the pool rolls it back with a new worker.
+
+    Args:
+    - connection: Connection: The worker end of the pipe
+    - call_timeout: float: Seconds of CPU time per request
+    - memory_limit: int: MB available to the contracts
+    - snapshot_interval: int: The calls after which a new snapshot of the state of a contract is taken
+    """
+    global worker_virtual_machine, worker_snapshot_interval
+
+    # The limits are set once the modules are imported, so they only count the contracts
+    set_memory_limit(memory_limit)
+    signal.signal(signal.SIGPROF, on_cpu_time_exceeded)
+
+    worker_virtual_machine = PythonVirtualMachine()
+    worker_snapshot_interval = snapshot_interval
+    connection.send(("ready", None))
+
+    while True:
+        try:
+            request = connection.recv()
+        except (EOFError, OSError):
+            # The pool closed the pipe, or the API process exited
+            return
+
+        if request[0] != "calls":
+            connection.send(execute_request(request, call_timeout))
+            continue
+
+        contract_address, calls = request[1:]
+        for call in calls:
+            reply = execute_request(("call", contract_address, *call), call_timeout)
+            connection.send(reply)
+            if reply[0] == "limit":
+                break
+
+class ContractWorker(BaseModel):
+    """
+    ContractWorker Model: a worker process of the ContractWorkerPool and the API end of its pipe.
+
+    Args:
+    - call_timeout: float: Seconds of CPU time per request.
+    - memory_limit: int: MB available to the contracts.
+    - snapshot_interval: int: The calls after which a new snapshot of the state of a contract is taken.
+    - calls: int: The calls executed by the worker.
+
+    Returns:
+    - ContractWorker: A new instance of the ContractWorker model
+    """
+    call_timeout: float = Field(default=2, description="Seconds of CPU time per request.")
+    memory_limit: int = Field(default=256, description="MB available to the contracts.")
+    snapshot_interval: int = Field(default=100, description="The calls after which a new snapshot of the state of a contract is taken.")
+    calls: int = Field(default=0, description="The calls executed by the worker.")
+
+    # The contracts whose states are loaded in the worker, with the generation of their journals, in LRU order
+    _contracts: OrderedDict = PrivateAttr(default_factory=OrderedDict)
+    _process: multiprocessing.Process = PrivateAttr(default=None)
+    _connection: object = PrivateAttr(default=None)
+    _ready: bool = PrivateAttr(default=False)
+    _broken: bool = PrivateAttr(default=False)
+
+    def start(self) -> None:
+        """
+        Start the worker process.
+
+        Workers are spawned (not forked) because the API process runs several threads.
+        """
+        context = multiprocessing.get_context("spawn")
+        self._connection, worker_connection = context.Pipe()
+        self._process = context.Process(target=run_worker, args=(worker_connection, self.call_timeout, self.memory_limit, self.snapshot_interval))
+        self._process.daemon = True # Ensure that the process finishes when main program is finished
+        self._process.start()
+        worker_connection.close()
+
+    def request(self, *request) -> tuple:
+        """
+        Send a request to the worker and wait for its reply.
+
+        Args:
+        - request: The operation and its arguments
+
+        Returns:
+        - tuple: ("ok", value), ("error", message) or ("limit", message)
+
+        Raises:
+        - ContractWorkerError: If the worker doesn't answer in time or died
+        """
+        self.send(request)
+        return self.receive()
+
+    def execute_calls(self, contract_address: str, calls: list):
+        """
+        Send calls to a contract loaded in the worker and get their replies as they are executed. The worker
+        stops at the first call that exceeds a limit.
+
+        Args:
+        - contract_address: str
+        - calls: list: (function signature, args, kwargs, gas limit) tuples
+
+        Yields:
+        - tuple: ("ok", (pickled result, gas used)), ("error" or "out_of_gas", (message, gas used)) or ("limit", message),
+          for each executed call
+
+        Raises:
+        - ContractWorkerError: If the worker doesn't answer in time or died
+        """
+        self.send(("calls", contract_address, calls))
+        for _ in calls:
+            reply = self.receive()
+            self.calls += 1
+            yield reply
+            if reply[0] == "limit":
+                return
+
+    def send(self, request: tuple) -> None:
+        """
+        Send a request to the worker, once it is ready.
+
+        Raises:
+        - ContractWorkerError: If the worker didn't start or died
+        """
+        try:
+            if not self._ready:
+                # The first request waits for the worker to start
+                if not self._connection.poll(WORKER_STARTUP_TIMEOUT):
+                    raise ContractWorkerError("The contract worker didn't start in time")
+                self._connection.recv()
+                self._ready = True
+
+            self._connection.send(request)
+        except ContractWorkerError:
+            self._broken = True
+            raise
+        except (EOFError, OSError) as e:
+            self._broken = True
+            raise ContractWorkerError(f"The contract worker died: {e}")
+
+    def receive(self) -> tuple:
+        """
+        Wait for the next reply of the worker. A worker that doesn't answer in time (e.g. a contract
+        blocked outside the CPU, or catching the limit) is marked as broken, to be killed.
+
+        Returns:
+        - tuple: ("ok", value), ("error", message) or ("limit", message)
+
+        Raises:
+        - ContractWorkerError: If the worker doesn't answer in time or died
+        """
+        try:
+            # CPU time is measured by the worker, the wall time only stops the workers that ignore it
+            if not self._connection.poll(self.call_timeout * 2 + 1):
+                raise ContractWorkerError("Time limit exceeded")
+            reply = self._connection.recv()
+        except ContractWorkerError:
+            self._broken = True
+            raise
+        except (EOFError, OSError) as e:
+            self._broken = True
+            raise ContractWorkerError(f"The contract worker died: {e}")
+
+        # The interpreter of the worker is not reused after a limit was exceeded
+        if reply[0] == "limit":
+            self._broken = True
+        return reply
+
+    def is_broken(self) -> bool:
+        """
+        Check if the worker must be replaced.
+
+        Returns:
+        - bool
+        """
+        return self._broken or not self._process.is_alive()
+
+    def stop(self) -> None:
+        """
+        Stop the worker process.
+        """
+        self._connection.close()
+        self._process.kill()
+        self._process.join()
+
+    class Config:
+        """
+        Pydantic configuration for the ContractWorker model.
+
+        Args:
+        - arbitrary_types_allowed: bool
+        """
+        arbitrary_types_allowed = True
+
+class ContractWorkerPool(BaseModel):
+    """
+    ContractWorkerPool Model: a pool of warm worker processes that execute the calls to the smart contracts
+    out of the API process, so a slow or runaway contract doesn't stall the node.
+
+    The states of the contracts are resident in the workers: every contract is assigned to a worker by its
+    address, which loads its state once and keeps it (up to max_contracts per worker, the least recently used are
+    evicted), so a partition (calls to a single contract) only sends the calls and gets their results back, over a
+    pipe. The partitions of different workers are executed concurrently, the ones of the same worker in order.
+
+    The API process keeps the journal of every contract (see ContractJournal): the calls applied since a snapshot
+    of its state, which is taken again from the worker every snapshot_interval calls. A worker that doesn't have
+    the state of a contract (it was evicted, or the worker replaced) loads it from the journal. The state of the
+    API process is only updated when it is read (see synchronize).
+
+    Every request has a CPU time limit, and the contracts of a worker have a memory limit. A call that exceeds them
+    fails and its changes are rolled back: the worker is replaced, and the new one loads the states from the journals.
+    A call that runs out of gas is rolled back by the worker itself, with its own journal of the contract. Workers
+    are also replaced after a number of calls, so the memory they leak is released.
+
+    The limits stop slow contracts, they are not a sandbox: the contracts run with the permissions of the service.
+
+    Args:
+    - size: int: The worker processes.
+    - call_timeout: float: Seconds of CPU time per call.
+    - memory_limit: int: MB available to the contracts of a worker (0 disables the limit).
+    - max_calls: int: The calls after which a worker is replaced (0 never replaces them).
+    - snapshot_interval: int: The calls after which a new snapshot of the state of a contract is taken.
+    - max_contracts: int: The states of contracts kept by a worker.
+
+    Returns:
+    - ContractWorkerPool: A new instance of the ContractWorkerPool model
+    """
+    size: int = Field(default=1, description="The worker processes.")
+    call_timeout: float = Field(default=2, description="Seconds of CPU time per call.")
+    memory_limit: int = Field(default=256, description="MB available to the contracts of a worker (0 disables the limit).")
+    max_calls: int = Field(default=10000, description="The calls after which a worker is replaced (0 never replaces them).")
+    snapshot_interval: int = Field(default=100, description="The calls after which a new snapshot of the state of a contract is taken.")
+    max_contracts: int = Field(default=CONTRACT_CACHE_SIZE, description="The states of contracts kept by a worker.")
+
+    # The workers, and the locks that give a partition exclusive use of one, by slot
+    _workers: list = PrivateAttr(default_factory=list)
+    _locks: list = PrivateAttr(default_factory=list)
+    _threads: ThreadPoolExecutor = PrivateAttr(default=None)
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        # The workers are started before they are needed, so they are warm
+        for _ in range(self.size):
+            self._workers.append(self.create_worker())
+            self._locks.append(Lock())
+        self._threads = ThreadPoolExecutor(max_workers=self.size)
+
+    def create_worker(self) -> ContractWorker:
+        """
+        Start a new worker.
+
+        Returns:
+        - ContractWorker
+        """
+        worker = ContractWorker(call_timeout=self.call_timeout, memory_limit=self.memory_limit,
+                                snapshot_interval=self.snapshot_interval)
+        worker.start()
+        return worker
+
+    def get_slot(self, contract_address: str) -> int:
+        """
+        Get the slot of the worker that keeps the state of a contract.
+
+        Args:
+        - contract_address: str
+
+        Returns:
+        - int
+        """
+        return zlib.crc32(contract_address.encode()) % self.size
+
+    def execute(self, partitions: list) -> list:
+        """
+        Execute partitions of calls, concurrently if they are assigned to different workers.
+
+        Args:
+        - partitions: list: (contract address, bytecode, journal, calls) tuples. The journals get the applied calls.
+
+        Returns:
+        - list: For each partition, the results of the calls or the ContractWorkerError that stopped it before any
+          call was applied. The results are (status, pickled result or error message, gas used), the status is "ok",
+          "error", "out_of_gas" or "limit".
+        """
+        # The partitions of each worker, in order
+        slots = {}
+        for index, partition in enumerate(partitions):
+            slots.setdefault(self.get_slot(partition[0]), []).append(index)
+
+        outputs = [None] * len(partitions)
+
+        def execute_slot(indexes: list) -> None:
+            for index in indexes:
+                try:
+                    outputs[index] = self.execute_partition(*partitions[index])
+                except ContractWorkerError as e:
+                    outputs[index] = e
+
+        if len(slots) == 1:
+            execute_slot(next(iter(slots.values())))
+        else:
+            list(self._threads.map(execute_slot, slots.values()))
+        return outputs
+
+    def execute_partition(self, contract_address: str, bytecode: str, journal: ContractJournal, calls: list) -> list:
+        """
+        Execute calls to a smart contract in its worker, in order, recording the applied calls in its journal.
+
+        Args:
+        - contract_address: str
+        - bytecode: str
+        - journal: ContractJournal: The journal of the contract
+        - calls: list: (function signature, args, kwargs, gas limit) tuples
+
+        Returns:
+        - list: The results of the calls
+
+        Raises:
+        - ContractWorkerError: If the state can't be loaded in the worker (no call is applied)
+        """
+        slot = self.get_slot(contract_address)
+        with self._locks[slot]:
+            worker = self.load(slot, contract_address, bytecode, journal)
+
+            results = []
+            while len(results) < len(calls):
+                status = None
+                try:
+                    for status, value in worker.execute_calls(contract_address, calls[len(results):]):
+                        call = calls[len(results)]
+                        if status == "limit":
+                            # The call used all the time it had, it is charged all its gas
+                            results.append((status, value, call[3]))
+                        else:
+                            results.append((status, *value))
+                        if status not in ("limit", "out_of_gas"):
+                            journal.record(call)
+                            journal.unsynchronized = True
+                except ContractWorkerError as e:
+                    # The call that was being executed
+                    status = "limit"
+                    results.append((status, str(e), calls[len(results)][3]))
+
+                if status == "limit" and len(results) < len(calls):
+                    # Roll the call back: a new worker loads the state left by the previous calls
+                    try:
+                        worker = self.load(slot, contract_address, bytecode, journal)
+                    except ContractWorkerError as e:
+                        results += [("error", str(e), 0) for _ in calls[len(results):]]
+
+            # A new snapshot is taken once the journal is long, so a new worker doesn't execute many calls again
+            if len(journal.calls) >= self.snapshot_interval:
+                try:
+                    journal.rebase(self.dump(slot, contract_address, bytecode, journal))
+                except ContractWorkerError as e:
+                    print(f"Error al obtener el estado del smart contract {contract_address} del worker: {e}")
+            return results
+
+    def synchronize(self, contract_address: str, bytecode: str, journal: ContractJournal) -> bytes:
+        """
+        Get the state of a contract from its worker. The caller must not execute calls to the contract
+        until the state is applied.
+
+        Args:
+        - contract_address: str
+        - bytecode: str
+        - journal: ContractJournal: The journal of the contract
+
+        Returns:
+        - bytes: The pickled state of the contract
+
+        Raises:
+        - ContractWorkerError: If the state can't be got from the worker
+        """
+        with self._locks[self.get_slot(contract_address)]:
+            return self.dump(self.get_slot(contract_address), contract_address, bytecode, journal)
+
+    def dump(self, slot: int, contract_address: str, bytecode: str, journal: ContractJournal) -> bytes:
+        """
+        Get the state of a contract from the worker of a slot. The lock of the slot must be held by the caller.
+
+        Raises:
+        - ContractWorkerError: If the state can't be loaded in the worker or sent back
+        """
+        worker = self.load(slot, contract_address, bytecode, journal)
+        status, value = worker.request("dump", contract_address)
+        if status != "ok":
+            raise ContractWorkerError(f"The state of the contract can't be sent back: {value}")
+        return value
+
+    def load(self, slot: int, contract_address: str, bytecode: str, journal: ContractJournal) -> ContractWorker:
+        """
+        Get the worker of a slot with the state of a contract loaded, replacing it if it is broken or it executed
+        too many calls. A worker that doesn't have the state of the journal loads its snapshot and applies its calls.
+        The lock of the slot must be held by the caller.
+
+        Returns:
+        - ContractWorker
+
+        Raises:
+        - ContractWorkerError: If the state can't be loaded or a call can't be applied again
+        """
+        worker = self._workers[slot]
+        if worker.is_broken() or (self.max_calls and worker.calls >= self.max_calls):
+            worker.stop()
+            worker = self._workers[slot] = self.create_worker()
+
+        if worker._contracts.get(contract_address) == journal.generation:
+            worker._contracts.move_to_end(contract_address)
+            return worker
+
+        # The contract is not loaded until its state and its calls are
+        worker._contracts.pop(contract_address, None)
+        status, value = worker.request("load", contract_address, bytecode, journal.snapshot)
+        if status != "ok":
+            raise ContractWorkerError(f"The state of the contract can't be loaded: {value}")
+
+        if journal.calls:
+            for status, value in worker.execute_calls(contract_address, journal.calls):
+                if status in ("limit", "out_of_gas"):
+                    raise ContractWorkerError(f"A call can't be applied again: {value}")
+        worker._contracts[contract_address] = journal.generation
+
+        # The least recently used states are evicted, their journals load them again
+        while len(worker._contracts) > self.max_contracts:
+            evicted_address, _ = worker._contracts.popitem(last=False)
+            status, value = worker.request("evict", evicted_address)
+            if status != "ok":
+                raise ContractWorkerError(f"The state of the contract {evicted_address} can't be evicted: {value}")
+
+        return worker
+
+    class Config:
+        """
+        Pydantic configuration for the ContractWorkerPool model.
+
+        Args:
+        - arbitrary_types_allowed: bool
+        """
+        arbitrary_types_allowed = True
@@ -1,44 +1,138 @@
 # models/dag.py
 
-from copy import deepcopy
-import json
+import heapq
 import os
-import networkx as nx
 
-from threading import Thread
-from datetime import datetime
-from pydantic import BaseModel, Field
+from collections import deque
+from threading import Thread, Lock, RLock, Event
+from datetime import datetime, timedelta, timezone
+from pydantic import BaseModel, Field, PrivateAttr
 
 # Import the Transaction model
 from app.api.models.transaction import Transaction, TransactionCreate, OperationType
 from app.api.models.python_virtual_machine import PythonVirtualMachine
+from app.api.models.contract_scheduler import ContractExecutionScheduler
+from app.api.models.tip_index import TipIndex
+from app.api.models.confirmation_engine import ConfirmationEngine
+from app.api.models.transaction_index import TransactionIndex, encode_cursor, decode_cursor
+from app.api.models.ledger_store import LedgerStore, TransactionRecord
+from app.api.models.account_registry import AccountRegistry
+from app.api.models.transaction_log import TransactionLog
+from app.api.models.state_checkpoint import StateCheckpoint
+from app.api.models.storage_backend import StorageBackend, JSONStorageBackend
+from app.api.models.sqlite_storage_backend import SQLiteStorageBackend
+from app.api.models.transaction_archive import TransactionArchive
+from app.api.models.ingestion_queue import IngestionQueue
+from app.api.models.ledger_view import LedgerView, ViewSmartContract
+from app.api.models.event_broker import EventBroker
+from app.api.models.mqtt_publisher import MQTTPublisher
+from app.api.models.peer_sync import PeerSync
 
 # Import the send_ghost_transaction funcion from methods
 from app.api.methods.ghost_transactions import send_ghost_transaction
-from app.api.methods.wallets import encode, decode
+from app.api.methods.signatures import verify_transactions_signatures
+from app.api.methods.wallets import encode, decode, get_account_id
 
 # Import GENESIS wallet's keys
 from app.api.config.env import GENESIS_PUBLIC_KEY, GENESIS_PRIVATE_KEY
 
+# Import the DAG persistence configuration
+from app.api.config.env import LEDGER_STORAGE_BACKEND, DAG_LOG_FSYNC_BATCH_SIZE, DAG_LOG_COMPACTION_THRESHOLD, STATE_CHECKPOINT_INTERVAL
+
+# Import the confirmation configuration
+from app.api.config.env import CONFIRMATION_THRESHOLD, CONFIRMATION_MODE
+
+# Import the pruning configuration
+from app.api.config.env import PRUNING_DEPTH, PRUNING_MAX_AGE
+
+# Import the asynchronous ingestion configuration
+from app.api.config.env import ASYNC_INGESTION, INGESTION_QUEUE_MAX_SIZE, INGESTION_WRITER_BATCH_SIZE, INGESTION_STATUS_REGISTRY_SIZE
+
+# Import the event stream configuration
+from app.api.config.env import EVENT_HISTORY_SIZE, EVENT_SUBSCRIPTION_QUEUE_SIZE
+
+# Import the MQTT configuration
+from app.api.config.env import MQTT_PUBLISHER, MQTT_BROKER_HOST, MQTT_BROKER_PORT, MQTT_BROKER_USERNAME, MQTT_BROKER_PASSWORD, \
+                               MQTT_TOPIC_PREFIX, MQTT_QOS, MQTT_BUFFER_SIZE, MQTT_BATCH_SIZE
+
+# Import the peer synchronization configuration
+from app.api.config.env import API_NAME, SYNC_PEERS, SYNC_INTERVAL, SYNC_BATCH_SIZE, SYNC_TIMEOUT, SYNC_SEEN_REGISTRY_SIZE
+
+# Import the smart contracts execution configuration
+from app.api.config.env import CONTRACT_EXECUTION_WORKERS, CONTRACT_CALL_TIMEOUT, CONTRACT_WORKER_MEMORY_LIMIT, CONTRACT_WORKER_MAX_CALLS, CONTRACT_SNAPSHOT_INTERVAL
+from app.api.config.env import CONTRACT_GAS_LIMIT, CONTRACT_MAX_GAS_LIMIT
+
+# The account ID of the GENESIS wallet
+GENESIS_ACCOUNT_ID = get_account_id(GENESIS_PUBLIC_KEY) if GENESIS_PUBLIC_KEY else None
+
 class DAGBlockchain(BaseModel):
     """
     DAGBlockchain Model (Directed Acyclic Graph) to represent a blockchain with a DAG structure.
 
     Args:
-    - graph: nx.DiGraph
+    - store: LedgerStore
+    - accounts: AccountRegistry
     - nonce_registry: dict
+    - failed_nonces: dict
     - python_virtual_machine: PythonVirtualMachine
+    - contract_scheduler: ContractExecutionScheduler
+    - gas_usage: dict
+    - tip_index: TipIndex
+    - confirmation_engine: ConfirmationEngine
+    - transaction_index: TransactionIndex
+    - storage: StorageBackend
+    - archive: TransactionArchive
+    - ingestion_queue: IngestionQueue
+    - event_broker: EventBroker
+    - mqtt_publisher: MQTTPublisher
+    - peer_sync: PeerSync
+    - view: LedgerView
+    - last_processed_transaction_id: str
+    - last_processed: datetime
 
     Returns:
     - DAGBlockchain: A new instance of the DAGBlockchain model
     """
-    graph: nx.DiGraph = Field(default_factory=nx.DiGraph, description="The graph representing the DAG.")
-    nonce_registry: dict = Field(default_factory=dict, description="A simple registry of nonces for each sender.")
+    store: LedgerStore = Field(default_factory=LedgerStore, description="The compact store of the transactions and edges of the DAG.")
+    accounts: AccountRegistry = Field(default_factory=AccountRegistry, description="The registry of the account IDs of the public keys.")
+    nonce_registry: dict = Field(default_factory=dict, description="A simple registry of nonces for each sender account ID.")
+    failed_nonces: dict = Field(default_factory=dict, description="The nonce of the last transaction of each sender account ID that failed once confirmed.")
     python_virtual_machine: PythonVirtualMachine = Field(default_factory=PythonVirtualMachine, description="The Python Virtual Machine to execute smart contracts.")
+    contract_scheduler: ContractExecutionScheduler = Field(default=None, description="The scheduler that executes the calls to different smart contracts concurrently, in isolated workers.")
+    gas_usage: dict = Field(default_factory=dict, description="The gas used by the calls to each smart contract since the node started.")
+    tip_index: TipIndex = Field(default_factory=TipIndex, description="The index of under-approved transactions used for parent selection.")
+    confirmation_engine: ConfirmationEngine = Field(default=None, description="The engine that tracks the approvals of the transactions until they are confirmed.")
+    transaction_index: TransactionIndex = Field(default=None, description="The secondary indexes of the transactions for the history queries.")
+    storage: StorageBackend = Field(default=None, description="The persistent storage of the DAG and of the checkpoints of the state derived from it.")
+    archive: TransactionArchive = Field(default=None, description="The archive of the transactions pruned from the DAG (only with pruning enabled).")
+    ingestion_queue: IngestionQueue = Field(default=None, description="The queue of transactions added asynchronously (only with ASYNC_INGESTION).")
+    event_broker: EventBroker = Field(default=None, description="The broker of the events of the transactions pushed to the event stream.")
+    mqtt_publisher: MQTTPublisher = Field(default=None, description="The publisher of the events of the ledger to the MQTT broker (only with MQTT_PUBLISHER).")
+    peer_sync: PeerSync = Field(default=None, description="The synchronization of the DAG with the peers (only with SYNC_PEERS).")
+    view: LedgerView = Field(default_factory=LedgerView, description="The last published read view of the state, for readers.")
+    last_processed_transaction_id: str = Field(default=None, description="The ID of the last transaction applied to the state.")
+    last_processed: datetime = Field(default=None, description="The timestamp of the last transaction applied to the state.")
+    confirmation_sequence: int = Field(default=0, description="The sequence number of the last transaction applied to the state.")
+
+    # Writer lock: every mutation of the store and the registries is made holding it.
+    # Readers use the published view, only the lookups of transactions take it to read the store.
+    _lock: RLock = PrivateAttr(default_factory=RLock)
+    # Processing lock: the confirmed transactions are executed holding it, but not the writer lock,
+    # so the transactions keep being added meanwhile. It is taken before the writer lock.
+    _processing_lock: Lock = PrivateAttr(default_factory=Lock)
+    # Batches of confirmed transactions waiting to be processed, with their confirmed events
+    _confirmed_batches: deque = PrivateAttr(default_factory=deque)
+    # Smart contracts changed since the last published view
+    _touched_contracts: set = PrivateAttr(default_factory=set)
+    # Events of the transactions published once the changes are visible to readers
+    _pending_events: list = PrivateAttr(default_factory=list)
+    # Set when the API shuts down, to stop the background threads
+    _stopped: Event = PrivateAttr(default_factory=Event)
+    _ghost_thread: Thread = PrivateAttr(default=None)
 
     def __init__(self, **data):
         """
-        Constructor for the DAGBlockchain model. It initializes the graph with a genesis transaction.
+        Constructor for the DAGBlockchain model. It initializes the DAG with a genesis transaction.
 
         Args:
         - data: dict
@@ -47,9 +141,43 @@ class DAGBlockchain(BaseModel):
         - None
         """
         super().__init__(**data)
-        # Check if the JSON file exists
-        if os.path.isfile(self.get_json_file_path()):
-            self.load_dag_from_json()
+        self.storage = self.create_storage_backend(LEDGER_STORAGE_BACKEND)
+        self.confirmation_engine = ConfirmationEngine(threshold=CONFIRMATION_THRESHOLD, mode=CONFIRMATION_MODE)
+        self.contract_scheduler = ContractExecutionScheduler(workers=CONTRACT_EXECUTION_WORKERS, call_timeout=CONTRACT_CALL_TIMEOUT,
+                                                             memory_limit=CONTRACT_WORKER_MEMORY_LIMIT, max_calls=CONTRACT_WORKER_MAX_CALLS,
+                                                             snapshot_interval=CONTRACT_SNAPSHOT_INTERVAL)
+        self.event_broker = EventBroker(history_size=EVENT_HISTORY_SIZE, subscription_queue_size=EVENT_SUBSCRIPTION_QUEUE_SIZE)
+
+        # The events are published to the MQTT broker in background, only if paho-mqtt is installed
+        if MQTT_PUBLISHER:
+            mqtt_publisher = MQTTPublisher(host=MQTT_BROKER_HOST, port=MQTT_BROKER_PORT,
+                                           username=MQTT_BROKER_USERNAME, password=MQTT_BROKER_PASSWORD,
+                                           topic_prefix=MQTT_TOPIC_PREFIX, qos=MQTT_QOS,
+                                           buffer_size=MQTT_BUFFER_SIZE, batch_size=MQTT_BATCH_SIZE)
+            if mqtt_publisher.start():
+                self.mqtt_publisher = mqtt_publisher
+                self.event_broker.add_listener(mqtt_publisher.publish_event)
+        self.transaction_index = TransactionIndex(attributes=("sender_id", "contract_address"))
+
+        # The archive is kept open once it exists, even if the pruning is disabled later
+        archive_path = self.get_shared_file_path("archive.sqlite3")
+        if PRUNING_DEPTH or PRUNING_MAX_AGE or os.path.isfile(archive_path):
+            self.archive = TransactionArchive(path=archive_path)
+
+        # A DAG persisted as JSON files before switching to another backend is imported once
+        if LEDGER_STORAGE_BACKEND != "json" and not self.storage.exists():
+            json_storage = self.create_storage_backend("json")
+            if json_storage.exists():
+                print(f"Importando el DAG persistido en JSON al almacenamiento {LEDGER_STORAGE_BACKEND}")
+                self.storage.import_storage(json_storage)
+
+        # Check if the DAG was persisted
+        if self.storage.exists():
+            # Restore the DAG from the snapshot plus the changes written after it
+            snapshot = self.storage.read_snapshot()
+            if snapshot is not None:
+                self.load_snapshot(snapshot)
+            self.load_log(self.storage.read_log())
             self.rebuild_states_from_graph()
         else:
             # Create the genesis transaction
@@ -59,25 +187,79 @@ class DAGBlockchain(BaseModel):
                                               operation_type=OperationType.DEPLOY,
                                               created=datetime.now())
             genesis_transaction.sign_transaction(GENESIS_PRIVATE_KEY)
-            genesis_transaction.nonce = self.nonce_registry.get(genesis_transaction.sender, 0) + 1
+            genesis_transaction.nonce = self.nonce_registry.get(GENESIS_ACCOUNT_ID, 0) + 1
             genesis_transaction.id = genesis_transaction.generate_transaction_id()
 
-            # Add the genesis transaction to the graph
-            self.graph.add_node(node_for_adding=genesis_transaction.id, transaction=genesis_transaction)
+            # Add the genesis transaction to the DAG
+            self.add_node(genesis_transaction)
+
+        # Publish the view of the restored state
+        with self._lock:
+            self._touched_contracts.update(self.python_virtual_machine.deployed_smart_contracts)
+            published_smart_contracts = self.publish_view()
+        self.publish_contract_states(published_smart_contracts)
 
         # Once the DAG is initialized, start to send ghost transactions in background
         self.start_ghost_transactions()
 
+        # Start the writer of the asynchronous ingestion queue
+        if ASYNC_INGESTION:
+            self.ingestion_queue = IngestionQueue(max_size=INGESTION_QUEUE_MAX_SIZE,
+                                                  writer_batch_size=INGESTION_WRITER_BATCH_SIZE,
+                                                  status_registry_size=INGESTION_STATUS_REGISTRY_SIZE)
+            self.ingestion_queue.start(self.add_transactions)
+
+        # Pull the transactions of the peers in background
+        if SYNC_PEERS:
+            self.peer_sync = PeerSync(peers=SYNC_PEERS, api_path=f"/api/v1/{API_NAME}", interval=SYNC_INTERVAL,
+                                      batch_size=SYNC_BATCH_SIZE, timeout=SYNC_TIMEOUT, seen_registry_size=SYNC_SEEN_REGISTRY_SIZE)
+            self.peer_sync.start(self)
+
     def is_acyclic(self):
         """
         Check if the DAG is acyclic.
         """
-        return nx.is_directed_acyclic_graph(self.graph)
+        return self.store.is_acyclic()
+
+    def create_storage_backend(self, backend: str) -> StorageBackend:
+        """
+        Create the storage backend of the DAG, with its files in the shared directory.
+
+        Args:
+        - backend: str: json (snapshot plus transaction log) or sqlite
+
+        Returns:
+        - StorageBackend
+        """
+        if backend == "sqlite":
+            return SQLiteStorageBackend(path=self.get_shared_file_path("dag.sqlite3"),
+                                        fsync_batch_size=DAG_LOG_FSYNC_BATCH_SIZE,
+                                        checkpoint_interval=STATE_CHECKPOINT_INTERVAL)
+        if backend == "json":
+            return JSONStorageBackend(snapshot_path=self.get_json_file_path(),
+                                      compaction_threshold=DAG_LOG_COMPACTION_THRESHOLD,
+                                      transaction_log=TransactionLog(path=self.get_shared_file_path("dag.log"),
+                                                                     fsync_batch_size=DAG_LOG_FSYNC_BATCH_SIZE),
+                                      state_checkpoint=StateCheckpoint(path=self.get_shared_file_path("state_checkpoint.json"),
+                                                                       interval=STATE_CHECKPOINT_INTERVAL))
+        raise ValueError(f"Unknown storage backend: {backend}")
 
     def get_json_file_path(self):
         """
         Get the JSON file path.
         """
+        return self.get_shared_file_path("dag.json")
+
+    def get_shared_file_path(self, file_name: str) -> str:
+        """
+        Get the path of a file in the shared directory.
+
+        Args:
+        - file_name: str
+
+        Returns:
+        - str
+        """
         actual_file_path = os.path.realpath(__file__)
         actual_directory_path = os.path.dirname(actual_file_path)
         
@@ -91,72 +273,475 @@ class DAGBlockchain(BaseModel):
         # Join the components back together
         shared_directory_path = os.sep.join(actual_path_components)
 
-        # Return the path to the JSON file
-        shared_directory_path = os.path.join(shared_directory_path, "dag.json")
+        # Return the path to the file
+        shared_directory_path = os.path.join(shared_directory_path, file_name)
 
         return shared_directory_path
 
-    def save_dag_to_json(self) -> None:
+    def serialize_transaction(self, transaction: TransactionRecord) -> dict:
+        """
+        Serialize a transaction to a JSON compatible dict.
+
+        Args:
+        - transaction: TransactionRecord
+
+        Returns:
+        - dict
+        """
+        node_data = transaction.to_dict(self.store.all_parent_ids(transaction.id))
+        # The public keys are persisted as account IDs
+        node_data['sender'] = transaction.sender_id
+        # Convert datetime to string to serialize
+        node_data['created'] = node_data['created'].isoformat()
+        if node_data['processed']:
+            node_data['processed'] = node_data['processed'].isoformat()
+        return node_data
+
+    def deserialize_transaction(self, node_data: dict) -> TransactionRecord:
+        """
+        Build a transaction from a dict created by serialize_transaction.
+
+        The account IDs are resolved to the public keys (data persisted before the account IDs has the public keys).
+
+        Args:
+        - node_data: dict
+
+        Returns:
+        - TransactionRecord
+        """
+        # Convert the strings to datetime
+        node_data['created'] = datetime.fromisoformat(node_data['created'])
+        if node_data['processed']:
+            node_data['processed'] = datetime.fromisoformat(node_data['processed'])
+
+        record = TransactionRecord.from_dict(node_data)
+        record.sender_id, record.sender = self.accounts.resolve(record.sender)
+        return record
+
+    def persist(self) -> None:
+        """
+        Function to persist the DAG.
+
+        The pending changes are made durable by the storage backend and, once they have grown
+        past the compaction threshold (JSON backend), the DAG is compacted into a new snapshot.
+
+        The processing and writer locks are held, so the checkpoint and the snapshot see a consistent state.
         """
-        Function to save the DAG to a JSON file.
+        with self._processing_lock, self._lock:
+            self.storage.flush()
+
+            # The checkpoint is written once the transactions it covers are persisted
+            if self.storage.is_checkpoint_due():
+                try:
+                    self.storage.save_checkpoint(self.get_state_checkpoint())
+                except Exception as e:
+                    print(f"Error al guardar el checkpoint del estado: {e}")
+                else:
+                    # The transactions covered by the new checkpoint can be archived
+                    try:
+                        self.prune_transactions()
+                    except Exception as e:
+                        print(f"Error al archivar las transacciones: {e}")
+
+            if self.storage.needs_compaction():
+                self.storage.compact(self.get_snapshot)
+
+    def get_snapshot(self) -> dict:
+        """
+        Function to get a snapshot of the DAG (accounts, transactions and edges), JSON compatible.
+
+        Returns:
+        - dict
         """
-        # Create a structure to save nodes and edges
+        # Create a structure to save accounts, nodes and edges
         data = {
+            "accounts": dict(self.accounts.public_keys),
             "nodes": [],
-            "edges": []
+            "edges": [],
+            "pruned_parents": self.store.pruned_parents,
+            "failed_nonces": dict(self.failed_nonces)
         }
 
         # Iterate nodes and save relevant transactions information
-        for node in self.graph.nodes(data=True):
-            node_data = deepcopy(node[1]['transaction'].__dict__)
-            # Convert datetime to string to serialize
-            node_data['created'] = node_data['created'].isoformat()
-            if node_data['processed']:
-                node_data['processed'] = node_data['processed'].isoformat()
-            data["nodes"].append(node_data)
+        for transaction in self.store.records():
+            data["nodes"].append(self.serialize_transaction(transaction))
 
         # Save the edges
-        data["edges"] = list(self.graph.edges())
-        
-        # Write the JSON file
-        with open(self.get_json_file_path(), 'w') as f:
-            #print(f"Saving DAG to {self.get_json_file_path()}")
-            json.dump(data, f, indent=4)
+        data["edges"] = list(self.store.edges())
+
+        return data
 
-    def load_dag_from_json(self) -> None:
+    def load_snapshot(self, data: dict) -> None:
         """
-        Function to load the DAG from a JSON file.
+        Function to load the DAG from a snapshot created by get_snapshot.
+
+        Args:
+        - data: dict
         """
-        # Read the JSON file
-        with open(self.get_json_file_path(), 'r') as f:
-            data = json.load(f)
-        
-        self.graph.clear()
+        self.store.clear()
+        self.store.pruned_parents.update(data.get("pruned_parents", {}))
+        self.failed_nonces = dict(data.get("failed_nonces", {}))
+
+        # Register the accounts (snapshots written before the account IDs have none)
+        self.accounts.clear()
+        self.accounts.load(data.get("accounts", {}))
 
         # Rebuild the nodes (transactions)
         for node_data in data["nodes"]:
-            # Convert the strings to datetime
-            node_data['created'] = datetime.fromisoformat(node_data['created'])
-            if node_data['processed']:
-                node_data['processed'] = datetime.fromisoformat(node_data['processed'])
-            # Add the node to the graph
-            self.graph.add_node(node_data['id'], transaction=Transaction(**node_data))
+            # Add the node to the store
+            self.store.add(self.deserialize_transaction(node_data))
         
         # Add the edges
-        self.graph.add_edges_from(data["edges"])
+        for transaction_id, parent_id in data["edges"]:
+            self.store.add_edge(transaction_id, parent_id)
+
+        # Rebuild the index of under-approved transactions
+        self.tip_index.rebuild(self.store)
+        self.confirmation_engine.rebuild(self.store)
+        self.transaction_index.rebuild(self.store)
+
+    def load_log(self, records: list) -> None:
+        """
+        Function to apply the changes written after the last snapshot to the DAG.
+
+        Args:
+        - records: list
+        """
+        for record in records:
+            if record['op'] == "account":
+                self.accounts.load({record['id']: record['public_key']})
+            elif record['op'] == "node":
+                self.store.add(self.deserialize_transaction(record['transaction']))
+            elif record['op'] == "edge":
+                transaction_id, parent_id = record['edge']
+                if transaction_id in self.store and parent_id in self.store:
+                    self.store.add_edge(transaction_id, parent_id)
+            elif record['op'] == "remove":
+                if record['id'] in self.store:
+                    self.store.remove(record['id'])
+                if 'nonce' in record:
+                    self.register_failed_nonce(record['sender_id'], record['nonce'])
+            elif record['op'] == "prune":
+                for transaction_id in record['ids']:
+                    if transaction_id in self.store:
+                        self.store.prune(transaction_id)
+            elif record['op'] == "processed" and record['id'] in self.store:
+                transaction = self.store.get(record['id'])
+                transaction.processed = datetime.fromisoformat(record['processed'])
+                transaction.nonce = record['nonce']
+                transaction.sequence = record.get('sequence')
+                transaction.contract_address = record['contract_address']
+
+        # Rebuild the index of under-approved transactions
+        self.tip_index.rebuild(self.store)
+        self.confirmation_engine.rebuild(self.store)
+        self.transaction_index.rebuild(self.store)
+
+    def get_state_checkpoint(self) -> dict:
+        """
+        Function to get a checkpoint of the state derived from the DAG (deployed smart contracts and nonce registry),
+        tagged with the last transaction applied to it. The states of the smart contracts are got from the
+        contract workers first.
+
+        Returns:
+        - dict
+
+        Raises:
+        - ContractWorkerError: If the state of a smart contract can't be got from its worker
+        """
+        self.contract_scheduler.synchronize_states(self.python_virtual_machine)
+        return {
+            "last_processed_transaction_id": self.last_processed_transaction_id,
+            "last_processed": self.last_processed.isoformat() if self.last_processed else None,
+            "confirmation_sequence": self.confirmation_sequence,
+            "nonce_registry": self.nonce_registry,
+            "smart_contracts": self.python_virtual_machine.export_contracts(),
+        }
+
+    def restore_state_checkpoint(self, checkpoint: dict) -> None:
+        """
+        Function to restore the state derived from the DAG from a checkpoint created by get_state_checkpoint.
+
+        Args:
+        - checkpoint: dict
+        """
+        # Checkpoints written before the account IDs are keyed by public keys
+        self.nonce_registry = self.accounts.to_account_ids(checkpoint['nonce_registry'])
+        self.python_virtual_machine.import_contracts(checkpoint['smart_contracts'])
+        self.last_processed_transaction_id = checkpoint['last_processed_transaction_id']
+        if checkpoint['last_processed']:
+            self.last_processed = datetime.fromisoformat(checkpoint['last_processed'])
+        self.confirmation_sequence = checkpoint.get('confirmation_sequence', 0)
 
     def rebuild_states_from_graph(self) -> None:
         """
         Function to rebuild the DAG Blockchain state from the JSON file.
+
+        The processed transactions are replayed in the order the node processed them (confirmation sequence).
+        If there is a state checkpoint, only the transactions processed after it are replayed.
         """
-        # Ordenar las transacciones por fecha de creación
-        transactions = sorted(
-            [data['transaction'] for node, data in self.graph.nodes(data=True)],
-            key=lambda tx: tx.created
-        )
+        checkpoint = None
+        try:
+            checkpoint = self.storage.load_checkpoint()
+            if checkpoint is not None:
+                self.restore_state_checkpoint(checkpoint)
+        except Exception as e:
+            print(f"Error al cargar el checkpoint del estado, se reprocesan todas las transacciones: {e}")
+            checkpoint = None
+
+            # Discard any partially restored state
+            self.nonce_registry = {}
+            self.python_virtual_machine.deployed_smart_contracts = {}
+            self.last_processed_transaction_id = None
+            self.last_processed = None
+            self.confirmation_sequence = 0
+
+        # Replay the transactions processed after the checkpoint (all of them without checkpoint)
+        transactions = self.get_archived_transactions(self.confirmation_sequence)
+        transactions += self.get_replay_transactions(self.confirmation_sequence, self.last_processed)
+
+        valid_transactions = self.filter_valid_signatures(transactions)
+        self.process_transactions(valid_transactions)
 
+        # The nonce registry gets the nonces the transactions were processed with, and the ones of
+        # the transactions that failed, which are not replayed
+        for transaction in valid_transactions:
+            self.nonce_registry[transaction.sender_id] = max(self.nonce_registry.get(transaction.sender_id, 0), transaction.nonce)
+        for sender_id, nonce in self.failed_nonces.items():
+            self.nonce_registry[sender_id] = max(self.nonce_registry.get(sender_id, 0), nonce)
+
+        # New transactions are numbered after the replayed ones
         for transaction in transactions:
-            self.process_transaction(transaction)
+            if transaction.sequence is not None:
+                self.confirmation_sequence = max(self.confirmation_sequence, transaction.sequence)
+
+    def get_archived_transactions(self, after_sequence: int) -> list:
+        """
+        Function to get the archived transactions to replay, in confirmation sequence order.
+
+        The archived transactions are covered by the state checkpoint, so they are only replayed without it.
+
+        Args:
+        - after_sequence: int: Only the transactions with a greater sequence number are returned
+
+        Returns:
+        - list
+        """
+        if self.archive is None:
+            return []
+
+        # A transaction is still in the DAG if the node stopped before logging that it was pruned
+        return [self.deserialize_transaction(node_data) for node_data in self.archive.read(after_sequence)
+                if node_data['id'] not in self.store]
+
+    def get_replay_transactions(self, after_sequence: int, after_processed: datetime = None) -> list:
+        """
+        Function to get the processed transactions to replay, in the order the node processed them.
+
+        The transactions are placed by confirmation sequence number in a single pass over the DAG, without sorting.
+        Transactions processed before the sequence numbers were introduced have none: they go first, sorted by
+        their processing timestamp (set by the node, unlike the creation timestamp).
+
+        Args:
+        - after_sequence: int: Only the transactions with a greater sequence number are returned
+        - after_processed: datetime: Only the transactions without sequence number processed after it are returned (all if None)
+
+        Returns:
+        - list
+        """
+        legacy_transactions = []
+        sequenced_transactions = {}
+
+        for transaction in self.store.records():
+            if transaction.processed is None:
+                continue
+
+            if transaction.sequence is not None:
+                if transaction.sequence > after_sequence:
+                    sequenced_transactions[transaction.sequence] = transaction
+            elif after_processed is None or transaction.processed > after_processed:
+                legacy_transactions.append(transaction)
+
+        legacy_transactions.sort(key=lambda tx: tx.processed)
+
+        last_sequence = max(sequenced_transactions, default=after_sequence)
+        return legacy_transactions + [sequenced_transactions[sequence]
+                                      for sequence in range(after_sequence + 1, last_sequence + 1)
+                                      if sequence in sequenced_transactions]
+
+    def prune_transactions(self) -> int:
+        """
+        Function to move the processed transactions deep below the tips from the DAG to the archive.
+
+        A transaction is pruned once it was processed PRUNING_DEPTH confirmations ago or more than PRUNING_MAX_AGE
+        seconds ago, and it is no longer a tip. Transactions are only pruned after all their parents (in insertion
+        order), so the approvals of the transactions kept in the DAG do not change. Must be called right after a
+        state checkpoint is saved, so the archived transactions are covered by it. The writer lock must be held.
+
+        Returns:
+        - int: The number of pruned transactions
+        """
+        if self.archive is None or not (PRUNING_DEPTH or PRUNING_MAX_AGE):
+            return 0
+
+        sequence_limit = self.confirmation_sequence - PRUNING_DEPTH if PRUNING_DEPTH else None
+        processed_limit = datetime.utcnow() - timedelta(seconds=PRUNING_MAX_AGE) if PRUNING_MAX_AGE else None
+
+        pruned_ids = set()
+        pruned_transactions = []
+        for transaction in self.store.records():
+            # Transactions processed before the sequence numbers are kept
+            if transaction.sequence is None or transaction.id in self.tip_index.under_approved:
+                continue
+
+            is_deep = sequence_limit is not None and transaction.sequence <= sequence_limit
+            is_old = processed_limit is not None and transaction.processed <= processed_limit
+            if not (is_deep or is_old):
+                continue
+
+            if all(parent_id in pruned_ids for parent_id in self.store.parent_ids(transaction.id)):
+                pruned_ids.add(transaction.id)
+                pruned_transactions.append(self.serialize_transaction(transaction))
+
+        if not pruned_transactions:
+            return 0
+
+        # The transactions are archived before they leave the DAG
+        self.archive.add(pruned_transactions)
+
+        for node_data in pruned_transactions:
+            # The pruned transactions are found by the history queries in the archive
+            self.transaction_index.discard(self.store.get(node_data['id']))
+            self.store.prune(node_data['id'])
+            self.tip_index.forget(node_data['id'])
+        self.storage.append({"op": "prune", "ids": [node_data['id'] for node_data in pruned_transactions]})
+
+        return len(pruned_transactions)
+
+    def get_transaction(self, transaction_id: str) -> Transaction:
+        """
+        Function to get a transaction of the DAG, looking it up in the archive if it was pruned.
+
+        Args:
+        - transaction_id: str
+
+        Returns:
+        - Transaction: The transaction, or None if it is not in the DAG nor in the archive
+        """
+        # The store is read under the writer lock, so the transaction and its parents can't be removed or pruned
+        # while they are read. The pruned transactions are archived before they leave the store.
+        with self._lock:
+            if transaction_id in self.store:
+                return self.store.get_transaction(transaction_id)
+
+        node_data = self.archive.get(transaction_id) if self.archive is not None else None
+        if node_data is None:
+            return None
+        return Transaction(**self.deserialize_transaction(node_data).to_dict(node_data['parents']))
+
+    def has_transaction(self, transaction_id: str) -> bool:
+        """
+        Function to check if a transaction is in the DAG or in the archive.
+
+        Args:
+        - transaction_id: str
+
+        Returns:
+        - bool
+        """
+        # The store is checked first: a transaction pruned in between is already in the archive
+        return transaction_id in self.store or (self.archive is not None and transaction_id in self.archive)
+
+    def get_transactions_by_sender(self, public_key: str, cursor: str = None, limit: int = 100) -> tuple:
+        """
+        Function to get a page of the transactions sent by an account, in creation order.
+
+        Args:
+        - public_key: str
+        - cursor: str: The cursor returned with the previous page (None for the first page)
+        - limit: int
+
+        Returns:
+        - tuple: (list[Transaction], the cursor of the next page or None)
+
+        Raises:
+        - ValueError: If the cursor is not valid
+        """
+        return self.get_transaction_history("sender_id", "sender", get_account_id(public_key), cursor, limit)
+
+    def get_transactions_by_contract(self, contract_address: str, cursor: str = None, limit: int = 100) -> tuple:
+        """
+        Function to get a page of the transactions of a smart contract (its deployment and the calls), in creation order.
+
+        Args:
+        - contract_address: str
+        - cursor: str: The cursor returned with the previous page (None for the first page)
+        - limit: int
+
+        Returns:
+        - tuple: (list[Transaction], the cursor of the next page or None)
+
+        Raises:
+        - ValueError: If the cursor is not valid
+        """
+        return self.get_transaction_history("contract_address", "contract_address", contract_address, cursor, limit)
+
+    def get_transaction_history(self, attribute: str, archive_column: str, value: str, cursor: str = None, limit: int = 100) -> tuple:
+        """
+        Function to get a page of the transactions with a value in an indexed attribute, in (created, ID) order.
+
+        The transactions of the DAG are found in the transaction index and the pruned ones in the archive,
+        so a page costs O(log n + limit) instead of a scan of the DAG.
+
+        Args:
+        - attribute: str: The attribute of the transaction index
+        - archive_column: str: The indexed column of the archive with the same value
+        - value: str
+        - cursor: str: The cursor returned with the previous page (None for the first page)
+        - limit: int
+
+        Returns:
+        - tuple: (list[Transaction], the cursor of the next page or None)
+
+        Raises:
+        - ValueError: If the cursor is not valid
+        """
+        after = decode_cursor(cursor) if cursor else None
+
+        transactions = {}
+        # The page of the index and its transactions are read at once under the writer lock; the transactions
+        # pruned before or after are found in the archive, where they are added before they leave the store
+        with self._lock:
+            for created, transaction_id in self.transaction_index.page(attribute, value, after, limit):
+                if transaction_id in self.store:
+                    transactions[(created, transaction_id)] = self.store.get_transaction(transaction_id)
+
+        if self.archive is not None:
+            for node_data in self.archive.read_by(archive_column, value, after, limit):
+                record = self.deserialize_transaction(node_data)
+                transactions.setdefault((record.created, record.id), Transaction(**record.to_dict(node_data['parents'])))
+
+        keys = sorted(transactions)[:limit]
+        next_cursor = encode_cursor(*keys[-1]) if len(keys) == limit else None
+        return [transactions[key] for key in keys], next_cursor
+
+    def filter_valid_signatures(self, transactions: list) -> list:
+        """
+        Function to verify the signatures of a list of transactions in parallel, keeping the valid ones.
+
+        Args:
+        - transactions: list
+
+        Returns:
+        - list: The transactions with a valid signature, in the same order
+        """
+        valid_transactions = []
+        for transaction, is_valid in zip(transactions, verify_transactions_signatures(transactions)):
+            if is_valid:
+                valid_transactions.append(transaction)
+            else:
+                print(f"Firma inválida para la transacción {transaction.id}")
+        return valid_transactions
 
     def start_ghost_transactions(self):
         """
@@ -164,9 +749,53 @@ class DAGBlockchain(BaseModel):
         This function is used to mantains the network activity and validate all the transactions.
         """
         # Start the send_ghost_transaction function in a new thread
-        ghost_thread = Thread(target=send_ghost_transaction, args=(self,))
-        ghost_thread.daemon = True # Ensure that the thread finishes when main program is finished
-        ghost_thread.start()
+        self._ghost_thread = Thread(target=send_ghost_transaction, args=(self,))
+        self._ghost_thread.daemon = True # Ensure that the thread finishes when main program is finished
+        self._ghost_thread.start()
+
+    def is_stopped(self) -> bool:
+        """
+        Function to check if the DAG was stopped (the API shut down).
+
+        Returns:
+        - bool
+        """
+        return self._stopped.is_set()
+
+    def wait_until_stopped(self, timeout: float) -> bool:
+        """
+        Function to wait until the DAG is stopped or the timeout expires, for the background threads.
+
+        Args:
+        - timeout: float: Seconds
+
+        Returns:
+        - bool: True if the DAG was stopped
+        """
+        return self._stopped.wait(timeout)
+
+    def shutdown(self) -> None:
+        """
+        Function to stop the DAG when the API shuts down.
+
+        The threads that add transactions in background (the writer of the ingestion queue, the peer
+        synchronization and the ghost transactions) are stopped first, so nothing is added once the DAG
+        is persisted. Then the changes still buffered by the storage backend are persisted: the accepted
+        transactions are not lost on a restart.
+        """
+        self._stopped.set()
+
+        if self.ingestion_queue is not None:
+            self.ingestion_queue.stop()
+        if self.peer_sync is not None:
+            self.peer_sync.stop()
+        if self._ghost_thread is not None:
+            self._ghost_thread.join()
+
+        self.persist()
+
+        if self.mqtt_publisher is not None:
+            self.mqtt_publisher.stop()
 
     def add_transaction(self, transaction: TransactionCreate, parent_ids: list = None) -> bool:
         """
@@ -179,57 +808,473 @@ class DAGBlockchain(BaseModel):
         Returns:
         - bool: True if the transaction was added successfully, False otherwise
         """
-        # Create a new Transaction instance from the TransactionCreate model
-        transaction = Transaction(**transaction.dict())
+        with self._lock:
+            added = self._attach_transaction(transaction, parent_ids)
+            self.queue_confirmed_transactions()
+            self.publish_events()
 
-        # Update the nonce for the sender on the transaction
-        transaction.nonce = self.nonce_registry.get(transaction.sender, 0) + 1
+        self.process_confirmed_transactions()
+        return added
+
+    def _attach_transaction(self, transaction: TransactionCreate, parent_ids: list = None) -> bool:
+        """
+        Attach a new transaction to the DAG and count its approvals. The transactions they confirm are
+        queued by queue_confirmed_transactions. The writer lock must be held by the caller.
+
+        Args:
+        - transaction: Transaction
+        - parent_ids: list
+
+        Returns:
+        - bool: True if the transaction was added successfully, False otherwise
+        """
+        # Create the compact record of the transaction from the TransactionCreate model
+        transaction = self.create_record(transaction)
+
+        # A transaction with the same content and timestamp would replace the one already added
+        if self.has_transaction(transaction.generate_transaction_id()):
+            transaction.id = transaction.generate_transaction_id()
+            print(f"La transacción {transaction.id} ya existe")
+            self.emit_event("rejected", transaction)
+            return False
+
+        # Update the nonce for the sender on the transaction (provisional: the nonce is assigned when it is confirmed)
+        transaction.nonce = self.nonce_registry.get(transaction.sender_id, 0) + 1
         
         # If the transaction is not valid, return False
         if not self.is_transaction_valid(transaction):
+            transaction.id = transaction.generate_transaction_id()
+            self.emit_event("rejected", transaction)
             return False
         
         if parent_ids is None:
             parent_ids = self.determine_parents_for_transaction(transaction)
         
-        transaction.parents = parent_ids
         transaction.id = transaction.generate_transaction_id()
         
-        # Add the transaction to the graph
-        self.graph.add_node(node_for_adding=transaction.id, transaction=transaction)
+        # Add the transaction to the DAG
+        self.add_node(transaction)
 
         # Create edges between the transaction and its parents
+        approved_parent_ids = []
         for parent_id in parent_ids:
-            parent_transaction = self.graph.nodes[parent_id]['transaction']
+            parent_transaction = self.store.get(parent_id)
 
-            # Update the nonce for the sender on the parent_transaction
-            parent_transaction.nonce = self.nonce_registry.get(parent_transaction.sender, 0) + 1
-
-            parent_is_valid_transaction = self.is_transaction_valid(parent_transaction)
+            # The nonce of the parent is not checked: it is assigned when the parent is confirmed,
+            # and it is kept once the parent is processed, so the state is rebuilt with it
+            parent_is_valid_transaction = parent_transaction.is_signature_valid()
 
             if parent_is_valid_transaction:
-                self.graph.add_edge(transaction.id, parent_id)
+                if not self.store.has_edge(transaction.id, parent_id):
+                    approved_parent_ids.append(parent_id)
+                self.add_edge(transaction.id, parent_id)
+            else:
+                print(f"Transacción padre {parent_id} no es válida")
+
+                # Remove the parent transaction from the DAG if it has no children
+                if self.store.out_degree(parent_id) == 0:
+                    self.remove_transaction(parent_id)
+
+        self.emit_event("accepted", transaction, parent_ids=approved_parent_ids)
+
+        # Count the new approvals, the transactions they confirm are queued by the caller
+        self.confirmation_engine.approve(self.store, approved_parent_ids)
+
+        return True
+
+    def queue_confirmed_transactions(self) -> None:
+        """
+        Queue the transactions confirmed by the confirmation engine to be processed, in causal order.
+
+        The nonces don't depend on the execution, so they are assigned when the transactions are queued,
+        in confirmation order. The writer lock must be held by the caller.
+        """
+        transactions = {}
+        while True:
+            transaction_id = self.confirmation_engine.pop_confirmed(self.store)
+            if transaction_id is None:
+                break
+
+            transaction = self.store.get(transaction_id)
+            if transaction.processed is None:
+                transactions.setdefault(transaction_id, transaction)
 
-                # If the parent transaction has been validated exactly 4 times, process it
-                if self.graph.in_degree(parent_id) >= 4 and parent_transaction.processed is None:
-                    transaction_processed = self.process_transaction(parent_transaction)
+        if not transactions:
+            return
+        transactions = list(transactions.values())
 
-                    # If the transaction can't be processed, remove it from DAG
-                    if not transaction_processed:
-                        self.graph.remove_node(parent_id)
+        confirmed_events = []
+        for transaction in transactions:
+            # Update the nonce for the sender on the transaction
+            transaction.nonce = self.nonce_registry.get(transaction.sender_id, 0) + 1
+            confirmed_events.append({**self.get_event(transaction), "latency": self.get_confirmation_latency(transaction)})
+
+            # Update the nonce registry for the sender
+            self.nonce_registry[transaction.sender_id] = self.nonce_registry.get(transaction.sender_id, 0) + 1
+
+        self._confirmed_batches.append((transactions, confirmed_events))
+
+    def process_confirmed_transactions(self) -> None:
+        """
+        Process the queued batches of confirmed transactions, in order.
+
+        The transactions of a batch are processed at once, so the calls to different smart contracts are executed
+        concurrently by the contract scheduler. They are executed without the writer lock, so the transactions keep
+        being added meanwhile, and the results are committed (and numbered) in confirmation order, holding it.
+
+        A single thread processes the batches: if another one is processing them, it also processes the batches
+        queued by the caller. The writer lock must not be held by the caller.
+        """
+        while self._confirmed_batches:
+            if not self._processing_lock.acquire(blocking=False):
+                return
+
+            try:
+                while True:
+                    with self._lock:
+                        if not self._confirmed_batches:
+                            break
+                        transactions, confirmed_events = self._confirmed_batches.popleft()
+
+                    execution_results = self.execute_transactions(transactions)
+
+                    with self._lock:
+                        self.commit_confirmed_transactions(transactions, confirmed_events, execution_results)
+
+                        # Readers see the whole batch at once
+                        published_smart_contracts = self.publish_view()
+                        self.publish_events()
+
+                    self.publish_contract_states(published_smart_contracts)
+            finally:
+                self._processing_lock.release()
+
+    def commit_confirmed_transactions(self, transactions: list, confirmed_events: list, execution_results: list) -> None:
+        """
+        Commit the results of a batch of confirmed transactions, in confirmation order. The writer lock
+        must be held by the caller.
+
+        Args:
+        - transactions: list[TransactionRecord]
+        - confirmed_events: list: The confirmed event of each transaction
+        - execution_results: list: The execution result of each transaction, from execute_transactions
+        """
+        results = self.mark_processed_transactions(transactions, execution_results)
 
-                    # Update the nonce registry for the sender
-                    self.nonce_registry[parent_transaction.sender] = self.nonce_registry.get(parent_transaction.sender, 0) + 1
+        for transaction, confirmed_event, (transaction_processed, execution_result) in zip(transactions, confirmed_events, results):
+            self._pending_events.append(("confirmed", confirmed_event))
+            self.record_gas_usage(transaction, execution_result)
+
+            # If the transaction can't be processed, remove it from DAG
+            if not transaction_processed:
+                self.emit_event("failed", transaction, **execution_result)
+                self.remove_transaction(transaction.id, failed=True)
             else:
-                print(f"Transacción padre {parent_id} no es válida")
+                # Number the transaction, the state is rebuilt replaying the transactions in this order
+                self.confirmation_sequence += 1
+                transaction.sequence = self.confirmation_sequence
+
+                self.storage.append(self.get_processed_record(transaction))
+                self.storage.register_processed()
+
+                # Deployments get their contract address when they are processed
+                self.transaction_index.add(transaction)
+
+                self.emit_event("processed", transaction, sequence=transaction.sequence,
+                                latency=self.get_confirmation_latency(transaction), **execution_result)
+
+    def add_transactions(self, transactions: list) -> list:
+        """
+        Add a list of new transactions to the blockchain (bulk submit).
+
+        The signatures of all the transactions are verified in parallel first, so adding each
+        transaction only needs cached verifications. The transactions are then attached to the DAG
+        under a single lock acquisition, in submission order. A transaction with the ID of one already
+        added (e.g. a repeated item of the batch) is rejected. As for a single transaction, the nonces
+        are assigned when the transactions are confirmed, in confirmation order. The transactions confirmed by the
+        batch are processed at once, so the calls to different smart contracts run concurrently.
+
+        Args:
+        - transactions: list[TransactionCreate]
+
+        Returns:
+        - list[tuple[str, bool]]: For each transaction, its ID and True if it was added successfully, False otherwise
+        """
+        candidates = [Transaction(**transaction.dict()) for transaction in transactions]
+        signatures_valid = verify_transactions_signatures(candidates)
+
+        results = []
+        with self._lock:
+            for transaction, candidate, signature_valid in zip(transactions, candidates, signatures_valid):
+                transaction_id = candidate.generate_transaction_id()
+
+                if not signature_valid:
+                    print(f"Firma inválida para la transacción {transaction_id}")
+                    results.append((transaction_id, False))
+                    continue
+
+                results.append((transaction_id, self._attach_transaction(transaction)))
+
+            # The transactions confirmed by the batch are processed at once
+            self.queue_confirmed_transactions()
+            self.publish_events()
+
+        self.process_confirmed_transactions()
+        return results
+
+    def get_tips(self) -> list:
+        """
+        Function to get the tips of the DAG (the transactions without approvals), for the peer synchronization.
+
+        Returns:
+        - list: The IDs of the tips, oldest first
+        """
+        # The under-approved transactions are copied at once, so the writer can keep adding transactions
+        in_degrees = self.tip_index.in_degrees
+        return [transaction_id for transaction_id in list(self.tip_index.under_approved) if in_degrees.get(transaction_id) == 0]
+
+    def import_transactions(self, transactions: list) -> list:
+        """
+        Import the transactions received from a peer, with their IDs and parents (peer synchronization).
+
+        The IDs are checked against the content of the transactions and the signatures are verified in
+        parallel first. The transactions are then attached to the DAG under a single lock acquisition,
+        parents first, approving their original parents. They are confirmed and processed by this node as
+        the transactions added to it: the nonces and the confirmation sequence are local to every node.
+
+        Args:
+        - transactions: list[Transaction]
+
+        Returns:
+        - list[tuple[str, bool]]: For each transaction, its ID and True if it was imported, False otherwise
+        """
+        signatures_valid = verify_transactions_signatures(transactions)
+
+        results = []
+        candidates = []
+        for transaction, signature_valid in zip(transactions, signatures_valid):
+            if transaction.id != transaction.generate_transaction_id():
+                print(f"El ID de la transacción {transaction.id} no corresponde a su contenido")
+                results.append((transaction.id, False))
+            elif not signature_valid:
+                print(f"Firma inválida para la transacción {transaction.id}")
+                results.append((transaction.id, False))
+            else:
+                candidates.append(transaction)
+
+        ordered_transactions, unordered_transactions = self.sort_by_parents(candidates)
+        for transaction in unordered_transactions:
+            print(f"La transacción {transaction.id} forma un ciclo con sus padres")
+            results.append((transaction.id, False))
+
+        with self._lock:
+            for transaction in ordered_transactions:
+                results.append((transaction.id, self._import_transaction(transaction)))
+
+            # The transactions confirmed by the import are processed at once
+            self.queue_confirmed_transactions()
+            self.publish_events()
+
+        self.process_confirmed_transactions()
+        return results
+
+    def sort_by_parents(self, transactions: list) -> tuple:
+        """
+        Sort transactions so every transaction comes after its parents in the list (topological order),
+        the oldest first among the ones that are ready.
+
+        Args:
+        - transactions: list[Transaction]
+
+        Returns:
+        - tuple: (the sorted transactions, the transactions in a cycle, which can't be sorted)
+        """
+        transactions_by_id = {transaction.id: transaction for transaction in transactions}
+        pending_parents = {}
+        children = {}
+        for transaction in transactions:
+            parent_ids = {parent_id for parent_id in transaction.parents if parent_id in transactions_by_id}
+            pending_parents[transaction.id] = len(parent_ids)
+            for parent_id in parent_ids:
+                children.setdefault(parent_id, []).append(transaction.id)
+
+        ready = [(transaction.created, transaction.id) for transaction in transactions if not pending_parents[transaction.id]]
+        heapq.heapify(ready)
+
+        sorted_transactions = []
+        while ready:
+            _, transaction_id = heapq.heappop(ready)
+            sorted_transactions.append(transactions_by_id.pop(transaction_id))
+
+            for child_id in children.get(transaction_id, []):
+                pending_parents[child_id] -= 1
+                if not pending_parents[child_id]:
+                    heapq.heappush(ready, (transactions_by_id[child_id].created, child_id))
+
+        return sorted_transactions, list(transactions_by_id.values())
+
+    def _import_transaction(self, transaction: Transaction) -> bool:
+        """
+        Attach a transaction received from a peer to the DAG, approving its parents. The transactions
+        confirmed by its approvals are queued by queue_confirmed_transactions. The writer lock must
+        be held by the caller.
+
+        Args:
+        - transaction: Transaction: With its ID and parents
+
+        Returns:
+        - bool: True if the transaction was imported, False if it is already in the DAG or it is not valid
+        """
+        # A transaction received from several peers is imported once
+        if self.has_transaction(transaction.id):
+            return False
+
+        record = self.create_record(transaction)
+
+        # The transaction is processed by this node once it is confirmed here
+        record.processed = None
+        record.sequence = None
+        if record.operation_type == OperationType.DEPLOY:
+            record.contract_address = None
+
+        # Update the nonce for the sender on the transaction
+        record.nonce = self.nonce_registry.get(record.sender_id, 0) + 1
+
+        if not self.is_transaction_valid(record):
+            self.emit_event("rejected", record)
+            return False
+
+        # Add the transaction to the DAG
+        self.add_node(record)
+
+        # Create edges between the transaction and its parents. The parents this node doesn't have
+        # (they failed here, or the peer couldn't send them) are not approved.
+        approved_parent_ids = []
+        for parent_id in transaction.parents:
+            if parent_id == record.id or parent_id not in self.store:
+                continue
+
+            if not self.store.has_edge(record.id, parent_id):
+                approved_parent_ids.append(parent_id)
+            self.add_edge(record.id, parent_id)
 
-                # Remove the parent transaction from the graph if it has no children
-                if self.graph.out_degree(parent_id) == 0:
-                    self.graph.remove_node(parent_id)
+        self.emit_event("accepted", record, parent_ids=approved_parent_ids)
+
+        # Count the new approvals, the transactions they confirm are queued by the caller
+        self.confirmation_engine.approve(self.store, approved_parent_ids)
 
         return True
 
-    def is_transaction_valid(self, transaction: Transaction) -> bool:
+    def publish_view(self) -> dict:
+        """
+        Publish a new read view with the smart contracts changed since the last one. Their states are not copied:
+        they are got from the contract scheduler on their first read (see ViewSmartContract). The writer lock must
+        be held by the caller.
+
+        Returns:
+        - dict: The smart contracts of the new view that changed, by address
+        """
+        if not self._touched_contracts:
+            return {}
+
+        updated_smart_contracts = {}
+        for contract_address in self._touched_contracts:
+            smart_contract = self.python_virtual_machine.deployed_smart_contracts.get(contract_address)
+            if smart_contract is None:
+                continue
+
+            load_state = lambda contract_address=contract_address: self.contract_scheduler.get_state(self.python_virtual_machine, contract_address)
+            updated_smart_contracts[contract_address] = ViewSmartContract(bytecode=smart_contract.bytecode, load_state=load_state)
+        self._touched_contracts.clear()
+
+        self.view = self.view.with_smart_contracts(updated_smart_contracts, self.last_processed_transaction_id)
+        return updated_smart_contracts
+
+    def publish_contract_states(self, smart_contracts: dict) -> None:
+        """
+        Publish the new states of smart contracts to their (retained) state topics of the MQTT broker, if it
+        is enabled. The processing lock must be held by the caller, but not the writer lock: the states are copied.
+
+        Args:
+        - smart_contracts: dict: The smart contracts published by publish_view, by address
+        """
+        if self.mqtt_publisher is None:
+            return
+
+        view = self.view
+        for contract_address, smart_contract in smart_contracts.items():
+            try:
+                state = smart_contract.get().state
+            except Exception as e:
+                print(f"Error al copiar el estado del smart contract {contract_address}: {e}")
+                continue
+
+            self.mqtt_publisher.publish(f"contracts/{contract_address}/state", {
+                "contract_address": contract_address,
+                "version": view.contract_versions.get(contract_address),
+                "last_processed_transaction_id": view.last_processed_transaction_id,
+                "state": state,
+            }, retain=True)
+
+    def emit_event(self, event_type: str, transaction: TransactionRecord, **data) -> None:
+        """
+        Queue an event of a transaction. The events are published to the event stream by publish_events,
+        once the changes are visible in the published view. The writer lock must be held by the caller.
+
+        Args:
+        - event_type: str: accepted, rejected, confirmed, processed or failed
+        - transaction: TransactionRecord
+        - data: The details of the event (e.g. the result of a smart contract function)
+        """
+        self._pending_events.append((event_type, {**self.get_event(transaction), **data}))
+
+    def publish_events(self) -> None:
+        """
+        Publish the queued events to the event stream. The writer lock must be held by the caller, so the
+        events are published in the order they happened.
+        """
+        for event_type, event in self._pending_events:
+            self.event_broker.publish(event_type, event)
+        self._pending_events.clear()
+
+    def get_event(self, transaction: TransactionRecord) -> dict:
+        """
+        Get the attributes of the events of a transaction, used by the filters of the event stream.
+
+        Args:
+        - transaction: TransactionRecord
+
+        Returns:
+        - dict
+        """
+        return {
+            "transaction_id": transaction.id,
+            "sender_id": transaction.sender_id,
+            "contract_address": transaction.contract_address,
+            "operation_type": transaction.operation_type,
+            "nonce": transaction.nonce,
+            "created": transaction.created.isoformat() if transaction.created else None,
+        }
+
+    def get_confirmation_latency(self, transaction: TransactionRecord) -> float:
+        """
+        Get the seconds elapsed since a transaction was created (naive timestamps are in UTC).
+
+        Args:
+        - transaction: TransactionRecord
+
+        Returns:
+        - float: The seconds, or None if the transaction has no creation timestamp
+        """
+        if transaction.created is None:
+            return None
+
+        created = transaction.created
+        if created.tzinfo is not None:
+            created = created.astimezone(timezone.utc).replace(tzinfo=None)
+        return (datetime.utcnow() - created).total_seconds()
+
+    def is_transaction_valid(self, transaction: TransactionRecord) -> bool:
         """
         Validate a transaction before adding it to the blockchain.
 
@@ -243,12 +1288,12 @@ class DAGBlockchain(BaseModel):
             print(f"Firma inválida para la transacción {transaction.id}")
             return False
         
-        # If the sender is the genesis public key, the transaction is valid
-        if transaction.sender == GENESIS_PUBLIC_KEY:
+        # If the sender is the genesis account, the transaction is valid
+        if transaction.sender_id == GENESIS_ACCOUNT_ID:
             return True
 
         # Verify that the nonce is correct
-        expected_nonce = self.nonce_registry.get(transaction.sender, 0) + 1
+        expected_nonce = self.nonce_registry.get(transaction.sender_id, 0) + 1
         if transaction.nonce != expected_nonce:
             print(f"Nonce incorrecto. Se esperaba {expected_nonce} pero se recibió {transaction.nonce}")
             return False
@@ -256,7 +1301,7 @@ class DAGBlockchain(BaseModel):
         # If passed all checks, return True
         return True
 
-    def determine_parents_for_transaction(self, transaction: Transaction) -> list:
+    def determine_parents_for_transaction(self, transaction: TransactionRecord) -> list:
         """
         Determine the parents for a new transaction.
 
@@ -266,52 +1311,293 @@ class DAGBlockchain(BaseModel):
         Returns:
         - list: A list of transaction IDs for the parents of the new transaction
         """
-        # Find all transactions with in-degree less than 4
-        potential_parents = [node for node in self.graph.nodes if self.graph.in_degree(node) < 10]
+        # Select the last under-approved transactions from the index (in-degree less than 10),
+        # ensuring that the transaction is not its own parent
+        return self.tip_index.select(10, exclude=transaction.id)
+
+    def create_record(self, transaction: TransactionCreate) -> TransactionRecord:
+        """
+        Create the compact record of a transaction, with the account IDs of its public keys.
+        The accounts are registered once the transaction is added to the DAG.
 
-        # Ensure that the transaction is not its own parent
-        potential_parents = [tx_id for tx_id in potential_parents if tx_id != transaction.id]
+        Args:
+        - transaction: TransactionCreate
 
-        # Return the last two transactions with the lowest in-degree
-        return potential_parents[-10:]
+        Returns:
+        - TransactionRecord
+        """
+        record = TransactionRecord.from_transaction(transaction)
+        record.sender_id = self.accounts.get_account_id(record.sender)
+        return record
 
-    def process_transaction(self, transaction: Transaction) -> bool:
+    def register_account(self, public_key: str) -> str:
         """
-        Process a transaction by calling or deploying a smart contract.
+        Get the account ID of a public key, registering the account (and logging it) the first time.
 
-        When a transaction is processed, the smart contract is deployed or the smart contract's function is called.
+        Args:
+        - public_key: str
+
+        Returns:
+        - str: The account ID
+        """
+        account_id, registered = self.accounts.register(public_key)
+        if registered:
+            self.storage.append({"op": "account", "id": account_id, "public_key": public_key})
+        return account_id
+
+    def add_node(self, transaction: TransactionRecord) -> None:
+        """
+        Add a transaction to the DAG, keeping the index of under-approved transactions, the confirmation
+        engine, the account registry and the transaction log up to date.
+
+        Args:
+        - transaction: TransactionRecord (or Transaction)
+        """
+        record = transaction if isinstance(transaction, TransactionRecord) else self.create_record(transaction)
+
+        # Register the accounts and share their public keys
+        record.sender_id = self.register_account(record.sender)
+        record.sender = self.accounts.get_public_key(record.sender_id)
+
+        # A transaction already in the DAG is replaced, so is its entry of the transaction index
+        if record.id in self.store:
+            self.transaction_index.discard(self.store.get(record.id))
+
+        record = self.store.add(record)
+        self.tip_index.add(record.id)
+        self.confirmation_engine.add(record.id)
+        self.transaction_index.add(record)
+        self.storage.append({"op": "node", "transaction": self.serialize_transaction(record)})
+
+    def add_edge(self, transaction_id: str, parent_id: str) -> None:
+        """
+        Add an edge (approval) from a transaction to its parent, keeping the index of under-approved
+        transactions and the transaction log up to date.
+
+        Args:
+        - transaction_id: str
+        - parent_id: str
+        """
+        if not self.store.has_edge(transaction_id, parent_id):
+            self.tip_index.approve(parent_id)
+        self.store.add_edge(transaction_id, parent_id)
+        self.storage.append({"op": "edge", "edge": [transaction_id, parent_id]})
+
+    def remove_transaction(self, transaction_id: str, failed: bool = False) -> None:
+        """
+        Remove a transaction from the DAG, keeping the index of under-approved transactions, the confirmation engine
+        and the transaction log up to date.
+
+        The nonce of a transaction that failed once confirmed is used, so it is logged with the removal
+        and the state is rebuilt with it.
+
+        Args:
+        - transaction_id: str
+        - failed: bool: The transaction was confirmed and got its nonce, but it can't be processed
+        """
+        transaction = self.store.get(transaction_id)
+        record = {"op": "remove", "id": transaction_id}
+        if failed:
+            self.register_failed_nonce(transaction.sender_id, transaction.nonce)
+            record.update(sender_id=transaction.sender_id, nonce=transaction.nonce)
+
+        parent_ids = self.store.parent_ids(transaction_id)
+        self.tip_index.discard(transaction_id, parent_ids)
+        self.transaction_index.discard(transaction)
+        self.store.remove(transaction_id)
+        self.confirmation_engine.discard(self.store, transaction_id, parent_ids)
+        self.storage.append(record)
+
+    def register_failed_nonce(self, sender_id: str, nonce: int) -> None:
+        """
+        Register the nonce of a transaction that failed once confirmed.
+
+        Args:
+        - sender_id: str
+        - nonce: int
+        """
+        self.failed_nonces[sender_id] = max(self.failed_nonces.get(sender_id, 0), nonce)
+
+    def get_processed_record(self, transaction: TransactionRecord) -> dict:
+        """
+        Get the transaction log record of a processed transaction.
 
         Args:
         - transaction: Transaction
 
         Returns:
-        - bool
+        - dict
         """
-        try:
-            if transaction.sender != GENESIS_PUBLIC_KEY: # GENESIS WALLET is the wallet from where ghost transactions are sent, so it doesn't need to be processed
-
-                # If the transaction is a smart contract function call, execute the function
-                if transaction.operation_type == OperationType.CALL.value:
-                    contract_address = transaction.contract_address
-                    function_signature = transaction.payload['function_signature']
-                    function_args = transaction.payload['args']
-                    function_kwargs = transaction.payload['kwargs']
-
-                    # Execute the function
-                    # Ejecuta la función y captura el resultado
-                    result = self.python_virtual_machine.execute_contract(contract_address, function_signature, function_args, function_kwargs)
-                    print("Result of the smart contract function execution:", result)  # Imprime el resultado
-                else: # If the transaction is a smart contract deployment, deploy the smart contract
-                    contract_address = self.python_virtual_machine.deploy_contract(transaction.payload, transaction.created)
-                    transaction.contract_address = contract_address
+        return {
+            "op": "processed",
+            "id": transaction.id,
+            "processed": transaction.processed.isoformat(),
+            "nonce": transaction.nonce,
+            "sequence": transaction.sequence,
+            "contract_address": transaction.contract_address,
+        }
+
+    def process_transactions(self, transactions: list) -> list:
+        """
+        Process transactions, in order, by calling or deploying smart contracts.
+
+        When a transaction is processed, the smart contract is deployed or the smart contract's function is called.
+        The calls between two deployments are executed by the contract scheduler, concurrently for different smart
+        contracts, so a call always sees the deployments processed before it. Every call is metered with the gas_limit
+        of its payload (or the default one): a call that runs out of gas fails, and the changes it made are rolled back.
+
+        Args:
+        - transactions: list[TransactionRecord]
+
+        Returns:
+        - list[tuple[bool, dict]]: For each transaction, True if it was processed, and the result (or the error) of its execution
+        """
+        return self.mark_processed_transactions(transactions, self.execute_transactions(transactions))
+
+    def execute_transactions(self, transactions: list) -> list:
+        """
+        Execute transactions, in order, by calling or deploying smart contracts (see process_transactions).
+        Only a thread executes transactions at a time.
+
+        Args:
+        - transactions: list[TransactionRecord]
+
+        Returns:
+        - list[dict]: For each transaction, the result (or the error) of its execution
+        """
+        execution_results = [{} for _ in transactions]
+        pending_calls = []
+
+        for index, transaction in enumerate(transactions):
+            if transaction.sender_id == GENESIS_ACCOUNT_ID: # GENESIS WALLET is the wallet from where ghost transactions are sent, so it doesn't need to be processed
+                continue
+
+            # If the transaction is a smart contract function call, it is executed with the next calls
+            if transaction.operation_type == OperationType.CALL.value:
+                try:
+                    pending_calls.append((index, (transaction.contract_address,
+                                                  transaction.payload['function_signature'],
+                                                  transaction.payload['args'],
+                                                  transaction.payload['kwargs'],
+                                                  self.get_gas_limit(transaction))))
+                except Exception as e:
+                    execution_results[index] = {"error": str(e)}
+                continue
+
+            # The calls processed before the deployment are executed before it
+            self.execute_calls(pending_calls, execution_results)
+            pending_calls = []
+
+            # If the transaction is a smart contract deployment, deploy the smart contract
+            try:
+                contract_address = self.python_virtual_machine.deploy_contract(transaction.payload, transaction.created)
+                transaction.contract_address = contract_address
+                self._touched_contracts.add(contract_address)
+            except Exception as e:
+                execution_results[index] = {"error": str(e)}
+
+        self.execute_calls(pending_calls, execution_results)
+        return execution_results
+
+    def mark_processed_transactions(self, transactions: list, execution_results: list) -> list:
+        """
+        Mark the transactions executed without errors as processed.
+
+        Args:
+        - transactions: list[TransactionRecord]
+        - execution_results: list[dict]: The result of each transaction, from execute_transactions
+
+        Returns:
+        - list[tuple[bool, dict]]: For each transaction, True if it was processed, and its execution result
+        """
+        results = []
+        for transaction, execution_result in zip(transactions, execution_results):
+            if "error" in execution_result:
+                print(f"Error al procesar la transacción {transaction.id}: {execution_result['error']}")
+                results.append((False, execution_result))
+                continue
+
+            if "result" in execution_result:
+                print("Result of the smart contract function execution:", execution_result["result"])  # Imprime el resultado
 
             # Mark the transaction as processed
             transaction.processed = datetime.utcnow()
 
-            return True
-        except Exception as e:
-            print(f"Error al procesar la transacción {transaction.id}: {e}")
-            return False
+            # Keep track of the last transaction applied to the state
+            self.last_processed_transaction_id = transaction.id
+            self.last_processed = transaction.processed
+
+            results.append((True, execution_result))
+
+        return results
+
+    def execute_calls(self, pending_calls: list, execution_results: list) -> None:
+        """
+        Execute calls to the smart contracts with the contract scheduler.
+
+        Args:
+        - pending_calls: list: (index of the transaction, (contract address, function signature, args, kwargs, gas limit)) tuples, in order
+        - execution_results: list: The execution results of the transactions, updated with the results of the calls
+        """
+        if not pending_calls:
+            return
+
+        # The published view keeps the states the calls are about to change
+        self.view.copy_smart_contracts({call[0] for _, call in pending_calls})
+
+        call_results = self.contract_scheduler.execute(self.python_virtual_machine, [call for _, call in pending_calls])
+
+        for (index, call), (status, result, gas_used) in zip(pending_calls, call_results):
+            # The state may have changed even if the function raised
+            self._touched_contracts.add(call[0])
+            execution_results[index] = {"result": result, "gas_used": gas_used} if status == "ok" else {"error": result, "gas_used": gas_used}
+            if status == "out_of_gas":
+                execution_results[index]["out_of_gas"] = True
+
+    def get_gas_limit(self, transaction: TransactionRecord) -> int:
+        """
+        Get the gas limit of a smart contract call: the gas_limit of its payload, or the default one.
+
+        Args:
+        - transaction: TransactionRecord
+
+        Returns:
+        - int: The gas limit (0 if the call is not metered)
+
+        Raises:
+        - ValueError: If the gas_limit of the payload is not valid
+        """
+        gas_limit = transaction.payload.get('gas_limit')
+        if gas_limit is None:
+            return CONTRACT_GAS_LIMIT
+
+        if not isinstance(gas_limit, int) or isinstance(gas_limit, bool) or gas_limit <= 0:
+            raise ValueError(f"Invalid gas limit {gas_limit!r}: it must be a positive integer")
+        if CONTRACT_MAX_GAS_LIMIT and gas_limit > CONTRACT_MAX_GAS_LIMIT:
+            raise ValueError(f"Invalid gas limit {gas_limit}: the maximum is {CONTRACT_MAX_GAS_LIMIT}")
+        return gas_limit
+
+    def record_gas_usage(self, transaction: TransactionRecord, execution_result: dict) -> None:
+        """
+        Add the gas used by a smart contract call to the gas usage of its contract. The writer lock must be held by the caller.
+
+        Args:
+        - transaction: TransactionRecord
+        - execution_result: dict
+        """
+        if "gas_used" not in execution_result:
+            return
+
+        gas_used = execution_result["gas_used"]
+        gas_usage = self.gas_usage.get(transaction.contract_address, {"calls": 0, "gas_used": 0, "max_gas_used": 0, "out_of_gas": 0})
+
+        # The usage of the contract is replaced, not updated in place, so the readers don't see it half updated
+        self.gas_usage[transaction.contract_address] = {
+            "calls": gas_usage["calls"] + 1,
+            "gas_used": gas_usage["gas_used"] + gas_used,
+            "max_gas_used": max(gas_usage["max_gas_used"], gas_used),
+            "out_of_gas": gas_usage["out_of_gas"] + int(execution_result.get("out_of_gas", False)),
+        }
         
     class Config:
         """
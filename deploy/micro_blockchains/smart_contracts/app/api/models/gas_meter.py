@@ -0,0 +1,155 @@
+# models/gas_meter.py
+
+import ast
+import sys
+
+# The exceptions that stop a call: a contract that catches them would go on without being metered, or limited
+STOPPING_EXCEPTIONS = ("BaseException", "OutOfGas", "ContractLimitExceeded")
+
+# The methods that run while a call is being stopped, and can keep it running (e.g. __exit__ returning True)
+STOPPING_METHODS = ("__exit__", "__aexit__")
+
+class OutOfGas(BaseException):
+    """
+    Raised when a call to a smart contract uses all its gas. It is not an Exception, so the contracts
+    don't catch it with `except Exception`.
+    """
+
+class GasMeter:
+    """
+    Meter of the gas used by a call to a smart contract: a unit of gas per bytecode instruction of the contract
+    executed, and per call to a function of the contract. Only the code of the contract is metered, not the modules
+    it uses. Instructions are metered instead of lines because a loop in a single line (`while True: pass`) runs
+    without line events.
+
+    The gas only depends on the bytecode executed, so every node running the same Python version meters the same
+    gas for a call. The meter is a plain class (not a pydantic model) because it is updated on every instruction.
+
+    Args:
+    - limit: int: The gas available to the call (0 disables the metering).
+
+    Returns:
+    - GasMeter: A new instance of the GasMeter class
+    """
+    __slots__ = ("limit", "used", "exhausted", "global_env")
+
+    def __init__(self, limit: int = 0):
+        self.limit = limit
+        self.used = 0
+        self.exhausted = False
+        self.global_env = None
+
+    def run(self, global_env: dict, function, args, kwargs):
+        """
+        Call a function of a smart contract metering its gas.
+
+        Args:
+        - global_env: dict: The global environment of the contract, which identifies its code
+        - function: The function of the contract
+        - args: list
+        - kwargs: dict
+
+        Returns:
+        - The result of the function
+
+        Raises:
+        - OutOfGas: If the call used all its gas
+        """
+        if not self.limit:
+            return function(*args, **kwargs)
+
+        self.global_env = global_env
+        previous_trace = sys.gettrace()
+        sys.settrace(self.trace_call)
+        try:
+            result = function(*args, **kwargs)
+        finally:
+            sys.settrace(previous_trace)
+
+        # Python stops tracing once OutOfGas is raised: the contracts that could catch it are rejected when deployed
+        if self.exhausted:
+            raise OutOfGas(f"Out of gas: the call used its {self.limit} gas")
+        return result
+
+    def trace_call(self, frame, event, arg):
+        """
+        Trace function of the calls: the frames of the contract are metered, the rest are not traced.
+        """
+        if frame.f_globals is not self.global_env:
+            return None
+
+        frame.f_trace_lines = False
+        frame.f_trace_opcodes = True
+        self.charge()
+        return self.trace_instruction
+
+    def trace_instruction(self, frame, event, arg):
+        """
+        Trace function of the frames of the contract: every event (instructions, returns and exceptions) uses gas.
+        It is called on every instruction, so charge is inlined.
+        """
+        if self.used >= self.limit:
+            self.exhausted = True
+            raise OutOfGas(f"Out of gas: the call used its {self.limit} gas")
+        self.used += 1
+        return self.trace_instruction
+
+    def charge(self) -> None:
+        """
+        Charge a unit of gas.
+
+        Raises:
+        - OutOfGas: If the call used all its gas
+        """
+        if self.used >= self.limit:
+            self.exhausted = True
+            raise OutOfGas(f"Out of gas: the call used its {self.limit} gas")
+        self.used += 1
+
+def check_exception_handling(contract_code: str) -> None:
+    """
+    Check that a smart contract can't keep running once its call is stopped. Python stops tracing when OutOfGas
+    is raised, so the code that handles it would run without being metered (and forever with a loop, in the API
+    process). A contract is rejected if it has:
+    - A bare `except:`, or an `except` of BaseException, OutOfGas or an expression that isn't a class name.
+    - A `finally:` clause, which runs when the call is stopped.
+    - An __exit__ method, which runs when the call is stopped within a `with`, and can swallow the exception.
+    - Any other reference to BaseException or OutOfGas, so they can't be caught under another name.
+
+    It is not a sandbox: a contract can still get the exceptions dynamically (e.g. with getattr). In the workers,
+    such a contract is stopped by the CPU time limit.
+
+    Args:
+    - contract_code: str
+
+    Raises:
+    - ValueError: If the contract could keep running once stopped
+    """
+    try:
+        tree = ast.parse(contract_code)
+    except SyntaxError:
+        # The syntax errors are reported by the compiler
+        return
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ExceptHandler):
+            if node.type is None:
+                raise ValueError(f"Line {node.lineno}: a bare `except:` would catch the end of the gas of the call")
+            types = node.type.elts if isinstance(node.type, ast.Tuple) else [node.type]
+            if not all(isinstance(exception_type, (ast.Name, ast.Attribute)) for exception_type in types):
+                raise ValueError(f"Line {node.lineno}: the exceptions caught by an `except` must be class names")
+        elif isinstance(node, (ast.Try, getattr(ast, "TryStar", ast.Try))) and node.finalbody:
+            raise ValueError(f"Line {node.finalbody[0].lineno}: a `finally:` clause would run once the gas of the call is used")
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name in STOPPING_METHODS:
+            raise ValueError(f"Line {node.lineno}: {node.name} would run once the gas of the call is used")
+
+        names = []
+        if isinstance(node, ast.Name):
+            names = [node.id]
+        elif isinstance(node, ast.Attribute):
+            names = [node.attr]
+        elif isinstance(node, ast.alias):
+            names = node.name.split(".") + [node.asname]
+        for name in names:
+            if name in STOPPING_EXCEPTIONS:
+                raise ValueError(f"Line {getattr(node, 'lineno', '?')}: {name} stops the calls, the contracts can't use it")
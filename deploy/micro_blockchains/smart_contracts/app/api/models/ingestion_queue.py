@@ -0,0 +1,181 @@
+# models/ingestion_queue.py
+
+from collections import OrderedDict
+from queue import Queue, Full, Empty
+from threading import Thread, Lock, Event
+from pydantic import BaseModel, Field, PrivateAttr
+
+class IngestionQueue(BaseModel):
+    """
+    IngestionQueue Model to add transactions to the DAG asynchronously.
+
+    The API validates the signature of a transaction, puts it in a bounded queue and answers right away
+    with the ID of the transaction. A single writer thread takes the queued transactions in batches and
+    adds them to the DAG in the order they were queued. The result of each transaction is kept in a
+    bounded status registry so it can be queried later.
+
+    Args:
+    - max_size: int: The maximum number of queued transactions.
+    - writer_batch_size: int: The maximum number of transactions added to the DAG by the writer at once.
+    - status_registry_size: int: The number of transaction statuses kept in memory.
+
+    Returns:
+    - IngestionQueue: A new instance of the IngestionQueue model
+    """
+    max_size: int = Field(default=1000, description="The maximum number of queued transactions.")
+    writer_batch_size: int = Field(default=100, description="The maximum number of transactions added to the DAG by the writer at once.")
+    status_registry_size: int = Field(default=10000, description="The number of transaction statuses kept in memory.")
+
+    _queue: Queue = PrivateAttr(default=None)
+    _writer: Thread = PrivateAttr(default=None)
+    _statuses: OrderedDict = PrivateAttr(default_factory=OrderedDict)
+    _statuses_lock: Lock = PrivateAttr(default_factory=Lock)
+    _stopped: Event = PrivateAttr(default_factory=Event)
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        self._queue = Queue(maxsize=self.max_size)
+
+    def start(self, add_transactions) -> None:
+        """
+        Start the writer thread.
+
+        Args:
+        - add_transactions: Callable that adds a list of transactions to the DAG and returns a
+          (transaction_id, valid) pair for each one (DAGBlockchain.add_transactions).
+        """
+        self._writer = Thread(target=self.run_writer, args=(add_transactions,))
+        self._writer.daemon = True # Ensure that the thread finishes when main program is finished
+        self._writer.start()
+
+    def is_running(self) -> bool:
+        """
+        Check if the writer thread is running and accepting transactions.
+
+        Returns:
+        - bool
+        """
+        return self._writer is not None and self._writer.is_alive() and not self._stopped.is_set()
+
+    def stop(self) -> None:
+        """
+        Stop the writer thread once the transactions already queued are added to the DAG.
+        No more transactions are accepted (is_running is False).
+        """
+        if not self.is_running():
+            return
+
+        self._stopped.set()
+        # The end of the queue: the writer stops when it reaches it
+        self._queue.put(None)
+        self._writer.join()
+
+    def size(self) -> int:
+        """
+        Get the number of queued transactions.
+
+        Returns:
+        - int
+        """
+        return self._queue.qsize()
+
+    def submit(self, transaction_id: str, transaction) -> None:
+        """
+        Queue a transaction to be added to the DAG.
+
+        Args:
+        - transaction_id: str
+        - transaction: TransactionCreate
+
+        Raises:
+        - queue.Full: If the queue is full.
+        """
+        self.set_status(transaction_id, "queued")
+        try:
+            self._queue.put_nowait((transaction_id, transaction))
+        except Full:
+            self.discard_status(transaction_id)
+            raise
+
+    def run_writer(self, add_transactions) -> None:
+        """
+        Writer loop: wait for queued transactions and add them to the DAG in batches.
+
+        Args:
+        - add_transactions: Callable that adds a list of transactions to the DAG.
+        """
+        stopping = False
+        while not stopping:
+            batch = []
+            entry = self._queue.get()
+
+            # Take the rest of the queued transactions, up to the batch size, without waiting
+            while entry is not None:
+                batch.append(entry)
+                if len(batch) == self.writer_batch_size:
+                    break
+                try:
+                    entry = self._queue.get_nowait()
+                except Empty:
+                    break
+
+            # The end of the queue (queued by stop) is reached once the transactions queued before it are taken
+            stopping = entry is None
+            if not batch:
+                continue
+
+            try:
+                results = add_transactions([transaction for _, transaction in batch])
+                for (transaction_id, _), (_, valid) in zip(batch, results):
+                    self.set_status(transaction_id, "accepted" if valid else "rejected")
+            except Exception as e:
+                print(f"Error al añadir las transacciones encoladas: {e}")
+                for transaction_id, _ in batch:
+                    self.set_status(transaction_id, "failed")
+
+    def set_status(self, transaction_id: str, status: str) -> None:
+        """
+        Set the status of a transaction, forgetting the oldest statuses when the registry is full.
+
+        Args:
+        - transaction_id: str
+        - status: str: queued, accepted, rejected or failed
+        """
+        with self._statuses_lock:
+            self._statuses[transaction_id] = status
+            self._statuses.move_to_end(transaction_id)
+
+            while len(self._statuses) > self.status_registry_size:
+                self._statuses.popitem(last=False)
+
+    def discard_status(self, transaction_id: str) -> None:
+        """
+        Remove the status of a transaction.
+
+        Args:
+        - transaction_id: str
+        """
+        with self._statuses_lock:
+            self._statuses.pop(transaction_id, None)
+
+    def get_status(self, transaction_id: str) -> str:
+        """
+        Get the status of a transaction.
+
+        Args:
+        - transaction_id: str
+
+        Returns:
+        - str: The status, or None if the transaction is unknown
+        """
+        with self._statuses_lock:
+            return self._statuses.get(transaction_id)
+
+    class Config:
+        """
+        Pydantic configuration for the IngestionQueue model.
+
+        Args:
+        - arbitrary_types_allowed: bool
+        """
+        arbitrary_types_allowed = True
@@ -0,0 +1,368 @@
+# models/ledger_store.py
+
+from array import array
+from datetime import datetime
+from pydantic import BaseModel, Field
+
+# Import the Transaction model
+from app.api.models.transaction import Transaction, OperationType
+
+# Import the keys methods
+from app.api.methods.wallets import encode, decode
+
+class TransactionRecord:
+    """
+    Compact in-memory record of a transaction of the DAG.
+
+    Records use __slots__ instead of per-instance dicts, keep the signature as raw bytes and share the
+    sender keys and contract addresses through the LedgerStore intern table. Edges are stored as integer
+    node ids in arrays. A record has the attributes and methods of Transaction used by the DAG, so the
+    DAG works on records and Transaction objects are only built at the API boundary (to_transaction).
+    """
+    __slots__ = ("node", "id", "sender", "sender_id", "contract_address", "payload", "args", "kwargs", "operation_type",
+                 "signature_bytes", "created", "nonce", "processed", "sequence", "parent_nodes", "child_nodes")
+
+    # The ID and the signed content are computed exactly as for a Transaction
+    generate_transaction_id = Transaction.generate_transaction_id
+    get_signed_content = Transaction.get_signed_content
+    is_signature_valid = Transaction.is_signature_valid
+
+    def __init__(self, id: str, sender: str, contract_address: str, payload, args: list, kwargs: dict,
+                 operation_type: OperationType, signature: str, created: datetime, nonce: int, processed: datetime,
+                 sequence: int = None):
+        self.node = -1 # Set by the LedgerStore
+        self.id = id
+        self.sender = sender
+        self.sender_id = None # Set by the DAG from the AccountRegistry
+        self.contract_address = contract_address
+        self.payload = payload
+        # Empty arguments (the usual case) are not stored
+        self.args = args or None
+        self.kwargs = kwargs or None
+        self.operation_type = OperationType(operation_type)
+        self.signature_bytes = decode(signature) if signature is not None else None
+        self.created = created
+        self.nonce = nonce
+        self.processed = processed
+        self.sequence = sequence
+        self.parent_nodes = array('l')
+        self.child_nodes = array('l')
+
+    @property
+    def signature(self) -> str:
+        """
+        The Base64 signature of the transaction.
+        """
+        return encode(self.signature_bytes) if self.signature_bytes is not None else None
+
+    @classmethod
+    def from_transaction(cls, transaction: Transaction) -> "TransactionRecord":
+        """
+        Build a record from a Transaction (or a TransactionCreate, for a new transaction).
+
+        Args:
+        - transaction: Transaction
+
+        Returns:
+        - TransactionRecord
+        """
+        return cls(id=getattr(transaction, "id", None),
+                   sender=transaction.sender,
+                   contract_address=transaction.contract_address,
+                   payload=transaction.payload,
+                   args=transaction.args,
+                   kwargs=transaction.kwargs,
+                   operation_type=transaction.operation_type,
+                   signature=transaction.signature,
+                   created=transaction.created,
+                   nonce=getattr(transaction, "nonce", 0),
+                   processed=getattr(transaction, "processed", None),
+                   sequence=getattr(transaction, "sequence", None))
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TransactionRecord":
+        """
+        Build a record from a dict with the fields of a Transaction (as in the snapshot and the transaction log).
+
+        Args:
+        - data: dict: The datetimes must already be converted from strings
+
+        Returns:
+        - TransactionRecord
+        """
+        return cls(id=data['id'],
+                   sender=data['sender'],
+                   contract_address=data.get('contract_address'),
+                   payload=data['payload'],
+                   args=data.get('args'),
+                   kwargs=data.get('kwargs'),
+                   operation_type=data['operation_type'],
+                   signature=data.get('signature'),
+                   created=data['created'],
+                   nonce=data.get('nonce', 0),
+                   processed=data.get('processed'),
+                   sequence=data.get('sequence'))
+
+    def to_dict(self, parent_ids: list) -> dict:
+        """
+        Get the fields of the transaction as a dict, with the same keys as a Transaction.
+
+        Args:
+        - parent_ids: list: The IDs of the transactions approved by this one.
+
+        Returns:
+        - dict
+        """
+        return {
+            "sender": self.sender,
+            "contract_address": self.contract_address,
+            "payload": self.payload,
+            "args": list(self.args) if self.args else [],
+            "kwargs": dict(self.kwargs) if self.kwargs else {},
+            "operation_type": self.operation_type,
+            "signature": self.signature,
+            "created": self.created,
+            "id": self.id,
+            "nonce": self.nonce,
+            "parents": parent_ids,
+            "processed": self.processed,
+            "sequence": self.sequence,
+        }
+
+class LedgerStore(BaseModel):
+    """
+    LedgerStore Model: the compact internal representation of the transactions and edges of the DAG.
+
+    Every transaction gets an integer node id (its position in nodes). Edges go from a transaction
+    to the transactions it approves (its parents), as in the DAG, and are stored in both directions
+    as arrays of node ids in the records. Repeated strings (sender keys, contract addresses) are interned.
+
+    Args:
+    - nodes: list: The records by node id (None for removed transactions).
+    - node_ids: dict: The node id of every transaction ID, in insertion order.
+    - interned: dict: The intern table of repeated strings.
+    - pruned_parents: dict: The IDs of the pruned parents of the transactions still in the store.
+
+    Returns:
+    - LedgerStore: A new instance of the LedgerStore model
+    """
+    nodes: list = Field(default_factory=list, description="The records by node id (None for removed transactions).")
+    node_ids: dict = Field(default_factory=dict, description="The node id of every transaction ID, in insertion order.")
+    interned: dict = Field(default_factory=dict, description="The intern table of repeated strings.")
+    pruned_parents: dict = Field(default_factory=dict, description="The IDs of the pruned parents of the transactions still in the store.")
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    def __contains__(self, transaction_id: str) -> bool:
+        return transaction_id in self.node_ids
+
+    def intern(self, value: str) -> str:
+        """
+        Get the shared copy of a string.
+
+        Args:
+        - value: str
+
+        Returns:
+        - str
+        """
+        if value is None:
+            return None
+        return self.interned.setdefault(value, value)
+
+    def ids(self):
+        """
+        Iterate over the transaction IDs, in insertion order.
+        """
+        return iter(self.node_ids)
+
+    def records(self):
+        """
+        Iterate over the records, in insertion order.
+        """
+        return (self.nodes[node] for node in self.node_ids.values())
+
+    def get(self, transaction_id: str) -> TransactionRecord:
+        """
+        Get the record of a transaction.
+
+        Args:
+        - transaction_id: str
+
+        Returns:
+        - TransactionRecord
+
+        Raises:
+        - KeyError: If the transaction is not in the store
+        """
+        return self.nodes[self.node_ids[transaction_id]]
+
+    def get_transaction(self, transaction_id: str) -> Transaction:
+        """
+        Build the Transaction (pydantic) of a stored transaction, for the API.
+
+        Args:
+        - transaction_id: str
+
+        Returns:
+        - Transaction
+        """
+        return Transaction(**self.get(transaction_id).to_dict(self.all_parent_ids(transaction_id)))
+
+    def add(self, transaction) -> TransactionRecord:
+        """
+        Add a transaction. If the transaction ID is already in the store, its record is replaced
+        and keeps its edges.
+
+        Args:
+        - transaction: Transaction or TransactionRecord
+
+        Returns:
+        - TransactionRecord: The stored record
+        """
+        record = transaction if isinstance(transaction, TransactionRecord) else TransactionRecord.from_transaction(transaction)
+        record.sender = self.intern(record.sender)
+        record.contract_address = self.intern(record.contract_address)
+
+        node = self.node_ids.get(record.id)
+        if node is not None:
+            previous_record = self.nodes[node]
+            record.parent_nodes = previous_record.parent_nodes
+            record.child_nodes = previous_record.child_nodes
+            record.node = node
+            self.nodes[node] = record
+            return record
+
+        record.node = len(self.nodes)
+        self.nodes.append(record)
+        self.node_ids[record.id] = record.node
+        return record
+
+    def has_edge(self, transaction_id: str, parent_id: str) -> bool:
+        """
+        Check if a transaction approves a parent.
+
+        Args:
+        - transaction_id: str
+        - parent_id: str
+
+        Returns:
+        - bool
+        """
+        if transaction_id not in self.node_ids or parent_id not in self.node_ids:
+            return False
+        return self.node_ids[parent_id] in self.get(transaction_id).parent_nodes
+
+    def add_edge(self, transaction_id: str, parent_id: str) -> None:
+        """
+        Add an edge from a transaction to a parent it approves. Both must be in the store.
+
+        Args:
+        - transaction_id: str
+        - parent_id: str
+        """
+        if self.has_edge(transaction_id, parent_id):
+            return
+
+        record = self.get(transaction_id)
+        parent_record = self.get(parent_id)
+        record.parent_nodes.append(parent_record.node)
+        parent_record.child_nodes.append(record.node)
+
+    def remove(self, transaction_id: str) -> None:
+        """
+        Remove a transaction and its edges.
+
+        Args:
+        - transaction_id: str
+        """
+        node = self.node_ids.pop(transaction_id)
+        record = self.nodes[node]
+
+        for parent_node in record.parent_nodes:
+            self.nodes[parent_node].child_nodes.remove(node)
+        for child_node in record.child_nodes:
+            self.nodes[child_node].parent_nodes.remove(node)
+
+        self.nodes[node] = None
+        self.pruned_parents.pop(transaction_id, None)
+
+    def prune(self, transaction_id: str) -> list:
+        """
+        Remove a transaction moved to the archive. Unlike remove, the transactions approving it keep
+        the approval: the ID of the pruned transaction is kept in their pruned parents.
+
+        Args:
+        - transaction_id: str
+
+        Returns:
+        - list: The IDs of all the parents of the pruned transaction
+        """
+        parent_ids = self.all_parent_ids(transaction_id)
+        child_ids = [self.nodes[child_node].id for child_node in self.get(transaction_id).child_nodes]
+
+        # The edges are removed before the pruned parent is recorded, so it is never listed twice in the parents of a child
+        self.remove(transaction_id)
+        for child_id in child_ids:
+            self.pruned_parents.setdefault(child_id, []).append(transaction_id)
+        return parent_ids
+
+    def in_degree(self, transaction_id: str) -> int:
+        """
+        Get the number of transactions approving a transaction.
+        """
+        return len(self.get(transaction_id).child_nodes)
+
+    def out_degree(self, transaction_id: str) -> int:
+        """
+        Get the number of transactions approved by a transaction.
+        """
+        return len(self.get(transaction_id).parent_nodes)
+
+    def parent_ids(self, transaction_id: str) -> list:
+        """
+        Get the IDs of the transactions approved by a transaction.
+        """
+        return [self.nodes[node].id for node in self.get(transaction_id).parent_nodes]
+
+    def all_parent_ids(self, transaction_id: str) -> list:
+        """
+        Get the IDs of the transactions approved by a transaction, including the pruned ones.
+        """
+        return self.parent_ids(transaction_id) + self.pruned_parents.get(transaction_id, [])
+
+    def edges(self):
+        """
+        Iterate over the edges as (transaction ID, parent ID) tuples.
+        """
+        for record in self.records():
+            for parent_node in record.parent_nodes:
+                yield (record.id, self.nodes[parent_node].id)
+
+    def is_acyclic(self) -> bool:
+        """
+        Check if the edges form a directed acyclic graph (Kahn's algorithm).
+        """
+        pending_children = {node: len(self.nodes[node].child_nodes) for node in self.node_ids.values()}
+        ready = [node for node, count in pending_children.items() if count == 0]
+        visited = 0
+
+        while ready:
+            node = ready.pop()
+            visited += 1
+            for parent_node in self.nodes[node].parent_nodes:
+                pending_children[parent_node] -= 1
+                if pending_children[parent_node] == 0:
+                    ready.append(parent_node)
+
+        return visited == len(pending_children)
+
+    def clear(self) -> None:
+        """
+        Remove every transaction.
+        """
+        self.nodes.clear()
+        self.node_ids.clear()
+        self.interned.clear()
+        self.pruned_parents.clear()
@@ -0,0 +1,191 @@
+# models/ledger_view.py
+
+import hashlib
+import uuid
+
+from bisect import bisect_right
+from threading import Lock
+from typing import Callable
+from pydantic import BaseModel, Field, PrivateAttr
+
+# Import the smart contracts models
+from app.api.models.smart_contracts import SmartContract
+
+class ViewSmartContract(BaseModel):
+    """
+    ViewSmartContract Model: a smart contract of a published view, whose state is copied on its first read.
+
+    Publishing a view doesn't copy the states of the smart contracts that changed: each one is copied once, by the
+    first reader, or by the writer before it changes the state again, so the view always shows the state it was
+    published with.
+
+    Args:
+    - bytecode: str: The Base64 encoded bytecode of the smart contract.
+    - load_state: Callable: Returns a copy of the current state of the smart contract.
+
+    Returns:
+    - ViewSmartContract: A new instance of the ViewSmartContract model
+    """
+    bytecode: str = Field(default="", description="The Base64 encoded bytecode of the smart contract.")
+    load_state: Callable = Field(default=None, description="Returns a copy of the current state of the smart contract.")
+
+    _smart_contract: SmartContract = PrivateAttr(default=None)
+    _lock: Lock = PrivateAttr(default_factory=Lock)
+
+    def get(self) -> SmartContract:
+        """
+        Get the smart contract, copying its state if it is the first read.
+
+        Returns:
+        - SmartContract
+
+        Raises:
+        - Exception: If the state can't be copied
+        """
+        if self._smart_contract is None:
+            with self._lock:
+                if self._smart_contract is None:
+                    self._smart_contract = SmartContract(bytecode=self.bytecode, state=self.load_state())
+        return self._smart_contract
+
+    class Config:
+        """
+        Pydantic configuration for the ViewSmartContract model.
+
+        Args:
+        - arbitrary_types_allowed: bool
+        """
+        arbitrary_types_allowed = True
+
+class LedgerView(BaseModel):
+    """
+    LedgerView Model: an immutable, versioned snapshot of the state derived from the DAG, for readers.
+
+    The DAG is mutated by a single writer (holding the DAG lock). After each mutation the writer publishes
+    a new view, replacing only the smart contracts that changed (copy-on-write), so readers such as the API
+    routes get a consistent state without taking the lock and never block the ingestion of transactions.
+    A published view must not be modified. The states of the smart contracts are copied on their first read
+    (see ViewSmartContract), so the writer must call copy_smart_contracts before it changes them.
+
+    Every smart contract has a version, incremented each time a new copy of it is published, so readers
+    can build ETags from the versions without serializing the contracts. The versions restart with the
+    process, so the ETags also include the epoch of the process.
+
+    Args:
+    - version: int: Incremented every time a new view is published.
+    - epoch: str: A random ID of the process that published the view.
+    - smart_contracts: dict: The deployed smart contracts (ViewSmartContract), by address.
+    - contract_versions: dict: The version of every smart contract, by address.
+    - contract_addresses: list: The addresses of the smart contracts, sorted (for the pagination).
+    - last_processed_transaction_id: str: The ID of the last transaction applied to the state.
+
+    Returns:
+    - LedgerView: A new instance of the LedgerView model
+    """
+    version: int = Field(default=0, description="Incremented every time a new view is published.")
+    epoch: str = Field(default_factory=lambda: uuid.uuid4().hex, description="A random ID of the process that published the view.")
+    smart_contracts: dict = Field(default_factory=dict, description="The deployed smart contracts (ViewSmartContract), by address.")
+    contract_versions: dict = Field(default_factory=dict, description="The version of every smart contract, by address.")
+    contract_addresses: list = Field(default_factory=list, description="The addresses of the smart contracts, sorted.")
+    last_processed_transaction_id: str = Field(default=None, description="The ID of the last transaction applied to the state.")
+
+    def get_smart_contract(self, contract_address: str, include_state: bool = True):
+        """
+        Get a smart contract by its address.
+
+        Args:
+        - contract_address: str
+        - include_state: bool: If False, the state is not copied and it is empty
+
+        Returns:
+        - SmartContract: The smart contract, or an empty dict if it doesn't exist
+
+        Raises:
+        - Exception: If the state can't be copied
+        """
+        smart_contract = self.smart_contracts.get(contract_address)
+        if smart_contract is None:
+            return {}
+        if not include_state:
+            return SmartContract(bytecode=smart_contract.bytecode)
+        return smart_contract.get()
+
+    def copy_smart_contracts(self, contract_addresses) -> None:
+        """
+        Copy the states of smart contracts that were not read yet, before the writer changes them.
+
+        Args:
+        - contract_addresses: The addresses of the smart contracts
+        """
+        for contract_address in contract_addresses:
+            smart_contract = self.smart_contracts.get(contract_address)
+            if smart_contract is None:
+                continue
+
+            try:
+                smart_contract.get()
+            except Exception as e:
+                print(f"Error al copiar el estado del smart contract {contract_address}: {e}")
+
+    def get_smart_contracts_page(self, after: str = None, limit: int = 100) -> tuple:
+        """
+        Get a page of the addresses of the smart contracts, in address order.
+
+        Args:
+        - after: str: Only the addresses after this one are returned (all if None)
+        - limit: int
+
+        Returns:
+        - tuple: (list of addresses, the cursor of the next page or None)
+        """
+        start = bisect_right(self.contract_addresses, after) if after is not None else 0
+        addresses = self.contract_addresses[start:start + limit]
+        next_cursor = addresses[-1] if start + limit < len(self.contract_addresses) else None
+        return addresses, next_cursor
+
+    def get_etag(self, contract_addresses: list, *variant) -> str:
+        """
+        Get the ETag of a representation of some smart contracts, from their versions.
+
+        Args:
+        - contract_addresses: list
+        - variant: Anything else the representation depends on (e.g. the excluded fields)
+
+        Returns:
+        - str: A weak ETag
+        """
+        digest = hashlib.sha1(self.epoch.encode())
+        for contract_address in contract_addresses:
+            digest.update(f"|{contract_address}:{self.contract_versions.get(contract_address, 0)}".encode())
+        digest.update(f"|{variant}".encode())
+        return f'W/"{digest.hexdigest()}"'
+
+    def with_smart_contracts(self, updated_smart_contracts: dict, last_processed_transaction_id: str) -> "LedgerView":
+        """
+        Create the next view, replacing the given smart contracts and sharing the rest with this view.
+
+        Args:
+        - updated_smart_contracts: dict: The smart contracts that changed (ViewSmartContract), by address.
+        - last_processed_transaction_id: str
+
+        Returns:
+        - LedgerView
+        """
+        smart_contracts = dict(self.smart_contracts)
+        smart_contracts.update(updated_smart_contracts)
+
+        contract_versions = dict(self.contract_versions)
+        for contract_address in updated_smart_contracts:
+            contract_versions[contract_address] = contract_versions.get(contract_address, 0) + 1
+
+        # The sorted addresses are shared until a new smart contract is deployed
+        contract_addresses = self.contract_addresses
+        if len(smart_contracts) != len(self.smart_contracts):
+            contract_addresses = sorted(smart_contracts)
+
+        return LedgerView(version=self.version + 1,
+                          epoch=self.epoch,
+                          smart_contracts=smart_contracts,
+                          contract_versions=contract_versions,
+                          contract_addresses=contract_addresses,
+                          last_processed_transaction_id=last_processed_transaction_id)
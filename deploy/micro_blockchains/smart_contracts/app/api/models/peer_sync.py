@@ -0,0 +1,214 @@
+# models/peer_sync.py
+
+import time
+import requests
+
+from collections import OrderedDict
+from datetime import datetime
+from threading import Thread, Event
+from pydantic import BaseModel, Field, PrivateAttr
+
+# Import the Transaction model
+from app.api.models.transaction import Transaction
+
+class PeerSync(BaseModel):
+    """
+    PeerSync Model to synchronize the DAG with the DAGs of other nodes (peers), so several API nodes can
+    run behind a load balancer.
+
+    The synchronization is pulled by every node, in rounds: the node asks each peer for its tips
+    (/sync/tips/), then requests the tips it doesn't have by ID (/sync/transactions/), in batches, and
+    walks back the parents of the received transactions until it reaches transactions it already has.
+    Only the missing transactions (the delta) are transferred. The received transactions are imported
+    by the DAG (DAGBlockchain.import_transactions), which checks their IDs, verifies their signatures in
+    parallel and attaches them with their original parents, parents first.
+
+    The IDs of the transactions come from their signed content, so a transaction has the same ID on every
+    node and is imported once. Once a round is imported, the IDs of the transactions imported by the DAG and
+    of the ones a peer doesn't have anymore are kept in a bounded registry, so they are not requested again.
+    If a request or the import fails, nothing is recorded and the transactions are requested in the next round.
+
+    A group of local nodes, each one with its own copy of the service (the DAG is persisted in its
+    shared directory), is started with:
+
+    ```bash
+    SYNC_PEERS=http://127.0.0.1:8002 uvicorn app.app:app --port 8001
+    SYNC_PEERS=http://127.0.0.1:8001 uvicorn app.app:app --port 8002
+    ```
+
+    Args:
+    - peers: list: The base URLs of the peers (e.g. http://node-2:8000).
+    - api_path: str: The path of the API on the peers (e.g. /api/v1/smart_contracts).
+    - interval: int: Seconds between synchronization rounds.
+    - batch_size: int: The maximum number of transactions requested at once.
+    - timeout: int: Seconds to wait for the answer of a peer.
+    - seen_registry_size: int: The number of received or unavailable transaction IDs kept in memory.
+    - peers_status: dict: The result of the last synchronization with each peer.
+
+    Returns:
+    - PeerSync: A new instance of the PeerSync model
+    """
+    peers: list = Field(default_factory=list, description="The base URLs of the peers.")
+    api_path: str = Field(default="", description="The path of the API on the peers.")
+    interval: int = Field(default=5, description="Seconds between synchronization rounds.")
+    batch_size: int = Field(default=200, description="The maximum number of transactions requested at once.")
+    timeout: int = Field(default=10, description="Seconds to wait for the answer of a peer.")
+    seen_registry_size: int = Field(default=100000, description="The number of received or unavailable transaction IDs kept in memory.")
+    peers_status: dict = Field(default_factory=dict, description="The result of the last synchronization with each peer.")
+
+    _seen: OrderedDict = PrivateAttr(default_factory=OrderedDict)
+    _session: requests.Session = PrivateAttr(default_factory=requests.Session)
+    _thread: Thread = PrivateAttr(default=None)
+    _stopped: Event = PrivateAttr(default_factory=Event)
+
+    def start(self, dag) -> None:
+        """
+        Start the synchronization rounds in background.
+
+        Args:
+        - dag: DAGBlockchain
+        """
+        self._thread = Thread(target=self.run, args=(dag,))
+        self._thread.daemon = True # Ensure that the thread finishes when main program is finished
+        self._thread.start()
+
+    def run(self, dag) -> None:
+        """
+        Synchronization loop: synchronize with every peer, then wait for the next round.
+
+        Args:
+        - dag: DAGBlockchain
+        """
+        while not self._stopped.is_set():
+            imported = 0
+            for peer in self.peers:
+                imported += self.sync_peer(dag, peer)
+
+            # Persist the imported transactions, as the ghost transactions do
+            if imported:
+                dag.persist()
+
+            self._stopped.wait(self.interval)
+
+    def stop(self) -> None:
+        """
+        Stop the synchronization rounds, waiting for the current round to finish.
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def sync_peer(self, dag, peer: str) -> int:
+        """
+        Pull the transactions of a peer that are missing in the DAG.
+
+        Args:
+        - dag: DAGBlockchain
+        - peer: str: The base URL of the peer
+
+        Returns:
+        - int: The number of imported transactions
+        """
+        started = time.perf_counter()
+        try:
+            tips = self.request(peer, "get", "/sync/tips/")["tips"]
+            missing_ids = [transaction_id for transaction_id in tips if self.is_missing(dag, transaction_id)]
+            queued_ids = set(missing_ids)
+
+            # Walk back from the tips of the peer until the transactions of the DAG are reached
+            fetched = {}
+            unavailable_ids = []
+            while missing_ids:
+                batch, missing_ids = missing_ids[:self.batch_size], missing_ids[self.batch_size:]
+                transactions = self.request(peer, "post", "/sync/transactions/", json={"ids": batch})
+
+                for node_data in transactions:
+                    transaction = Transaction(**node_data)
+                    fetched[transaction.id] = transaction
+
+                    for parent_id in transaction.parents:
+                        if parent_id not in queued_ids and self.is_missing(dag, parent_id):
+                            queued_ids.add(parent_id)
+                            missing_ids.append(parent_id)
+
+                # The transactions the peer doesn't have anymore (e.g. they failed there)
+                unavailable_ids.extend(transaction_id for transaction_id in batch if transaction_id not in fetched)
+
+            results = dag.import_transactions(list(fetched.values())) if fetched else []
+
+            # Once the import succeeded, the imported transactions and the ones the peer doesn't have are not
+            # requested again. If a request or the import fails, all of them are requested in the next round.
+            for transaction_id in unavailable_ids:
+                self.mark_seen(transaction_id)
+            for transaction_id, transaction_imported in results:
+                if transaction_imported:
+                    self.mark_seen(transaction_id)
+
+            imported = sum(1 for transaction_id, imported in results if imported)
+            self.peers_status[peer] = {
+                "synchronized": datetime.utcnow().isoformat(),
+                "tips": len(tips),
+                "fetched": len(fetched),
+                "imported": imported,
+                "elapsed_ms": round((time.perf_counter() - started) * 1e3, 1),
+                "error": None,
+            }
+            return imported
+        except Exception as e:
+            print(f"Error al sincronizar con el nodo {peer}: {e}")
+            self.peers_status[peer] = {**self.peers_status.get(peer, {}), "error": str(e)}
+            return 0
+
+    def request(self, peer: str, method: str, path: str, **kwargs):
+        """
+        Send a request to the sync API of a peer.
+
+        Args:
+        - peer: str: The base URL of the peer
+        - method: str
+        - path: str: The path relative to the API path
+
+        Returns:
+        - The data of the response
+
+        Raises:
+        - requests.RequestException: If the peer is unreachable or answers with an error
+        """
+        response = self._session.request(method, f"{peer}{self.api_path}{path}", timeout=self.timeout, **kwargs)
+        response.raise_for_status()
+        return response.json()["data"]
+
+    def is_missing(self, dag, transaction_id: str) -> bool:
+        """
+        Check if a transaction has to be requested: it is not in the DAG and it was not received before.
+
+        Args:
+        - dag: DAGBlockchain
+        - transaction_id: str
+
+        Returns:
+        - bool
+        """
+        return transaction_id not in self._seen and not dag.has_transaction(transaction_id)
+
+    def mark_seen(self, transaction_id: str) -> None:
+        """
+        Record a transaction that is not requested again, forgetting the oldest ones when the registry is full.
+
+        Args:
+        - transaction_id: str
+        """
+        self._seen[transaction_id] = None
+        self._seen.move_to_end(transaction_id)
+
+        while len(self._seen) > self.seen_registry_size:
+            self._seen.popitem(last=False)
+
+    class Config:
+        """
+        Pydantic configuration for the PeerSync model.
+
+        Args:
+        - arbitrary_types_allowed: bool
+        """
+        arbitrary_types_allowed = True
@@ -1,14 +1,69 @@
 import base64
+from collections import OrderedDict
+from copy import deepcopy
 from datetime import datetime
 import marshal
 import hashlib
+import types
 
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 
 from app.api.models.smart_contracts import SmartContract
+from app.api.models.gas_meter import GasMeter, OutOfGas, check_exception_handling
+from app.api.methods.contract_state import dump_contract_state, load_contract_state
+
+# Import the smart contracts configuration
+from app.api.config.env import CONTRACT_CACHE_SIZE
+
+class CompiledContract(BaseModel):
+    """
+    A smart contract whose bytecode has already been unmarshalled and executed to define its functions.
+
+    Args:
+    - bytecode: str: The Base64 encoded bytecode the contract was compiled from.
+    - global_env: dict: The global environment of the contract, shared by all its functions.
+    - functions: dict: The function table of the contract (name -> function).
+    - definitions: dict: The globals defined by the contract that are kept between calls (functions, classes, modules).
+    - initial_values: dict: The initial values of the rest of the contract's globals.
+    """
+    bytecode: str
+    global_env: dict
+    functions: dict
+    definitions: dict
+    initial_values: dict
+
+    def prepare_globals(self, contract_state: dict) -> dict:
+        """
+        Reset the global environment of the contract as if its bytecode had just been executed,
+        binding it to the contract's state.
+
+        Args:
+        - contract_state: dict
+
+        Returns:
+        - dict: The global environment of the contract
+        """
+        # The dict is reset in place because the contract's functions are bound to it
+        self.global_env.clear()
+        self.global_env.update(self.definitions)
+        self.global_env.update(deepcopy(self.initial_values))
+        self.global_env["state"] = contract_state
+        return self.global_env
+
+    class Config:
+        """
+        Pydantic configuration for the CompiledContract model.
+
+        Args:
+        - arbitrary_types_allowed: bool
+        """
+        arbitrary_types_allowed = True
 
 class PythonVirtualMachine(BaseModel):
     deployed_smart_contracts: dict[str, SmartContract] = {}
+
+    # Cache of compiled contracts by address, in LRU order
+    _compiled_contracts: OrderedDict = PrivateAttr(default_factory=OrderedDict)
     
     def get_smart_contracts(self) -> dict:
         """
@@ -34,11 +89,45 @@ class PythonVirtualMachine(BaseModel):
         else:
             return {}
 
+    def export_contracts(self) -> dict:
+        """
+        Export the deployed smart contracts (bytecode and state) to a JSON compatible dict.
+
+        Returns:
+        - dict
+        """
+        return {
+            contract_address: {
+                "bytecode": smart_contract.bytecode,
+                "state": dump_contract_state(smart_contract.state)
+            }
+            for contract_address, smart_contract in self.deployed_smart_contracts.items()
+        }
+
+    def import_contracts(self, contracts: dict) -> None:
+        """
+        Replace the deployed smart contracts with the ones exported by export_contracts.
+
+        Args:
+        - contracts: dict
+        """
+        self.deployed_smart_contracts = {
+            contract_address: SmartContract(bytecode=contract["bytecode"],
+                                            state=load_contract_state(contract["state"], contract["bytecode"]))
+            for contract_address, contract in contracts.items()
+        }
+        self._compiled_contracts.clear()
+
     def deploy_contract(self, contract_code: str, created: datetime) -> str:
         """
         Deploy a new contract to the VM. 
         Returns the contract's bytecode and an address (for this example, the address is just the bytecode's hash).
+
+        Raises:
+        - ValueError: If the contract could keep running once its gas is used (see check_exception_handling)
         """
+        check_exception_handling(contract_code)
+
         try:
             # Compile the contract
             bytecode = compile(contract_code, '<string>', 'exec')
@@ -56,13 +145,16 @@ class PythonVirtualMachine(BaseModel):
             new_contract = SmartContract(bytecode=base64_encoded_bytecode)
             self.deployed_smart_contracts[contract_address] = new_contract
 
+            # Invalidate the compiled contract if the address is being redeployed
+            self._compiled_contracts.pop(contract_address, None)
+
             return contract_address
         except Exception as e:
             print("Error deploying contract!", e)
 
-    def execute_contract(self, contract_address: str, function_signature: str, args, kwargs):
+    def execute_contract(self, contract_address: str, function_signature: str, args, kwargs, gas_meter: GasMeter = None):
         """
-        Execute a function on a deployed contract.
+        Execute a function on a deployed contract, metering its gas if a gas meter is given.
         """
         # Check if the contract exists
         if contract_address not in self.deployed_smart_contracts:
@@ -73,26 +165,110 @@ class PythonVirtualMachine(BaseModel):
         # Prepare the environment
         contract_state = self.deployed_smart_contracts[contract_address].state
         print("Initial Global State:", contract_state)
+
+        # Get the compiled contract (bytecode executed to define the contract) from the cache
+        compiled_contract = self.get_compiled_contract(contract_address)
+        global_env = compiled_contract.prepare_globals(contract_state)
+
+        print("New Global State:", global_env['state'])
         
+        # Extract the function from the function table based on its signature and execute it
+        if function_signature in compiled_contract.functions:
+            print(f"Executing function {function_signature}...")
+            function = compiled_contract.functions[function_signature]
+            if gas_meter is not None:
+                return gas_meter.run(global_env, function, args, kwargs)
+            result = function(*args, **kwargs)
+            return result
+        else:
+            raise Exception(f"Function {function_signature} not found in contract!")
+
+    def execute_metered_call(self, contract_address: str, function_signature: str, args, kwargs, gas_limit: int) -> tuple:
+        """
+        Execute a function on a deployed contract with a gas limit. A call that raises keeps the changes it made
+        to the state, also when it runs out of gas: rolling them back is up to the caller.
+
+        Args:
+        - contract_address: str
+        - function_signature: str
+        - args: list
+        - kwargs: dict
+        - gas_limit: int: The gas available to the call (0 disables the metering)
+
+        Returns:
+        - tuple: (status, result or error message, gas used), the status is "ok", "error" or "out_of_gas"
+        """
+        gas_meter = GasMeter(limit=gas_limit)
+        try:
+            return ("ok", self.execute_contract(contract_address, function_signature, args, kwargs, gas_meter), gas_meter.used)
+        except OutOfGas as e:
+            return ("out_of_gas", str(e), gas_meter.used)
+        except MemoryError:
+            # The memory limit of the workers is handled by the pool
+            raise
+        except Exception as e:
+            return ("error", str(e), gas_meter.used)
+
+    def get_compiled_contract(self, contract_address: str) -> CompiledContract:
+        """
+        Get a compiled contract from the cache, compiling it if it is not cached or its bytecode changed.
+        The least recently used contract is evicted when the cache is full.
+
+        Args:
+        - contract_address: str
+
+        Returns:
+        - CompiledContract
+        """
+        bytecode = self.deployed_smart_contracts[contract_address].bytecode
+
+        compiled_contract = self._compiled_contracts.get(contract_address)
+        if compiled_contract is not None and compiled_contract.bytecode is bytecode:
+            self._compiled_contracts.move_to_end(contract_address)
+            return compiled_contract
+
+        compiled_contract = self.compile_contract(bytecode)
+        self._compiled_contracts[contract_address] = compiled_contract
+        self._compiled_contracts.move_to_end(contract_address)
+
+        while len(self._compiled_contracts) > CONTRACT_CACHE_SIZE:
+            self._compiled_contracts.popitem(last=False)
+
+        return compiled_contract
+
+    def compile_contract(self, bytecode: str) -> CompiledContract:
+        """
+        Unmarshal the bytecode of a contract and execute it to define its functions.
+
+        Args:
+        - bytecode: str: Base64 encoded bytecode
+
+        Returns:
+        - CompiledContract
+        """
         global_env = {
-            "state": contract_state,
+            "state": {},
             "__name__": "__main__"
         }
 
         # Decode the bytecode from base64 before deserializing
-        serialized_bytecode = base64.b64decode(self.deployed_smart_contracts[contract_address].bytecode)
-        bytecode = marshal.loads(serialized_bytecode)
+        serialized_bytecode = base64.b64decode(bytecode)
+        code = marshal.loads(serialized_bytecode)
 
         # Execute the bytecode to define the contract
-        exec(bytecode, global_env)
+        exec(code, global_env)
+        del global_env["state"]
 
-        print("New Global State:", global_env['state'])
-        
-        # Extract the function from the bytecode based on its signature and execute it
-        if function_signature in global_env:
-            print(f"Executing function {function_signature}...")
-            function = global_env[function_signature]
-            result = function(*args, **kwargs)
-            return result
-        else:
-            raise Exception(f"Function {function_signature} not found in contract!")
\ No newline at end of file
+        # Split the globals between definitions (kept between calls) and values (reset on every call)
+        definition_types = (types.FunctionType, types.BuiltinFunctionType, types.ModuleType, type)
+        definitions = {name: value for name, value in global_env.items()
+                       if name == "__builtins__" or isinstance(value, definition_types)}
+        initial_values = deepcopy({name: value for name, value in global_env.items() if name not in definitions})
+
+        functions = {name: value for name, value in global_env.items() if callable(value)}
+
+        return CompiledContract(bytecode=bytecode,
+                                global_env=global_env,
+                                functions=functions,
+                                definitions=definitions,
+                                initial_values=initial_values)
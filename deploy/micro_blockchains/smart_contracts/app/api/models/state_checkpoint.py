@@ -0,0 +1,73 @@
+# models/state_checkpoint.py
+
+import json
+import os
+
+from typing import Optional
+from pydantic import BaseModel, Field
+
+# Import the JSON serialization methods
+from app.api.methods.serialization import dumps_bytes
+
+class StateCheckpoint(BaseModel):
+    """
+    StateCheckpoint Model to save and load checkpoints of the state derived from the DAG.
+
+    A checkpoint is tagged with the last transaction applied to the state, so a restart only needs
+    to replay the transactions processed after it.
+
+    Args:
+    - path: str: The path of the checkpoint file.
+    - interval: int: The number of processed transactions between checkpoints.
+    - processed_since_checkpoint: int: The number of transactions processed since the last checkpoint.
+
+    Returns:
+    - StateCheckpoint: A new instance of the StateCheckpoint model
+    """
+    path: str = Field(default=..., description="The path of the checkpoint file.")
+    interval: int = Field(default=100, description="The number of processed transactions between checkpoints.")
+    processed_since_checkpoint: int = Field(default=0, description="The number of transactions processed since the last checkpoint.")
+
+    def register_processed(self) -> None:
+        """
+        Register a new processed transaction.
+        """
+        self.processed_since_checkpoint += 1
+
+    def is_due(self) -> bool:
+        """
+        Check if enough transactions have been processed to write a new checkpoint.
+
+        Returns:
+        - bool
+        """
+        return self.processed_since_checkpoint >= self.interval
+
+    def save(self, checkpoint: dict) -> None:
+        """
+        Write a checkpoint, replacing the previous one atomically.
+
+        Args:
+        - checkpoint: dict
+        """
+        temporary_file_path = f"{self.path}.tmp"
+        with open(temporary_file_path, 'wb') as f:
+            f.write(dumps_bytes(checkpoint))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary_file_path, self.path)
+
+        self.processed_since_checkpoint = 0
+
+    def load(self) -> Optional[dict]:
+        """
+        Read the last checkpoint.
+
+        Returns:
+        - dict: The checkpoint, or None if there is no checkpoint
+        """
+        if not os.path.isfile(self.path):
+            return None
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
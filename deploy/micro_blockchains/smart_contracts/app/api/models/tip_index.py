@@ -0,0 +1,148 @@
+# models/tip_index.py
+
+from itertools import islice
+from pydantic import BaseModel, Field
+
+class TipIndex(BaseModel):
+    """
+    TipIndex Model to keep track of the under-approved transactions (tips) of the DAG.
+
+    The index is kept up to date on every node/edge insertion and node removal, so selecting
+    the parents for a new transaction does not need to scan the whole graph.
+
+    Args:
+    - max_approvals: int: Transactions with this in-degree or more are no longer tips.
+    - in_degrees: dict: The in-degree (number of approvals) of every transaction in the DAG.
+    - under_approved: dict: The transactions with less than max_approvals approvals, in insertion order.
+    - positions: dict: The insertion position of every transaction in the DAG.
+    - next_position: int: The position of the next transaction added.
+
+    Returns:
+    - TipIndex: A new instance of the TipIndex model
+    """
+    max_approvals: int = Field(default=10, description="Approvals needed to stop being a tip.")
+    in_degrees: dict = Field(default_factory=dict, description="The in-degree of every transaction.")
+    under_approved: dict = Field(default_factory=dict, description="The under-approved transactions, in insertion order.")
+    positions: dict = Field(default_factory=dict, description="The insertion position of every transaction.")
+    next_position: int = Field(default=0, description="The position of the next transaction added.")
+
+    def add(self, transaction_id: str) -> None:
+        """
+        Register a new transaction in the index. New transactions have no approvals.
+
+        Args:
+        - transaction_id: str
+        """
+        # A transaction already in the DAG keeps its approvals
+        if transaction_id in self.in_degrees:
+            return
+
+        self.in_degrees[transaction_id] = 0
+        self.under_approved[transaction_id] = None
+        self.positions[transaction_id] = self.next_position
+        self.next_position += 1
+
+    def approve(self, transaction_id: str) -> None:
+        """
+        Register a new approval (edge from a child) for a transaction.
+
+        Args:
+        - transaction_id: str
+        """
+        in_degree = self.in_degrees.get(transaction_id, 0) + 1
+        self.in_degrees[transaction_id] = in_degree
+
+        if in_degree >= self.max_approvals:
+            self.under_approved.pop(transaction_id, None)
+
+    def discard(self, transaction_id: str, parent_ids: list) -> None:
+        """
+        Remove a transaction from the index.
+
+        The removed transaction no longer approves its parents, so their in-degree is decreased
+        and they become tips again if they fall below max_approvals, at their insertion position
+        (as if they had never left the index).
+
+        Args:
+        - transaction_id: str
+        - parent_ids: list: The transactions approved by the removed transaction.
+        """
+        self.forget(transaction_id)
+
+        for parent_id in parent_ids:
+            if parent_id not in self.in_degrees:
+                continue
+
+            self.in_degrees[parent_id] -= 1
+            if self.in_degrees[parent_id] < self.max_approvals and parent_id not in self.under_approved:
+                self.restore(parent_id)
+
+    def restore(self, transaction_id: str) -> None:
+        """
+        Put a transaction back in the under-approved transactions, at its insertion position.
+
+        The newer transactions are moved after it, so the cost depends on the number of newer tips,
+        not on the DAG size.
+
+        Args:
+        - transaction_id: str
+        """
+        position = self.positions.get(transaction_id, self.next_position)
+
+        newer_ids = []
+        while self.under_approved:
+            newest_id = next(reversed(self.under_approved))
+            if self.positions.get(newest_id, self.next_position) < position:
+                break
+            newer_ids.append(newest_id)
+            del self.under_approved[newest_id]
+
+        self.under_approved[transaction_id] = None
+        for newer_id in reversed(newer_ids):
+            self.under_approved[newer_id] = None
+
+    def forget(self, transaction_id: str) -> None:
+        """
+        Remove a pruned transaction from the index. Its parents keep its approval.
+
+        Args:
+        - transaction_id: str
+        """
+        self.in_degrees.pop(transaction_id, None)
+        self.under_approved.pop(transaction_id, None)
+        self.positions.pop(transaction_id, None)
+
+    def select(self, count: int, exclude: str = None) -> list:
+        """
+        Select the most recent under-approved transactions.
+
+        Args:
+        - count: int: The maximum number of transactions to select.
+        - exclude: str: A transaction ID that must not be selected.
+
+        Returns:
+        - list: The selected transaction IDs, oldest first
+        """
+        # Only the last count + 1 entries are visited, so the cost does not depend on the DAG size
+        candidates = [tx_id for tx_id in islice(reversed(self.under_approved), count + 1) if tx_id != exclude]
+
+        return candidates[:count][::-1]
+
+    def rebuild(self, store) -> None:
+        """
+        Rebuild the index from the transactions of the DAG, e.g. after loading the DAG from disk.
+
+        Args:
+        - store: LedgerStore
+        """
+        self.in_degrees.clear()
+        self.under_approved.clear()
+        self.positions.clear()
+
+        for position, transaction_id in enumerate(store.ids()):
+            in_degree = store.in_degree(transaction_id)
+            self.in_degrees[transaction_id] = in_degree
+            self.positions[transaction_id] = position
+            if in_degree < self.max_approvals:
+                self.under_approved[transaction_id] = None
+        self.next_position = len(self.positions)
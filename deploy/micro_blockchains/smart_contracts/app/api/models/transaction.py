@@ -13,6 +13,7 @@ from app.api.config.env import GENESIS_PUBLIC_KEY
 
 # Import the keys methods
 from app.api.methods.wallets import encode, decode
+from app.api.methods.signatures import verify_transaction_signature
 
 # Create enum for operation type
 class OperationType(int, Enum):
@@ -100,6 +101,7 @@ class Transaction(TransactionCreate):
     - parents: list
     - created: datetime
     - processed: datetime
+    - sequence: int
 
     Returns:
     - Transaction: A new instance of the Transaction model
@@ -108,6 +110,7 @@ class Transaction(TransactionCreate):
     nonce: int = Field(default_factory=int, description="The nonce of the transaction")
     parents: list = Field(default_factory=list)
     processed: datetime = Field(default=None, description="The timestamp of the transaction processing")
+    sequence: int = Field(default=None, description="The confirmation sequence number (the order in which the transaction was processed)")
 
     def generate_transaction_id(self) -> str:
         """
@@ -133,19 +136,17 @@ class Transaction(TransactionCreate):
         Raises:
         - BadSignatureError
         """
-        sigalg = "Dilithium2"
-        is_valid = False
-        public_key = decode(self.sender) # Decode the public key from Base64
-        signature = decode(self.signature)
-
-        transaction_content = f"{self.sender}{self.payload}{self.operation_type}".encode()
+        # The ID is generated from the signed content, so it identifies the verification in the cache
+        return verify_transaction_signature(self.generate_transaction_id(), self.sender, self.get_signed_content(), self.signature)
 
-        with oqs.Signature(sigalg) as signer:
-            with oqs.Signature(sigalg) as verifier:
-                # verifier verifies the signature
-                is_valid = verifier.verify(transaction_content, signature, public_key)
+    def get_signed_content(self) -> bytes:
+        """
+        Get the content of the transaction covered by the signature.
 
-        return is_valid
+        Returns:
+        - bytes
+        """
+        return f"{self.sender}{self.payload}{self.operation_type}".encode()
             
     class Config:
         """
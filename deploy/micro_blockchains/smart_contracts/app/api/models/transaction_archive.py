@@ -0,0 +1,154 @@
+# models/transaction_archive.py
+
+import json
+import sqlite3
+
+from threading import Lock
+from pydantic import BaseModel, Field, PrivateAttr
+
+# Import the JSON serialization methods
+from app.api.methods.serialization import dumps
+
+# Columns of the archived transactions indexed for the history queries, with the creation timestamp
+INDEXED_COLUMNS = ("sender", "contract_address")
+
+class TransactionArchive(BaseModel):
+    """
+    TransactionArchive Model to keep the transactions pruned from the DAG in cold storage (a SQLite database).
+
+    Each archived transaction is stored as the JSON serialization used by the snapshot (with the IDs of all
+    its parents), indexed by its ID and its confirmation sequence number. Lookups of historical transactions
+    fall through to the archive, and a full replay of the state reads the archived transactions in sequence order.
+    The sender (account ID) and the contract address are also indexed, with the creation timestamp, for the
+    history queries.
+
+    Args:
+    - path: str: The path of the SQLite database.
+
+    Returns:
+    - TransactionArchive: A new instance of the TransactionArchive model
+    """
+    path: str = Field(default=..., description="The path of the SQLite database.")
+
+    _connection: sqlite3.Connection = PrivateAttr(default=None)
+    _lock: Lock = PrivateAttr(default_factory=Lock)
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        # The API threads read the archive while the writer archives transactions, the lock serializes them
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS transactions ("
+                "id TEXT PRIMARY KEY, "
+                "sequence INTEGER NOT NULL, "
+                "data TEXT NOT NULL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS transactions_sequence ON transactions (sequence)")
+
+            # Archives created before the history queries only have the serialized transactions
+            columns = {row[1] for row in self._connection.execute("PRAGMA table_info(transactions)")}
+            for column in INDEXED_COLUMNS + ("created",):
+                if column not in columns:
+                    self._connection.execute(f"ALTER TABLE transactions ADD COLUMN {column} TEXT")
+                    self._connection.execute(f"UPDATE transactions SET {column} = json_extract(data, '$.{column}')")
+
+            for column in INDEXED_COLUMNS:
+                self._connection.execute(f"CREATE INDEX IF NOT EXISTS transactions_{column} ON transactions ({column}, created, id)")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+    def __contains__(self, transaction_id: str) -> bool:
+        with self._lock:
+            return self._connection.execute("SELECT 1 FROM transactions WHERE id = ?", (transaction_id,)).fetchone() is not None
+
+    def add(self, transactions: list) -> None:
+        """
+        Archive transactions, in a single database transaction.
+
+        Args:
+        - transactions: list[dict]: Serialized transactions, with their sequence number
+        """
+        columns = ("id", "sequence", "data", "created") + INDEXED_COLUMNS
+        rows = [(node_data['id'], node_data['sequence'], dumps(node_data), node_data['created'])
+                + tuple(node_data[column] for column in INDEXED_COLUMNS)
+                for node_data in transactions]
+        with self._lock, self._connection:
+            self._connection.executemany(f"INSERT OR REPLACE INTO transactions ({', '.join(columns)}) "
+                                         f"VALUES ({', '.join('?' for _ in columns)})", rows)
+
+    def get(self, transaction_id: str) -> dict:
+        """
+        Get an archived transaction.
+
+        Args:
+        - transaction_id: str
+
+        Returns:
+        - dict: The serialized transaction, or None if it is not archived
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT data FROM transactions WHERE id = ?", (transaction_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def read(self, after_sequence: int = 0) -> list:
+        """
+        Read the archived transactions in confirmation sequence order.
+
+        Args:
+        - after_sequence: int: Only the transactions with a greater sequence number are returned
+
+        Returns:
+        - list[dict]: The serialized transactions
+        """
+        with self._lock:
+            rows = self._connection.execute("SELECT data FROM transactions WHERE sequence > ? ORDER BY sequence",
+                                            (after_sequence,)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def read_by(self, column: str, value: str, after: tuple = None, limit: int = 100) -> list:
+        """
+        Read the archived transactions with a value in an indexed column, in (created, ID) order.
+
+        Args:
+        - column: str: One of INDEXED_COLUMNS
+        - value: str
+        - after: tuple: Only the transactions after this (created, transaction ID) are returned (all if None)
+        - limit: int
+
+        Returns:
+        - list[dict]: The serialized transactions
+        """
+        if column not in INDEXED_COLUMNS:
+            raise ValueError(f"The column {column} is not indexed")
+
+        query = f"SELECT data FROM transactions WHERE {column} = ?"
+        parameters = [value]
+        if after is not None:
+            # The creation timestamps are stored in ISO format, so they are compared as strings
+            query += " AND (created, id) > (?, ?)"
+            parameters += [after[0].isoformat(), after[1]]
+        query += " ORDER BY created, id LIMIT ?"
+        parameters.append(limit)
+
+        with self._lock:
+            rows = self._connection.execute(query, parameters).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def close(self) -> None:
+        """
+        Close the database connection.
+        """
+        with self._lock:
+            self._connection.close()
+
+    class Config:
+        """
+        Pydantic configuration for the TransactionArchive model.
+
+        Args:
+        - arbitrary_types_allowed: bool
+        """
+        arbitrary_types_allowed = True
@@ -0,0 +1,155 @@
+# models/transaction_index.py
+
+from bisect import bisect_right, insort
+from datetime import datetime
+from pydantic import BaseModel, Field
+
+def encode_cursor(created: datetime, transaction_id: str) -> str:
+    """
+    Encode the position of a transaction in a history query as a pagination cursor.
+
+    Args:
+    - created: datetime
+    - transaction_id: str
+
+    Returns:
+    - str
+    """
+    return f"{created.isoformat()}_{transaction_id}"
+
+def decode_cursor(cursor: str) -> tuple:
+    """
+    Decode a pagination cursor created by encode_cursor.
+
+    Args:
+    - cursor: str
+
+    Returns:
+    - tuple: (created, transaction ID)
+
+    Raises:
+    - ValueError: If the cursor is not valid
+    """
+    created, separator, transaction_id = cursor.rpartition("_")
+    if not separator or not transaction_id:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return datetime.fromisoformat(created), transaction_id
+
+class TransactionIndex(BaseModel):
+    """
+    TransactionIndex Model: secondary indexes of the transactions of the DAG by the value of some attributes
+    (e.g. sender_id or contract_address).
+
+    For every attribute and value, the index keeps the (created, transaction ID) entries of the transactions
+    sorted, so a page of the history of a sender (or a contract) is found with a binary search and costs
+    O(log n + page size), without scanning the DAG. The index is kept up to date on every node insertion,
+    removal and pruning; pruned transactions are looked up in the archive.
+
+    Args:
+    - attributes: tuple: The indexed attributes of the records.
+    - entries: dict: The sorted (created, transaction ID) entries by attribute and value.
+
+    Returns:
+    - TransactionIndex: A new instance of the TransactionIndex model
+    """
+    attributes: tuple = Field(default=("sender_id",), description="The indexed attributes of the records.")
+    entries: dict = Field(default_factory=dict, description="The sorted (created, transaction ID) entries by attribute and value.")
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        for attribute in self.attributes:
+            self.entries.setdefault(attribute, {})
+
+    def add(self, record) -> None:
+        """
+        Index a transaction by the values of its attributes. Indexing a transaction again only adds the
+        values it did not have (e.g. the contract address set when a deployment is processed).
+
+        Args:
+        - record: TransactionRecord
+        """
+        entry = (record.created, record.id)
+        for attribute in self.attributes:
+            value = getattr(record, attribute)
+            if value is None:
+                continue
+
+            values = self.entries[attribute].setdefault(value, [])
+            # New transactions are usually the most recent ones, so they are appended
+            if not values or values[-1] < entry:
+                values.append(entry)
+            elif self.find(values, entry) is None:
+                insort(values, entry)
+
+    def discard(self, record) -> None:
+        """
+        Remove a transaction from the index (removed from the DAG or pruned).
+
+        Args:
+        - record: TransactionRecord
+        """
+        entry = (record.created, record.id)
+        for attribute in self.attributes:
+            value = getattr(record, attribute)
+            values = self.entries[attribute].get(value)
+            if values is None:
+                continue
+
+            position = self.find(values, entry)
+            if position is not None:
+                del values[position]
+            if not values:
+                del self.entries[attribute][value]
+
+    def find(self, values: list, entry: tuple) -> int:
+        """
+        Find the position of an entry in a sorted list of entries.
+
+        Args:
+        - values: list
+        - entry: tuple
+
+        Returns:
+        - int: The position, or None if the entry is not in the list
+        """
+        position = bisect_right(values, entry) - 1
+        if position >= 0 and values[position] == entry:
+            return position
+        return None
+
+    def page(self, attribute: str, value: str, after: tuple = None, limit: int = 100) -> list:
+        """
+        Get the entries of the transactions with a value, in (created, transaction ID) order.
+
+        Args:
+        - attribute: str
+        - value: str
+        - after: tuple: Only the entries after this (created, transaction ID) are returned (all if None)
+        - limit: int
+
+        Returns:
+        - list[tuple]: The (created, transaction ID) entries
+        """
+        values = self.entries[attribute].get(value, [])
+        start = bisect_right(values, after) if after is not None else 0
+        return values[start:start + limit]
+
+    def rebuild(self, store) -> None:
+        """
+        Rebuild the index from the transactions of the DAG, e.g. after loading the DAG from disk.
+
+        Args:
+        - store: LedgerStore
+        """
+        for attribute in self.attributes:
+            self.entries[attribute] = {}
+
+        for record in store.records():
+            for attribute in self.attributes:
+                value = getattr(record, attribute)
+                if value is not None:
+                    self.entries[attribute].setdefault(value, []).append((record.created, record.id))
+
+        for values_by_key in self.entries.values():
+            for values in values_by_key.values():
+                values.sort()
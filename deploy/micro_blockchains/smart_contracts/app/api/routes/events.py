@@ -0,0 +1,115 @@
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+
+# 
+from app.api.config.env import EVENT_STREAM_HEARTBEAT_INTERVAL
+from app.api.config.logger import logger
+from app.api.config.dag import dag
+
+from app.api.models.event_broker import EVENT_TYPES, EventSubscription
+from app.api.models.responses import ResponseError
+
+from app.api.methods.errors import handle_error
+from app.api.methods.wallets import get_account_id
+
+router = APIRouter()
+
+def parse_event_types(types: str) -> set:
+    """
+    Parse the comma-separated event types of a request.
+
+    Args:
+    - types: str
+
+    Returns:
+    - set: The event types (empty for all of them)
+
+    Raises:
+    - HTTPException: 400 if an event type is not valid
+    """
+    if not types:
+        return set()
+
+    event_types = {event_type.strip() for event_type in types.split(",") if event_type.strip()}
+    invalid_event_types = event_types.difference(EVENT_TYPES)
+    if invalid_event_types:
+        raise HTTPException(status_code=400, detail=f"Invalid event types: {', '.join(sorted(invalid_event_types))}. Valid types: {', '.join(EVENT_TYPES)}.")
+    return event_types
+
+async def stream_events(subscription: EventSubscription, replay: list):
+    """
+    Stream the events of a subscription as server-sent events. The stream is cancelled by the StreamingResponse
+    when the client disconnects.
+
+    A keep-alive comment is sent when there are no events, so proxies don't close the connection. If the
+    client doesn't keep up with the events, a lagged event is sent and the stream is closed: the client
+    reconnects with the Last-Event-ID header and gets the missed events from the history.
+
+    Args:
+    - subscription: EventSubscription
+    - replay: list: The messages to send first (events missed since the Last-Event-ID)
+    """
+    try:
+        for message in replay:
+            yield message
+
+        while True:
+            try:
+                message = await subscription.get(EVENT_STREAM_HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+
+            if message is None:
+                yield "event: lagged\ndata: {}\n\n"
+                return
+            yield message
+    finally:
+        dag.event_broker.unsubscribe(subscription)
+
+# Endpoint to stream the events of the transactions
+@router.get('/', 
+            status_code=status.HTTP_200_OK, 
+            tags=["EVENTS"],
+            responses={
+                500: {"model": ResponseError, "description": "Internal server error."},
+                400: {"model": ResponseError, "description": "An event type is not valid."},
+                200: {"content": {"text/event-stream": {}}, "description": "The stream of the events (server-sent events)."}
+            })
+async def get_events(request: Request, sender: str = None, contract_address: str = None, types: str = None, last_event_id: str = None):
+    """
+    Stream the events of the transactions as server-sent events: accepted (added to the DAG), rejected
+    (not valid), confirmed, processed (with the result of the smart contract function) and failed (with the error).
+
+    The events can be filtered by sender (public key), by smart contract and by type (comma-separated). The
+    events of a deployment only have the address of the smart contract once it is processed. A client that
+    reconnects sends the ID of the last event it received (Last-Event-ID header, or the last_event_id parameter)
+    and gets the events it missed, if they are still in the history.
+
+    Args:
+    - request: Request
+    - sender: str: The public key of the sender
+    - contract_address: str
+    - types: str: The comma-separated event types (all if None)
+    - last_event_id: str
+
+    Returns:
+    - StreamingResponse: The stream of the events
+    """
+    try:
+        event_types = parse_event_types(types)
+        filters = {"sender_id": get_account_id(sender) if sender else None, "contract_address": contract_address}
+
+        subscription, replay = dag.event_broker.subscribe(filters, event_types, request.headers.get("last-event-id") or last_event_id)
+        logger.info(f"Event stream opened ({dag.event_broker.subscriptions_count()} subscriptions)")
+
+        return StreamingResponse(stream_events(subscription, replay),
+                                 media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    except HTTPException:
+        # This is to ensure HTTPException is not caught in the generic Exception
+        raise
+    except Exception as e:
+        handle_error(e, logger)
@@ -1,20 +1,39 @@
 import logging
 
-from fastapi import APIRouter, HTTPException, Request, status
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi import Response as HTTPResponse
 from slowapi.errors import RateLimitExceeded
 
 # 
-from app.api.config.env import API_NAME
+from app.api.config.env import API_NAME, SMART_CONTRACTS_PAGE_MAX_SIZE
 from app.api.config.limiter import limiter
 from app.api.config.logger import logger
 from app.api.config.dag import dag
 
-from app.api.models.responses import Response, ResponseError
+from app.api.models.responses import Response, ResponseError, FastJSONResponse
 
 from app.api.methods.errors import handle_error
 
 router = APIRouter()
 
+def is_etag_matched(request: Request, etag: str) -> bool:
+    """
+    Check if the If-None-Match header of a request matches an ETag (weak comparison).
+
+    Args:
+    - request: Request
+    - etag: str
+
+    Returns:
+    - bool
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in tags]
+
 # Endpoint to get the smart contracts
 @router.get('/', 
             response_model=Response[dict], 
@@ -23,25 +42,50 @@ router = APIRouter()
             responses={
                 500: {"model": ResponseError, "description": "Internal server error."},
                 429: {"model": ResponseError, "description": "Too many requests."},
+                304: {"description": "The smart contracts of the page did not change (If-None-Match)."},
                 200: {"model": Response[dict], "description": "The smart contracts were retrieved successfully."}
             })
 #@limiter.limit("5/minute")
-def get_smart_contracts(request: Request):
+def get_smart_contracts(request: Request, cursor: str = None,
+                        limit: int = Query(default=SMART_CONTRACTS_PAGE_MAX_SIZE, ge=1, le=SMART_CONTRACTS_PAGE_MAX_SIZE),
+                        exclude_bytecode: bool = False, exclude_state: bool = False):
     """
-    Endpoint to get the smart contracts.
-    
+    Endpoint to get a page of the smart contracts, in address order.
+
+    The smart contracts are paginated with a cursor: the next_cursor of a page is sent as the cursor
+    of the request of the next page, and it is None in the last page. The bytecode and the state of
+    the smart contracts can be excluded. The response has an ETag built from the versions of the
+    smart contracts of the page: if it matches the If-None-Match header, 304 is returned.
+
     Args:
     - request: Request
-    
+    - cursor: str
+    - limit: int
+    - exclude_bytecode: bool
+    - exclude_state: bool
+
     Returns:
-    - Response[dict]: The smart contracts were retrieved successfully.
+    - Response[dict]: The smart contracts of the page (by address) and the next_cursor.
     """
     try:
-        # Get the smart contracts
-        smart_contracts = dag.python_virtual_machine.get_smart_contracts()
-        
-        # Return the smart contracts
-        return Response(data=smart_contracts, message="The smart contracts were retrieved successfully.")
+        # Get the smart contracts from the last published view
+        view = dag.view
+        contract_addresses, next_cursor = view.get_smart_contracts_page(cursor, limit)
+
+        # The ETag only depends on the versions of the smart contracts, nothing is serialized to compare it
+        excluded_fields = {field for field, excluded in (("bytecode", exclude_bytecode), ("state", exclude_state)) if excluded}
+        etag = view.get_etag(contract_addresses, next_cursor, sorted(excluded_fields))
+        if is_etag_matched(request, etag):
+            return HTTPResponse(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        # The states are only copied if they are returned
+        smart_contracts = {contract_address: view.get_smart_contract(contract_address, include_state=not exclude_state).dict(exclude=excluded_fields)
+                           for contract_address in contract_addresses}
+
+        # Return the smart contracts, serialized once, without the validation and the jsonable_encoder pass of FastAPI
+        return FastJSONResponse.from_response(Response(data={"smart_contracts": smart_contracts, "next_cursor": next_cursor},
+                                                       message="The smart contracts were retrieved successfully."),
+                                              headers={"ETag": etag})
     except RateLimitExceeded:
         raise HTTPException(status_code=429, detail="Too many requests.")
     except HTTPException:
@@ -50,6 +94,47 @@ def get_smart_contracts(request: Request):
     except Exception as e:
         handle_error(e, logger)
 
+# Endpoint to get the gas used by the smart contracts (declared before /{contract_address}/, which would match it)
+@router.get('/gas/', 
+            response_model=Response[dict], 
+            status_code=status.HTTP_200_OK, 
+            tags=["WALLETS"],
+            responses={
+                500: {"model": ResponseError, "description": "Internal server error."},
+                429: {"model": ResponseError, "description": "Too many requests."},
+                200: {"model": Response[dict], "description": "The gas usage of the smart contracts was retrieved successfully."}
+            })
+#@limiter.limit("5/minute")
+def get_gas_usage(request: Request, contract_address: str = None,
+                  limit: int = Query(default=SMART_CONTRACTS_PAGE_MAX_SIZE, ge=1, le=SMART_CONTRACTS_PAGE_MAX_SIZE)):
+    """
+    Endpoint to get the gas used by the calls to the smart contracts since the node started, the most expensive
+    smart contracts first: the calls, the total, average and maximum gas used by a call, and the calls that ran out of gas.
+
+    Args:
+    - request: Request
+    - contract_address: str: Only get the gas usage of this smart contract
+    - limit: int: The smart contracts returned
+
+    Returns:
+    - Response[dict]: The gas usage of the smart contracts was retrieved successfully.
+    """
+    try:
+        # The usage of each contract is replaced by the writer, a copy of the registry is consistent
+        gas_usage = dict(dag.gas_usage)
+        if contract_address is not None:
+            gas_usage = {contract_address: gas_usage[contract_address]} if contract_address in gas_usage else {}
+
+        contracts = sorted(gas_usage.items(), key=lambda item: item[1]["gas_used"], reverse=True)[:limit]
+        contracts = [{"contract_address": address, **usage, "average_gas_used": usage["gas_used"] / usage["calls"]}
+                     for address, usage in contracts]
+
+        return Response(data={"contracts": contracts, "total": len(gas_usage)}, message=f"The gas usage of {len(contracts)} smart contracts was retrieved successfully.")
+    except RateLimitExceeded:
+        raise HTTPException(status_code=429, detail="Too many requests.")
+    except Exception as e:
+        handle_error(e, logger)
+
 # Endpoint to get a smart contract by its address
 @router.get('/{contract_address}/', 
             response_model=Response[dict], 
@@ -58,27 +143,39 @@ def get_smart_contracts(request: Request):
             responses={
                 500: {"model": ResponseError, "description": "Internal server error."},
                 429: {"model": ResponseError, "description": "Too many requests."},
+                404: {"model": ResponseError, "description": "The smart contract was not found."},
+                304: {"description": "The smart contract did not change (If-None-Match)."},
                 200: {"model": Response[dict], "description": "The smart contract was retrieved successfully."}
             })
 #@limiter.limit("5/minute")
-def get_smart_contract(contract_address: str, request: Request):
+def get_smart_contract(contract_address: str, request: Request, response: HTTPResponse):
     """
     Endpoint to get a smart contract by its address.
     
+    The response has an ETag built from the version of the smart contract: if it matches
+    the If-None-Match header, 304 is returned.
+
     Args:
     - contract_address: str
     - request: Request
-    
+    - response: HTTPResponse
+
     Returns:
     - Response[dict]: The smart contract was retrieved successfully.
     """
     try:
-        # Get the smart contract
-        smart_contract = dag.python_virtual_machine.get_smart_contract(contract_address)
-        
-        if len(smart_contract) == 0:
+        # Get the smart contract from the last published view
+        view = dag.view
+        smart_contract = view.get_smart_contract(contract_address)
+
+        if not smart_contract:
             raise HTTPException(status_code=404, detail="The smart contract was not found.")
 
+        etag = view.get_etag([contract_address])
+        if is_etag_matched(request, etag):
+            return HTTPResponse(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+
         # Return the smart contract
         return Response(data=smart_contract, message="The smart contract was retrieved successfully.")
     except RateLimitExceeded:
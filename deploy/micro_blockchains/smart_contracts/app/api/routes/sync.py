@@ -0,0 +1,96 @@
+from fastapi import APIRouter, Body, HTTPException, Request, status
+
+# 
+from app.api.config.env import SYNC_BATCH_SIZE
+from app.api.config.logger import logger
+from app.api.config.dag import dag
+
+from app.api.models.responses import Response, ResponseError, FastJSONResponse
+
+from app.api.methods.errors import handle_error
+
+router = APIRouter()
+
+# Endpoint to get the tips of the DAG
+@router.get('/tips/', 
+            response_model=Response[dict], 
+            status_code=status.HTTP_200_OK, 
+            tags=["SYNC"], 
+            responses={
+                500: {"model": ResponseError, "description": "Internal server error."},
+                200: {"model": Response[dict], "description": "The tips of the DAG."}
+            })
+def get_tips(request: Request):
+    """
+    Get the tips of the DAG (the transactions without approvals). The peers request the tips
+    they don't have, and walk back their parents, to pull the transactions they are missing.
+
+    Returns:
+    - dict: The IDs of the tips
+    """
+    try:
+        tips = dag.get_tips()
+        return Response(data={"tips": tips}, message=f"{len(tips)} tips were retrieved successfully.")
+    except Exception as e:
+        handle_error(e, logger)
+
+# Endpoint to get transactions by their IDs
+@router.post('/transactions/', 
+            response_model=Response[list], 
+            status_code=status.HTTP_200_OK, 
+            tags=["SYNC"], 
+            responses={
+                500: {"model": ResponseError, "description": "Internal server error."},
+                413: {"model": ResponseError, "description": "Too many transactions requested."},
+                200: {"model": Response[list], "description": "The transactions found."}
+            })
+def get_transactions(request: Request, ids: list[str] = Body(..., embed=True)):
+    """
+    Get transactions of the DAG (or of the archive, if they were pruned) by their IDs, with their parents.
+    The transactions that are not found are left out.
+
+    Args:
+    - ids: list[str]: The IDs of the transactions
+
+    Returns:
+    - list[dict]: The transactions found
+    """
+    try:
+        if len(ids) > SYNC_BATCH_SIZE:
+            raise HTTPException(status_code=413, detail=f"No more than {SYNC_BATCH_SIZE} transactions can be requested at once.")
+
+        transactions = []
+        for transaction_id in ids:
+            transaction = dag.get_transaction(transaction_id)
+            if transaction is not None:
+                transactions.append(transaction.dict())
+
+        # The batches are serialized once, without the validation and the jsonable_encoder pass of FastAPI
+        return FastJSONResponse.from_response(Response(data=transactions, message=f"{len(transactions)} of {len(ids)} transactions were retrieved successfully."))
+    except HTTPException:
+        # This is to ensure HTTPException is not caught in the generic Exception
+        raise
+    except Exception as e:
+        handle_error(e, logger)
+
+# Endpoint to get the status of the synchronization with the peers
+@router.get('/status/', 
+            response_model=Response[dict], 
+            status_code=status.HTTP_200_OK, 
+            tags=["SYNC"], 
+            responses={
+                500: {"model": ResponseError, "description": "Internal server error."},
+                200: {"model": Response[dict], "description": "The status of the synchronization."}
+            })
+def get_sync_status(request: Request):
+    """
+    Get the result of the last synchronization with each peer.
+
+    Returns:
+    - dict: The peers and the status of their last synchronization
+    """
+    try:
+        peers_status = dict(dag.peer_sync.peers_status) if dag.peer_sync is not None else {}
+        return Response(data={"peers": peers_status, "transactions": len(dag.store)}, message="The status of the synchronization was retrieved successfully.")
+    except Exception as e:
+        handle_error(e, logger)
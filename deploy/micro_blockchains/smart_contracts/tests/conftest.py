@@ -0,0 +1,84 @@
+# tests/conftest.py
+
+import os
+import tempfile
+
+import oqs
+import pytest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.methods.wallets import encode
+
+def generate_keys() -> tuple:
+    """
+    Generate a Dilithium key pair.
+
+    Returns:
+    - tuple: (public key, private key), Base64 encoded
+    """
+    with oqs.Signature("Dilithium2") as signer:
+        public_key = signer.generate_keypair()
+        return encode(public_key), encode(signer.export_secret_key())
+
+# The environment of the service is read when its modules are imported, so it is set first.
+# The calls and the signatures are executed in the test process.
+os.environ["GENESIS_PUBLIC_KEY"], os.environ["GENESIS_PRIVATE_KEY"] = generate_keys()
+os.environ.setdefault("API_NAME", "smart_contracts")
+os.environ.setdefault("CONTRACT_EXECUTION_WORKERS", "0")
+os.environ.setdefault("SIGNATURE_VERIFICATION_WORKERS", "1")
+
+from app.api.models.dag import DAGBlockchain
+
+# The DAG created when the routes are imported (app.api.config.dag) is persisted in a temporary directory,
+# and no DAG sends ghost transactions
+shared_directory = tempfile.mkdtemp()
+DAGBlockchain.get_shared_file_path = lambda self, file_name: os.path.join(shared_directory, file_name)
+DAGBlockchain.start_ghost_transactions = lambda self: None
+
+from app.api.config.env import API_NAME
+from app.api.config.limiter import limiter
+from app.api.models.responses import FastJSONResponse
+import app.api.routes.smart_contracts as smart_contracts_routes
+import app.api.routes.transactions as transactions_routes
+
+@pytest.fixture
+def keys() -> tuple:
+    """
+    The key pair of a sender.
+    """
+    return generate_keys()
+
+@pytest.fixture
+def create_keys():
+    """
+    Generate the key pairs of more senders.
+    """
+    return generate_keys
+
+@pytest.fixture
+def create_dag(tmp_path, monkeypatch):
+    """
+    Create DAGs persisted in the temporary directory of the test: a new DAG loads the one persisted before.
+    """
+    monkeypatch.setattr(DAGBlockchain, "get_shared_file_path", lambda self, file_name: str(tmp_path / file_name))
+    return DAGBlockchain
+
+@pytest.fixture
+def create_client(monkeypatch):
+    """
+    Create a client of the routes serving a DAG. The routes are served without the middlewares of app.app
+    and without rate limits.
+    """
+    monkeypatch.setattr(limiter, "enabled", False)
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.include_router(smart_contracts_routes.router, prefix=f'/api/v1/{API_NAME}')
+    app.include_router(transactions_routes.router, prefix=f'/api/v1/{API_NAME}/transactions')
+
+    def create(dag) -> TestClient:
+        monkeypatch.setattr(smart_contracts_routes, "dag", dag)
+        monkeypatch.setattr(transactions_routes, "dag", dag)
+        return TestClient(app)
+
+    return create
@@ -0,0 +1,59 @@
+# tests/test_contract_scheduler.py
+
+from datetime import datetime
+
+import pytest
+
+from app.api.models.contract_scheduler import ContractExecutionScheduler
+from app.api.models.python_virtual_machine import PythonVirtualMachine
+
+CONTRACT = """
+def add(n):
+    state.setdefault("items", []).append(n)
+    return n
+
+def spin(n):
+    state.setdefault("items", []).append(-n)
+    while True:
+        state["items"].append(0)
+"""
+
+def test_calls_out_of_gas_are_rolled_back():
+    python_virtual_machine = PythonVirtualMachine()
+    contract_address = python_virtual_machine.deploy_contract(CONTRACT, datetime.utcnow())
+    scheduler = ContractExecutionScheduler(workers=0, snapshot_interval=2)
+
+    calls = []
+    for number in range(5):
+        calls.append((contract_address, "add", [number], {}, 1000))
+        calls.append((contract_address, "spin", [number], {}, 1000))
+    results = scheduler.execute(python_virtual_machine, calls)
+
+    assert [status for status, _, _ in results] == ["ok", "out_of_gas"] * 5
+    assert python_virtual_machine.deployed_smart_contracts[contract_address].state == {"items": [0, 1, 2, 3, 4]}
+
+@pytest.mark.parametrize("contract", [
+    "def f():\n    try:\n        pass\n    except:\n        pass\n",
+    "def f():\n    try:\n        pass\n    except (ValueError, BaseException):\n        pass\n",
+    "Caught = BaseException\n",
+    "def f():\n    try:\n        pass\n    finally:\n        pass\n",
+])
+def test_contracts_that_catch_out_of_gas_are_rejected(contract):
+    with pytest.raises(ValueError):
+        PythonVirtualMachine().deploy_contract(contract, datetime.utcnow())
+
+def test_states_resident_in_workers_are_read_back():
+    python_virtual_machine = PythonVirtualMachine()
+    contract_address = python_virtual_machine.deploy_contract(CONTRACT, datetime.utcnow())
+    scheduler = ContractExecutionScheduler(workers=1, snapshot_interval=2)
+
+    for number in range(5):
+        scheduler.execute(python_virtual_machine, [(contract_address, "add", [number], {}, 1000),
+                                                   (contract_address, "spin", [number], {}, 1000)])
+
+    assert scheduler.get_state(python_virtual_machine, contract_address) == {"items": [0, 1, 2, 3, 4]}
+
+    # A state replaced in the API process is loaded again in the worker
+    python_virtual_machine.deployed_smart_contracts[contract_address].state = {"items": [9]}
+    scheduler.execute(python_virtual_machine, [(contract_address, "add", [10], {}, 1000)])
+    assert scheduler.get_state(python_virtual_machine, contract_address) == {"items": [9, 10]}
@@ -0,0 +1,80 @@
+# tests/test_dag.py
+
+from datetime import datetime, timedelta
+
+import pytest
+
+import app.api.models.dag as dag_module
+from app.api.models.python_virtual_machine import PythonVirtualMachine
+from app.api.methods.wallets import get_account_id
+from app.api.models.transaction import TransactionCreate, OperationType
+
+CONTRACT = """
+def add(n):
+    state["total"] = state.get("total", 0) + n
+    return n
+"""
+
+def sign(keys: tuple, created: datetime, payload, operation_type: OperationType, contract_address: str = None) -> TransactionCreate:
+    public_key, private_key = keys
+    transaction = TransactionCreate(sender=public_key, payload=payload, operation_type=operation_type,
+                                    contract_address=contract_address, created=created)
+    transaction.sign_transaction(private_key)
+    return transaction
+
+def test_buffered_transactions_are_persisted_on_shutdown(create_dag, keys):
+    dag = create_dag()
+    created = datetime.utcnow()
+    for number in range(3):
+        assert dag.add_transaction(sign(keys, created + timedelta(microseconds=number), f"{CONTRACT}\n# {number}", OperationType.DEPLOY))
+
+    # The transactions are still buffered by the storage backend (DAG_LOG_FSYNC_BATCH_SIZE)
+    dag.shutdown()
+
+    transactions, _ = create_dag().get_transactions_by_sender(keys[0])
+    assert len(transactions) == 3
+
+FAILING_CONTRACT = """
+def add(n):
+    if n % 3 == 0:
+        raise ValueError("multiple of 3")
+    state["total"] = state.get("total", 0) + n
+    return n
+"""
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+@pytest.mark.parametrize("checkpoint", [False, True])
+def test_replay_reproduces_the_live_state(create_dag, keys, create_keys, monkeypatch, backend, checkpoint):
+    monkeypatch.setattr(dag_module, "LEDGER_STORAGE_BACKEND", backend)
+    dag = create_dag()
+    other_keys = create_keys()
+    created = datetime.utcnow()
+
+    deployment = sign(keys, created, FAILING_CONTRACT, OperationType.DEPLOY)
+    assert dag.add_transaction(deployment)
+    contract_address = PythonVirtualMachine().deploy_contract(FAILING_CONTRACT, deployment.created)
+
+    # Calls from two senders, a third of them fail (the last one of each sender too), then calls from a
+    # third sender that confirm them
+    filler_keys = create_keys()
+    for number in range(1, 41):
+        sender_keys = filler_keys if number > 30 else keys if number % 2 else other_keys
+        call = sign(sender_keys, created + timedelta(seconds=1, microseconds=number),
+                    {"function_signature": "add", "args": [number], "kwargs": {}}, OperationType.CALL, contract_address)
+        assert dag.add_transaction(call)
+
+    assert {get_account_id(keys[0]), get_account_id(other_keys[0])} <= set(dag.failed_nonces)
+    live_nonces = dict(dag.nonce_registry)
+    live_sequences = {record.id: record.sequence for record in dag.store.records()}
+    live_state = dag.view.get_smart_contract(contract_address).state
+    assert live_state["total"] > 0
+
+    dag.persist()
+    if checkpoint:
+        with dag._processing_lock, dag._lock:
+            dag.storage.save_checkpoint(dag.get_state_checkpoint())
+
+    replayed_dag = create_dag()
+    assert replayed_dag.nonce_registry == live_nonces
+    assert {record.id: record.sequence for record in replayed_dag.store.records()} == live_sequences
+    assert replayed_dag.view.get_smart_contract(contract_address).state == live_state
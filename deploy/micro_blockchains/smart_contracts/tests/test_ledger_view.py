@@ -0,0 +1,25 @@
+# tests/test_ledger_view.py
+
+import copy
+
+from app.api.models.ledger_view import LedgerView, ViewSmartContract
+
+def test_states_are_copied_once_and_kept_by_the_view():
+    state = {"items": [1]}
+    loads = []
+
+    def load_state():
+        loads.append(1)
+        return copy.deepcopy(state)
+
+    view = LedgerView().with_smart_contracts({"address": ViewSmartContract(bytecode="code", load_state=load_state)}, None)
+    assert view.get_smart_contract("address", include_state=False).state == {}
+    assert not loads
+
+    # The writer copies the state before changing it
+    view.copy_smart_contracts(["address", "missing"])
+    state["items"].append(2)
+
+    assert view.get_smart_contract("address").state == {"items": [1]}
+    assert view.get_smart_contract("missing") == {}
+    assert len(loads) == 1
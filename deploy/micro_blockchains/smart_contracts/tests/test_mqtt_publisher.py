@@ -0,0 +1,41 @@
+# tests/test_mqtt_publisher.py
+
+import time
+
+from types import SimpleNamespace
+from threading import Thread
+
+import app.api.models.mqtt_publisher as mqtt_publisher
+from app.api.models.mqtt_publisher import MQTTPublisher
+
+class FakeClient:
+    def __init__(self):
+        self.messages = []
+
+    def publish(self, topic, payload, qos=0, retain=False):
+        self.messages.append((topic, payload, retain))
+        return SimpleNamespace(rc=0, wait_for_publish=lambda timeout=None: None)
+
+class Voting:
+    def __init__(self, name: str):
+        self.name = name
+
+def test_objects_are_published_and_unserializable_payloads_are_reported(monkeypatch):
+    monkeypatch.setattr(mqtt_publisher, "mqtt", SimpleNamespace(MQTT_ERR_SUCCESS=0, MQTT_ERR_NO_CONN=4))
+    publisher = MQTTPublisher(topic_prefix="smart_contracts")
+    publisher._client = FakeClient()
+    publisher._connected.set()
+
+    publisher.publish("contracts/address/state", {"state": {"votings": [Voting("budget")]}}, retain=True)
+    publisher.publish("contracts/other/state", {"state": {"value": object()}}, retain=True)
+
+    sender = Thread(target=publisher.run_sender, daemon=True)
+    sender.start()
+    for _ in range(100):
+        if len(publisher._client.messages) + publisher.unserializable == 2:
+            break
+        time.sleep(0.01)
+
+    assert publisher._client.messages == [("smart_contracts/contracts/address/state", b'{"state":{"votings":[{"name":"budget"}]}}', True)]
+    assert publisher.unserializable == 1
+    assert publisher.dropped == 0
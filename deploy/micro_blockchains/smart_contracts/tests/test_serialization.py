@@ -0,0 +1,26 @@
+# tests/test_serialization.py
+
+import json
+
+import pytest
+
+from app.api.methods.serialization import dumps, dumps_bytes
+
+class Voting:
+    def __init__(self, name: str, voters: dict):
+        self.name = name
+        self.voters = voters
+        self.options = {"yes", "no"}
+
+def test_custom_class_instances_are_encoded_from_their_attributes():
+    state = {"votings": {"1": Voting("budget", {"voter-1": 1})}}
+
+    encoded = json.loads(dumps(state))
+
+    assert encoded["votings"]["1"]["name"] == "budget"
+    assert encoded["votings"]["1"]["voters"] == {"voter-1": 1}
+    assert sorted(encoded["votings"]["1"]["options"]) == ["no", "yes"]
+
+def test_objects_without_attributes_are_not_serializable():
+    with pytest.raises(TypeError):
+        dumps_bytes({"value": object()})
@@ -0,0 +1,115 @@
+# tests/test_smart_contracts_routes.py
+
+from datetime import datetime, timedelta
+
+from app.api.config.env import API_NAME, GENESIS_PUBLIC_KEY, GENESIS_PRIVATE_KEY
+from app.api.models.transaction import TransactionCreate, OperationType
+from app.api.methods.wallets import encode
+
+API_PATH = f"/api/v1/{API_NAME}"
+
+CONTRACT = """
+def add(n):
+    state["total"] = state.get("total", 0) + n
+    return n
+"""
+
+class Sender:
+    """
+    Sign transactions with increasing created timestamps, so they never repeat.
+    """
+    def __init__(self, keys: tuple):
+        self.keys = keys
+        self.created = datetime.utcnow()
+
+    def add(self, dag, payload, operation_type: OperationType, contract_address: str = None, keys: tuple = None) -> TransactionCreate:
+        public_key, private_key = keys or self.keys
+        self.created += timedelta(microseconds=1)
+        transaction = TransactionCreate(sender=public_key, payload=payload, operation_type=operation_type,
+                                        contract_address=contract_address, created=self.created)
+        transaction.sign_transaction(private_key)
+        assert dag.add_transaction(transaction)
+        return transaction
+
+    def deploy(self, dag, number: int) -> None:
+        self.add(dag, f"{CONTRACT}\n# {number}", OperationType.DEPLOY)
+
+    def call(self, dag, contract_address: str, number: int) -> None:
+        self.add(dag, {"function_signature": "add", "args": [number], "kwargs": {}}, OperationType.CALL, contract_address)
+
+    def confirm(self, dag, count: int = 8) -> None:
+        """
+        Add ghost transactions (empty calls of the GENESIS wallet) that confirm the transactions added before.
+        """
+        for _ in range(count):
+            self.add(dag, encode(b""), OperationType.CALL, keys=(GENESIS_PUBLIC_KEY, GENESIS_PRIVATE_KEY))
+
+def get_contract_addresses(dag) -> list:
+    return sorted(record.contract_address for record in dag.store.records() if record.contract_address is not None)
+
+def test_smart_contract_etag_changes_with_its_state(create_dag, create_client, keys):
+    dag = create_dag()
+    client = create_client(dag)
+    sender = Sender(keys)
+
+    sender.deploy(dag, 0)
+    sender.confirm(dag)
+    contract_address = get_contract_addresses(dag)[0]
+
+    response = client.get(f"{API_PATH}/{contract_address}/")
+    assert response.status_code == 200
+    assert response.json()["data"]["bytecode"]
+    assert response.json()["data"]["state"] == {}
+    etag = response.headers["ETag"]
+
+    response = client.get(f"{API_PATH}/{contract_address}/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+    # A call changes the state, the ETag of the smart contract changes
+    sender.call(dag, contract_address, 5)
+    sender.confirm(dag)
+
+    response = client.get(f"{API_PATH}/{contract_address}/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["data"]["state"] == {"total": 5}
+    assert response.headers["ETag"] != etag
+
+    assert client.get(f"{API_PATH}/missing/").status_code == 404
+
+def test_smart_contracts_are_paged_and_projected(create_dag, create_client, keys):
+    dag = create_dag()
+    client = create_client(dag)
+    sender = Sender(keys)
+
+    for number in range(5):
+        sender.deploy(dag, number)
+    sender.confirm(dag)
+    contract_addresses = get_contract_addresses(dag)
+    assert len(contract_addresses) == 5
+
+    # Pages of two smart contracts, in address order, the last one without next_cursor
+    addresses = []
+    cursor = None
+    for _ in range(len(contract_addresses)):
+        params = {"limit": 2, "exclude_bytecode": True}
+        if cursor is not None:
+            params["cursor"] = cursor
+        page = client.get(f"{API_PATH}/", params=params).json()["data"]
+        for smart_contract in page["smart_contracts"].values():
+            assert "bytecode" not in smart_contract and "state" in smart_contract
+        addresses.extend(page["smart_contracts"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert cursor is None
+    assert addresses == contract_addresses
+
+    # The projection is part of the ETag of the page
+    response = client.get(f"{API_PATH}/", params={"exclude_state": True})
+    assert all(set(smart_contract) == {"bytecode"} for smart_contract in response.json()["data"]["smart_contracts"].values())
+    etag = response.headers["ETag"]
+
+    assert client.get(f"{API_PATH}/", params={"exclude_state": True}, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(f"{API_PATH}/", headers={"If-None-Match": etag}).status_code == 200
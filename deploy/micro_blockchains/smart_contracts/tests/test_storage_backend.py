@@ -0,0 +1,19 @@
+# tests/test_storage_backend.py
+
+import pytest
+
+from app.api.models.storage_backend import StorageBackend, JSONStorageBackend
+
+class IncompleteStorageBackend(JSONStorageBackend):
+    """
+    A backend without one of the methods of the interface.
+    """
+    size = StorageBackend.size
+
+def test_incomplete_backends_cant_be_created(tmp_path):
+    with pytest.raises(TypeError):
+        StorageBackend()
+
+    with pytest.raises(TypeError):
+        IncompleteStorageBackend(snapshot_path=str(tmp_path / "dag.json"), transaction_log={"path": str(tmp_path / "dag.log")},
+                                 state_checkpoint={"path": str(tmp_path / "state_checkpoint.json")})
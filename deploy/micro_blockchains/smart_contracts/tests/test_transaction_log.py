@@ -0,0 +1,34 @@
+# tests/test_transaction_log.py
+
+from app.api.models.transaction_log import TransactionLog
+
+def test_recovery_cuts_the_torn_last_record(tmp_path):
+    path = str(tmp_path / "dag.log")
+    log = TransactionLog(path=path)
+    for number in range(3):
+        log.append({"op": "add", "id": number})
+    log.flush()
+
+    # The node crashed in the middle of a write
+    with open(path, "ab") as f:
+        f.write(b'{"op": "add", "id"')
+
+    recovered = TransactionLog(path=path)
+    assert [record["id"] for record in recovered.read()] == [0, 1, 2]
+
+    recovered.append({"op": "add", "id": 3})
+    recovered.flush()
+
+    assert [record["id"] for record in TransactionLog(path=path).read()] == [0, 1, 2, 3]
+
+def test_record_without_line_break_is_torn(tmp_path):
+    path = str(tmp_path / "dag.log")
+    with open(path, "wb") as f:
+        f.write(b'{"op": "add", "id": 0}\n{"op": "add", "id": 1}')
+
+    log = TransactionLog(path=path)
+    assert [record["id"] for record in log.read()] == [0]
+
+    log.append({"op": "add", "id": 2})
+    log.flush()
+    assert [record["id"] for record in TransactionLog(path=path).read()] == [0, 2]
@@ -0,0 +1,122 @@
+# tests/test_transactions_routes.py
+
+import time
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.api.models.dag as dag_module
+from app.api.config.env import API_NAME
+from app.api.models.transaction import Transaction, TransactionCreate, OperationType
+
+TRANSACTIONS_PATH = f"/api/v1/{API_NAME}/transactions"
+
+CONTRACT = """
+def add(n):
+    state["total"] = state.get("total", 0) + n
+    return n
+"""
+
+def create_deployment(keys: tuple, number: int, created: datetime = None) -> TransactionCreate:
+    public_key, private_key = keys
+    transaction = TransactionCreate(sender=public_key, payload=f"{CONTRACT}\n# {number}", operation_type=OperationType.DEPLOY,
+                                    created=created or datetime.utcnow())
+    transaction.sign_transaction(private_key)
+    return transaction
+
+def sign(keys: tuple, number: int) -> dict:
+    transaction = create_deployment(keys, number)
+    return {"sender": transaction.sender, "payload": transaction.payload, "operation_type": transaction.operation_type.value,
+            "signature": transaction.signature}
+
+def wait_for_status(client: TestClient, transaction_id: str, expected_status: str) -> None:
+    for _ in range(100):
+        response = client.get(f"{TRANSACTIONS_PATH}/status/{transaction_id}/")
+        if response.json()["data"]["status"] == expected_status:
+            return
+        time.sleep(0.05)
+    pytest.fail(f"The status of {transaction_id} is not {expected_status}")
+
+@pytest.fixture
+def async_dag(create_dag, monkeypatch):
+    """
+    A DAG with the asynchronous ingestion queue (ASYNC_INGESTION) of a single transaction.
+    """
+    monkeypatch.setattr(dag_module, "ASYNC_INGESTION", True)
+    monkeypatch.setattr(dag_module, "INGESTION_QUEUE_MAX_SIZE", 1)
+    dag = create_dag()
+    yield dag
+    dag.ingestion_queue.stop()
+
+def test_queued_transactions_are_added_or_refused_when_the_queue_is_full(async_dag, create_client, keys):
+    client = create_client(async_dag)
+
+    # The writer waits for the writer lock of the DAG with the first transaction, the second one fills the queue
+    with async_dag._lock:
+        first = client.post(f"{TRANSACTIONS_PATH}/", json=sign(keys, 1))
+        assert first.status_code == 200
+        assert first.json()["data"]["status"] == "queued"
+        while async_dag.ingestion_queue.size():
+            time.sleep(0.01)
+
+        second = client.post(f"{TRANSACTIONS_PATH}/", json=sign(keys, 2))
+        assert second.status_code == 200
+        assert client.post(f"{TRANSACTIONS_PATH}/", json=sign(keys, 3)).status_code == 429
+
+        first_id = first.json()["data"]["transaction_id"]
+        assert client.get(f"{TRANSACTIONS_PATH}/status/{first_id}/").json()["data"]["status"] == "queued"
+
+    wait_for_status(client, first_id, "accepted")
+    wait_for_status(client, second.json()["data"]["transaction_id"], "accepted")
+    assert async_dag.has_transaction(first_id)
+
+def test_transactions_are_refused_without_writer(async_dag, create_client, keys):
+    client = create_client(async_dag)
+    async_dag.ingestion_queue.stop()
+
+    assert client.post(f"{TRANSACTIONS_PATH}/", json=sign(keys, 1)).status_code == 503
+
+@pytest.mark.parametrize("limit", [1, 3, 4, 7])
+def test_history_pages_span_the_dag_and_the_archive(create_dag, create_client, keys, create_keys, monkeypatch, limit):
+    monkeypatch.setattr(dag_module, "PRUNING_DEPTH", 2)
+    monkeypatch.setattr(dag_module, "STATE_CHECKPOINT_INTERVAL", 1)
+    dag = create_dag()
+    client = create_client(dag)
+
+    # Transactions of the sender and of another one, alternately. The ones of the sender with the same created
+    # timestamp are ordered by ID.
+    created = datetime.utcnow()
+    other_keys = create_keys()
+    transaction_keys = []
+    for number in range(24):
+        transaction = create_deployment(keys if number % 2 else other_keys, number, created + timedelta(microseconds=number // 4))
+        assert dag.add_transaction(transaction)
+        if number % 2:
+            transaction_keys.append((transaction.created, Transaction(**transaction.dict()).generate_transaction_id()))
+
+    # The checkpoint is due on persist, the first transactions are archived and the last ones are kept in the DAG
+    dag.persist()
+    expected_ids = [transaction_id for _, transaction_id in sorted(transaction_keys)]
+    assert any(transaction_id not in dag.store for transaction_id in expected_ids)
+    assert any(transaction_id in dag.store for transaction_id in expected_ids)
+
+    transaction_ids = []
+    cursor = None
+    for _ in range(len(expected_ids) + 1):
+        params = {"public_key": keys[0], "limit": limit}
+        if cursor is not None:
+            params["cursor"] = cursor
+        response = client.get(f"{TRANSACTIONS_PATH}/sender/", params=params)
+        assert response.status_code == 200
+
+        page = response.json()["data"]
+        assert len(page["transactions"]) <= limit
+        transaction_ids.extend(transaction["id"] for transaction in page["transactions"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert cursor is None
+    assert transaction_ids == expected_ids